@@ -1,19 +1,145 @@
 """Main."""
 
 import argparse
+from collections.abc import Callable
+from datetime import date
+import os
+import re
 
 from pyesef import __version__
-from pyesef.download import download_packages
-from pyesef.parse_xbrl_file import ReadFiling, UpdateStatementDefinitionJson
+from pyesef.const import PATH_PROJECT_ROOT, ExtractionEngine
+from pyesef.log import setup_logging
+from pyesef.utils.budget import FilingBudget
+from pyesef.utils.filing_filter import FilingFilter, read_lei_file
+from pyesef.utils.shard import Shard
 
-if __name__ == "__main__":
+# Dates are given in the extended ISO format, with a two-digit month and day
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _to_date(value: str) -> date:
+    """Return a date given as YYYY-MM-DD on the command line."""
+    try:
+        if DATE_PATTERN.fullmatch(value) is not None:
+            return date.fromisoformat(value)
+    except ValueError:
+        pass
+
+    raise argparse.ArgumentTypeError(f"{value!r} is not a date like YYYY-MM-DD")
+
+
+def _get_filing_filter(org_args: argparse.Namespace) -> FilingFilter | None:
+    """Return the filing filter selected on the command line, if any."""
+    if not any(
+        [
+            org_args.country,
+            org_args.lei_file,
+            org_args.period_from,
+            org_args.period_to,
+        ]
+    ):
+        return None
+
+    return FilingFilter(
+        country_set=(
+            frozenset(country.upper() for country in org_args.country)
+            if org_args.country
+            else None
+        ),
+        lei_set=read_lei_file(org_args.lei_file) if org_args.lei_file else None,
+        period_end_from=org_args.period_from,
+        period_end_to=org_args.period_to,
+    )
+
+
+def _get_filing_budget(org_args: argparse.Namespace) -> FilingBudget | None:
+    """Return the filing budget selected on the command line, if any."""
+    if org_args.time_budget is None and org_args.memory_budget is None:
+        return None
+
+    return FilingBudget(
+        time_limit=org_args.time_budget,
+        memory_limit=(
+            org_args.memory_budget * 1024 * 1024
+            if org_args.memory_budget is not None
+            else None
+        ),
+    )
+
+
+def _export_wide_matrix(
+    org_args: argparse.Namespace, filing_filter: FilingFilter | None
+) -> None:
+    """Export the fact store of the shard selected on the command line."""
+    # pylint: disable=import-outside-toplevel
+    from pyesef.parse_xbrl_file.fact_store import FactStore
+    from pyesef.wide_matrix import export_wide_matrix
+
+    path = FactStore.PATH_FACT_STORE
+    if org_args.shard is not None:
+        path = org_args.shard.apply_to_path(path)
+
+    if filing_filter is None:
+        filing_filter = FilingFilter()
+
+    export_wide_matrix(
+        org_args.export_wide,
+        path=path,
+        country=filing_filter.country_set,
+        lei=filing_filter.lei_set,
+        period_start=filing_filter.period_end_from,
+        period_end=filing_filter.period_end_to,
+    )
+
+
+def _update_statement_definition(org_args: argparse.Namespace) -> None:
+    """Read the taxonomies selected on the command line into statement definitions."""
+    # pylint: disable=import-outside-toplevel
+    from pyesef.parse_xbrl_file import UpdateStatementDefinitionJson
+    from pyesef.parse_xbrl_file.load_statement_definition import (
+        TAXONOMY_URL_DATA,
+        TaxonomyFileData,
+    )
+
+    UpdateStatementDefinitionJson(
+        taxonomy_list=(
+            tuple(
+                TaxonomyFileData(zip_url=zip_url) for zip_url in org_args.taxonomy_url
+            )
+            if org_args.taxonomy_url
+            else TAXONOMY_URL_DATA
+        )
+    )
+
+
+def _start_metrics(org_args: argparse.Namespace) -> Callable[[], None]:
+    """Start exposing the metrics selected on the command line, return a stop."""
+    # pylint: disable=import-outside-toplevel
+    if org_args.metrics_port is not None:
+        from pyesef.utils.metrics import start_metrics_server
+
+        start_metrics_server(port=org_args.metrics_port)
+
+    if org_args.metrics_file:
+        from pyesef.utils.metrics import start_metrics_textfile_writer
+
+        return start_metrics_textfile_writer(path=org_args.metrics_file)
+
+    return lambda: None
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    """Return the parser of the command line arguments."""
     parser = argparse.ArgumentParser(description="Handle XBRL files.")
     parser.add_argument("--version", action="version", version=f"pyesef {__version__}")
     parser.add_argument(
         "--export",
         "-e",
         action="store_true",
-        help="Export all filings data to csv",
+        help=(
+            "Export all filings data to csv. Combined with --download, each package "
+            "is parsed as soon as it has been downloaded"
+        ),
     )
     parser.add_argument(
         "--download",
@@ -21,6 +147,147 @@ if __name__ == "__main__":
         action="store_true",
         help="Download all packages from repository",
     )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Parse filings again that failed in an earlier export",
+    )
+    parser.add_argument(
+        "--engine",
+        type=ExtractionEngine,
+        choices=list(ExtractionEngine),
+        default=ExtractionEngine.ARELLE,
+        help=(
+            "How to read facts when exporting. The inline engine reads the inline "
+            "XBRL report without loading the taxonomy, and falls back to Arelle"
+        ),
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        metavar="SECONDS",
+        help=(
+            "Read each filing in a worker process that is stopped after SECONDS, "
+            "the filing is then recorded as failed"
+        ),
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        metavar="MB",
+        help=(
+            "Read each filing in a worker process that is stopped when it uses "
+            "more than MB megabytes, the filing is then recorded as failed"
+        ),
+    )
+    parser.add_argument(
+        "--shard",
+        type=Shard.from_string,
+        metavar="i/N",
+        help=(
+            "Only download and export shard i (counting from 0) of N. Each shard "
+            "writes its own output files"
+        ),
+    )
+    parser.add_argument(
+        "--country",
+        nargs="+",
+        metavar="CC",
+        help=(
+            "Only download and export filings from these countries (ISO 3166-1 "
+            "alpha-2). Downloads default to the Nordic countries"
+        ),
+    )
+    parser.add_argument(
+        "--lei-file",
+        metavar="FILE",
+        help="Only download and export filings of the LEIs in FILE, one per line",
+    )
+    parser.add_argument(
+        "--period-from",
+        type=_to_date,
+        metavar="YYYY-MM-DD",
+        help=(
+            "Only download and export filings with a period end on or after this "
+            "date"
+        ),
+    )
+    parser.add_argument(
+        "--period-to",
+        type=_to_date,
+        metavar="YYYY-MM-DD",
+        help=(
+            "Only download and export filings with a period end on or before this "
+            "date"
+        ),
+    )
+    parser.add_argument(
+        "--export-wide",
+        metavar="FILE",
+        help=(
+            "Export the facts in the fact store to a sparse entity by period by "
+            "item matrix in FILE (.npz), filtered on --country, --lei-file and "
+            "--period-from/--period-to"
+        ),
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        metavar="FILE",
+        help=(
+            "Merge output files (.xlsx or .sqlite) into one file, dropping "
+            "duplicates"
+        ),
+    )
+    parser.add_argument(
+        "--merge-output",
+        default=os.path.join(PATH_PROJECT_ROOT, "output.merged.xlsx"),
+        metavar="FILE",
+        help="The file (.xlsx or .csv) to write merged output to",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help=(
+            "Keep running and parse filings put in the archives folder or sent to "
+            "the pyesef.sock socket"
+        ),
+    )
+    parser.add_argument(
+        "--build-index",
+        action="store_true",
+        help=(
+            "Index the entrypoints of all packages in the archives folder, or of "
+            "those of the shard, so that later exports don't have to scan the "
+            "packages"
+        ),
+    )
+    parser.add_argument(
+        "--taxonomy-url",
+        nargs="+",
+        metavar="URL",
+        help=(
+            "The ESMA taxonomy zip-files to read statement definitions from with "
+            "--update. Versions already read are skipped"
+        ),
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help=(
+            "Serve live progress metrics in the Prometheus text format on "
+            "http://127.0.0.1:PORT/metrics"
+        ),
+    )
+    parser.add_argument(
+        "--metrics-file",
+        metavar="FILE",
+        help=(
+            "Write live progress metrics in the Prometheus text format to FILE, eg "
+            "for the textfile collector of the node exporter"
+        ),
+    )
     parser.add_argument(
         "--update",
         "-u",
@@ -28,13 +295,85 @@ if __name__ == "__main__":
         help="Update statement definitions",
     )
 
-    org_args = parser.parse_args()
+    return parser
+
+
+def main() -> None:
+    """
+    Run the command line interface.
+
+    Modules are imported when needed, so that eg downloads don't have to wait for
+    Arelle and pandas to be imported.
+    """
+    org_args = _get_parser().parse_args()
+
+    setup_logging()
+
+    filing_filter = _get_filing_filter(org_args)
+    budget = _get_filing_budget(org_args)
+
+    stop_metrics = _start_metrics(org_args)
+
+    # pylint: disable=import-outside-toplevel
+    if org_args.download and org_args.export:
+        from pyesef.pipeline import download_and_export
+
+        download_and_export(
+            retry_failed=org_args.retry_failed,
+            shard=org_args.shard,
+            filing_filter=filing_filter,
+            engine=org_args.engine,
+            budget=budget,
+        )
+    elif org_args.download:
+        from pyesef.download import download_packages
+
+        download_packages(shard=org_args.shard, filing_filter=filing_filter)
+    elif org_args.export:
+        from pyesef.parse_xbrl_file import ReadFiling
 
-    if org_args.download:
-        download_packages()
+        ReadFiling(
+            should_move_parsed_file=False,
+            retry_failed=org_args.retry_failed,
+            shard=org_args.shard,
+            filing_filter=filing_filter,
+            engine=org_args.engine,
+            budget=budget,
+        )
 
-    if org_args.export:
-        ReadFiling(should_move_parsed_file=True)
+    if org_args.export_wide:
+        _export_wide_matrix(org_args, filing_filter=filing_filter)
+
+    if org_args.merge:
+        from pyesef.parse_xbrl_file.merge_output import merge_output_files
+
+        merge_output_files(
+            input_path_list=org_args.merge,
+            output_path=org_args.merge_output,
+        )
+
+    if org_args.build_index:
+        from pyesef.parse_xbrl_file.entrypoint_index import (
+            EntrypointIndex,
+            build_entrypoint_index,
+        )
+
+        index_path = EntrypointIndex.PATH_INDEX
+        if org_args.shard is not None:
+            index_path = org_args.shard.apply_to_path(index_path)
+
+        build_entrypoint_index(path=index_path, shard=org_args.shard)
+
+    if org_args.daemon:
+        from pyesef.daemon import ParseDaemon
+
+        ParseDaemon().run()
 
     if org_args.update:
-        UpdateStatementDefinitionJson()
+        _update_statement_definition(org_args)
+
+    stop_metrics()
+
+
+if __name__ == "__main__":
+    main()
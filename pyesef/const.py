@@ -10,9 +10,22 @@ PATH_BASE = pathlib.Path(__file__).parent.resolve()
 PATH_PROJECT_ROOT = os.path.abspath(os.path.join(PATH_BASE, ".."))
 PATH_STATIC = os.path.join(PATH_PROJECT_ROOT, "pyesef", "static")
 
+PATH_ARCHIVES = os.path.abspath(os.path.join(PATH_PROJECT_ROOT, "archives"))
+PATH_FAILED = os.path.abspath(os.path.join(PATH_PROJECT_ROOT, "error"))
+PATH_PARSED = os.path.abspath(os.path.join(PATH_PROJECT_ROOT, "parsed"))
+
 
 class NiceType(StrEnum):
     """Representation of different types of 'nice types'."""
 
     PER_SHARE = "PerShare"
     SHARES = "Shares"
+
+
+class ExtractionEngine(StrEnum):
+    """Representation of the ways facts can be read from a filing."""
+
+    # Load the full DTS with Arelle
+    ARELLE = "arelle"
+    # Read the inline XBRL report with lxml, falling back to Arelle
+    INLINE = "inline"
@@ -0,0 +1,183 @@
+"""Parse filings in a long-running process."""
+
+from __future__ import annotations
+
+import json
+import os
+import socketserver
+import threading
+from typing import Any
+
+from pyesef.const import PATH_ARCHIVES, PATH_PROJECT_ROOT
+from pyesef.log import LOGGER
+from pyesef.parse_xbrl_file.common import create_controller
+from pyesef.parse_xbrl_file.ledger import JobLedger, get_content_hash
+from pyesef.parse_xbrl_file.read_and_save_filings import (
+    FILE_ENDING_ZIP,
+    ParseListData,
+    ReadFiling,
+)
+
+# Seconds between scans of the watched folder
+DEFAULT_POLL_INTERVAL = 10.0
+
+
+def _to_parse_list_data(zip_file_path: str) -> ParseListData:
+    """Return parse data for a zip-file stored in a country folder."""
+    return ParseListData(
+        zip_file_path=zip_file_path,
+        language_code=os.path.basename(os.path.dirname(zip_file_path)),
+    )
+
+
+class _JobRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handle parse jobs sent to the socket.
+
+    Each request is a line of JSON like {"zip_file_path": "/path/to/file.zip"}, and
+    is answered with a line of JSON holding the job in the ledger.
+    """
+
+    server: _JobServer
+
+    def handle(self) -> None:
+        """Parse the requested file and reply with its job."""
+        try:
+            request = json.loads(self.rfile.readline())
+            response = self.server.daemon.parse(
+                zip_file_path=os.path.abspath(request["zip_file_path"])
+            )
+        except Exception as exc:
+            response = {"status": "failed", "error": str(exc)}
+
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class _JobServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server with access to the daemon."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, daemon: ParseDaemon) -> None:
+        """Init class."""
+        self.daemon = daemon
+        super().__init__(socket_path, _JobRequestHandler)
+
+
+class ParseDaemon:
+    """
+    Parse filings with a controller that is kept running.
+
+    Jobs are accepted on a Unix socket and by watching a folder for new zip-files.
+    The controller and the ESEF plugin are loaded once, so that each filing only
+    costs the time to parse it. Output is written to the same files as ReadFiling.
+    """
+
+    PATH_SOCKET = os.path.join(PATH_PROJECT_ROOT, "pyesef.sock")
+
+    def __init__(
+        self,
+        socket_path: str | None = PATH_SOCKET,
+        watch_folder: str | None = PATH_ARCHIVES,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        """Init class."""
+        self.socket_path = socket_path
+        self.watch_folder = watch_folder
+        self.poll_interval = poll_interval
+
+        self.cntlr = create_controller()
+        # Arelle is not thread safe, parse one job at a time
+        self._parse_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # Modification time and size of files seen by the watcher
+        self._seen_file_map: dict[str, tuple[float, int]] = {}
+
+    def parse(self, zip_file_path: str) -> dict[str, Any]:
+        """Parse a file and return its job in the ledger."""
+        with self._parse_lock:
+            ReadFiling(
+                should_move_parsed_file=False,
+                file_to_parse_list=[_to_parse_list_data(zip_file_path)],
+                cntlr=self.cntlr,
+            )
+
+        ledger = JobLedger()
+        try:
+            job = ledger.get_job(get_content_hash(zip_file_path))
+        finally:
+            ledger.close()
+
+        if job is None:
+            return {"zip_file_path": zip_file_path, "status": None}
+
+        return job
+
+    def find_new_files(self) -> list[str]:
+        """Return zip-files in the watched folder that are new or have changed."""
+        new_file_list: list[str] = []
+
+        if self.watch_folder is None:
+            return new_file_list
+
+        for subdir, _, files in os.walk(self.watch_folder):
+            for file in files:
+                zip_file_path = os.path.join(subdir, file)
+
+                if not zip_file_path.endswith(FILE_ENDING_ZIP):
+                    continue
+
+                stat = os.stat(zip_file_path)
+                file_state = (stat.st_mtime, stat.st_size)
+                if self._seen_file_map.get(zip_file_path) == file_state:
+                    continue
+
+                self._seen_file_map[zip_file_path] = file_state
+                new_file_list.append(zip_file_path)
+
+        return sorted(new_file_list)
+
+    def watch(self) -> None:
+        """Parse new files in the watched folder until stopped."""
+        while not self._stop_event.is_set():
+            new_file_list = self.find_new_files()
+
+            if new_file_list:
+                LOGGER.info(f"Found {len(new_file_list)} new files")
+                # Files already in the ledger are skipped by ReadFiling
+                with self._parse_lock:
+                    ReadFiling(
+                        should_move_parsed_file=False,
+                        file_to_parse_list=[
+                            _to_parse_list_data(zip_file_path)
+                            for zip_file_path in new_file_list
+                        ],
+                        cntlr=self.cntlr,
+                    )
+
+            self._stop_event.wait(self.poll_interval)
+
+    def run(self) -> None:
+        """Run until interrupted."""
+        watch_thread = threading.Thread(target=self.watch, name="watch", daemon=True)
+        watch_thread.start()
+
+        try:
+            if self.socket_path is None:
+                watch_thread.join()
+                return
+
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+            with _JobServer(self.socket_path, daemon=self) as server:
+                LOGGER.info(f"Listening for jobs on {self.socket_path}")
+                server.serve_forever()
+        except KeyboardInterrupt:
+            LOGGER.info("Stopping")
+        finally:
+            self._stop_event.set()
+            with self._parse_lock:
+                self.cntlr.close()
+            if self.socket_path is not None and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
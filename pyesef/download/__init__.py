@@ -2,17 +2,30 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
 import os
 from pathlib import Path
+import time
 import zipfile
 
 import requests
 
 from pyesef.download.api_extractor import api_to_filing_record_list
 from pyesef.log import LOGGER
-from pyesef.utils.decorators import retry
+from pyesef.utils.decorators import get_retry_stats, get_status_code, retry
+from pyesef.utils.file_name import PackageFileName, write_package_identity
+from pyesef.utils.filing_filter import FilingFilter
+from pyesef.utils.metrics import METRICS
+from pyesef.utils.shard import Shard
 
-from .common import Filing
+from .archive_store import ArchiveStore
+from .common import RETRY_STATUS_CODES, Filing
+from .telemetry import (
+    DownloadOutcome,
+    DownloadRecord,
+    DownloadTelemetry,
+    log_download_summary,
+)
 
 
 def is_valid_zip(file_path: str) -> bool:
@@ -26,13 +39,66 @@ def is_valid_zip(file_path: str) -> bool:
         return False
 
 
-@retry()
-def _download_and_verify_package(filing: Filing) -> None:
+def _link_stored_package(filing: Filing, archive_store: ArchiveStore) -> bool:
+    """Link the write location to the stored package, if it is stored already."""
+    if filing.sha256 is None or not archive_store.has_content(filing.sha256):
+        return False
+
+    LOGGER.info(f"File {filing.file_url} already stored, linking")
+    archive_store.link(
+        filing.sha256,
+        write_location=filing.write_location,
+        country_iso_2=filing.country_iso_2,
+        file_name=filing.file_name,
+    )
+    return True
+
+
+def _store_package(file_path: str, filing: Filing, archive_store: ArchiveStore) -> None:
+    """Move a downloaded package into the archive store."""
+    content_hash = archive_store.add(
+        file_path,
+        write_location=filing.write_location,
+        country_iso_2=filing.country_iso_2,
+        file_name=filing.file_name,
+    )
+
+    if filing.sha256 is not None and content_hash != filing.sha256:
+        LOGGER.warning(
+            f"{filing.file_url} has the SHA-256 {content_hash}, not "
+            f"{filing.sha256} as listed"
+        )
+
+
+@retry(
+    num_attempts=6,
+    exc=requests.RequestException,
+    log=True,
+    sleeptime=1,
+    backoff=2,
+    max_sleeptime=60,
+    jitter=True,
+    max_total_time=300,
+    retry_on_status=RETRY_STATUS_CODES,
+)
+def _download_and_verify_package(
+    filing: Filing,
+    download_record: DownloadRecord | None = None,
+    archive_store: ArchiveStore | None = None,
+) -> bool:
     """
     Download a package and store it the archive-folder.
 
-    Verify that it's a valid ZIP, or delete the file.
+    Verify that it's a valid ZIP, or delete the file. Return True if a valid
+    package is stored. The metrics of the attempt are set on the download record.
+    With an archive store, the package is stored by its content hash and isn't
+    downloaded if a package with the hash listed in the API is already stored.
     """
+    if download_record is None:
+        download_record = DownloadRecord(file_url=filing.file_url)
+    download_record.byte_count = 0
+    download_record.status_code = None
+
     Path(filing.download_folder).mkdir(
         parents=True,
         exist_ok=True,
@@ -43,26 +109,156 @@ def _download_and_verify_package(filing: Filing) -> None:
     # The file already exists, do an early return
     if os.path.exists(filing.write_location):
         LOGGER.info(f"File {filing.file_url} already exists, skipping")
-        return
+        download_record.outcome = DownloadOutcome.EXISTING
+        return True
+
+    if archive_store is not None and _link_stored_package(filing, archive_store):
+        download_record.outcome = DownloadOutcome.EXISTING
+        return True
+
+    start_time = time.monotonic()
+    # Download to a temporary file, so that a retried download doesn't find a
+    # partial file in the write location
+    part_location = f"{filing.write_location}.part"
+    try:
+        with requests.get(filing.file_url, stream=True, timeout=30) as req:
+            download_record.status_code = req.status_code
+            req.raise_for_status()
 
-    req = requests.get(filing.file_url, stream=True, timeout=30)
-    with open(filing.write_location, "wb") as _file:
-        for chunk in req.iter_content(chunk_size=2048):
-            _file.write(chunk)
+            with open(part_location, "wb") as _file:
+                for chunk in req.iter_content(chunk_size=2048):
+                    _file.write(chunk)
+                    download_record.byte_count += len(chunk)
+                    METRICS.download.add_bytes(len(chunk))
+    except BaseException:
+        if os.path.exists(part_location):
+            os.remove(part_location)
+        raise
+    download_record.transfer_duration = time.monotonic() - start_time
 
-    if not is_valid_zip(filing.write_location):
+    start_time = time.monotonic()
+    is_valid_package = is_valid_zip(part_location)
+    download_record.verify_duration = time.monotonic() - start_time
+
+    if not is_valid_package:
         LOGGER.warning(f"{filing.write_location} not a valid zip, deleting")
-        os.remove(filing.write_location)
+        os.remove(part_location)
+        download_record.outcome = DownloadOutcome.INVALID
+        return False
 
+    if archive_store is None:
+        os.replace(part_location, filing.write_location)
+    else:
+        _store_package(part_location, filing=filing, archive_store=archive_store)
+    download_record.outcome = DownloadOutcome.DOWNLOADED
 
-def download_packages() -> None:
-    """Download XBRL-packages from XBRL.org."""
-    data_list = api_to_filing_record_list()
+    return True
+
+
+def download_packages(
+    on_package_ready: Callable[[Filing], None] | None = None,
+    shard: Shard | None = None,
+    filing_filter: FilingFilter | None = None,
+    telemetry: DownloadTelemetry | None = None,
+    archive_store: ArchiveStore | None = None,
+) -> None:
+    """
+    Download XBRL-packages from XBRL.org.
+
+    If on_package_ready is given, it is called with each filing as soon as its
+    package is stored and verified. If a shard is given, only the packages of that
+    shard are downloaded. If a filing filter is given, only the selected packages
+    are downloaded. Each download is added to the telemetry, by default the
+    download log, and a summary is logged at the end. Packages are stored by their
+    content hash in the archive store, by default the one in the project root.
+    """
+    close_list: list[DownloadTelemetry | ArchiveStore] = []
+    if telemetry is None:
+        telemetry = DownloadTelemetry()
+        close_list.append(telemetry)
+    if archive_store is None:
+        archive_store = ArchiveStore()
+        close_list.append(archive_store)
+
+    try:
+        _download_package_list(
+            on_package_ready=on_package_ready,
+            shard=shard,
+            filing_filter=filing_filter,
+            telemetry=telemetry,
+            archive_store=archive_store,
+        )
+    finally:
+        for item in close_list:
+            item.close()
+
+
+def _download_package_list(
+    on_package_ready: Callable[[Filing], None] | None,
+    shard: Shard | None,
+    filing_filter: FilingFilter | None,
+    telemetry: DownloadTelemetry,
+    archive_store: ArchiveStore,
+) -> None:
+    """Download the packages and add each download to the telemetry."""
+    data_list = api_to_filing_record_list(filing_filter=filing_filter)
+
+    if shard is not None:
+        data_list = [
+            filing
+            for filing in data_list
+            if shard.includes(lei=filing.lei, period_end=filing.period_end)
+        ]
 
     LOGGER.info(f"{len(data_list)} items found")
+    METRICS.download.add_total(len(data_list))
+
+    # Packages are downloaded one at a time, so the retries of a package are the
+    # difference of the counter
+    retry_stats = get_retry_stats(_download_and_verify_package)
 
     for idx, item in enumerate(data_list):
         if idx % 10 == 0:
             LOGGER.info(f"Parsing {idx}/{len(data_list)}")
 
-        _download_and_verify_package(item)
+        download_record = DownloadRecord(file_url=item.file_url)
+        retry_count = retry_stats.retries
+        start_time = time.monotonic()
+        try:
+            is_valid_package = _download_and_verify_package(
+                item, download_record=download_record, archive_store=archive_store
+            )
+        except requests.RequestException as exc:
+            is_valid_package = False
+            download_record.outcome = DownloadOutcome.FAILED
+            download_record.status_code = get_status_code(exc)
+            LOGGER.warning(f"Unable to download {item.file_url} due to {exc}")
+
+        download_record.duration = time.monotonic() - start_time
+        download_record.retry_count = retry_stats.retries - retry_count
+        telemetry.add(download_record)
+
+        METRICS.download.record(
+            duration=download_record.duration,
+            item_count=int(is_valid_package),
+            failed=not is_valid_package,
+        )
+
+        if not is_valid_package:
+            continue
+
+        # The export reads the identity listed in the API, so that it assigns the
+        # package to the same shard as the download, whatever the package is named
+        write_package_identity(
+            item.write_location,
+            PackageFileName(lei=item.lei, period_end=item.period_end),
+        )
+
+        if on_package_ready is not None:
+            on_package_ready(item)
+
+    log_download_summary(telemetry.summarize())
+    LOGGER.info(
+        f"Downloads retried {retry_stats.retries} times, waiting "
+        f"{retry_stats.sleep_time:.0f}s, {retry_stats.failures} failed"
+    )
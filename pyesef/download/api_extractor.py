@@ -2,83 +2,150 @@
 
 from __future__ import annotations
 
+from dataclasses import replace
 import json
-import math
-from urllib import request
+from typing import Any
+from urllib.error import URLError
+from urllib.parse import urlencode, urljoin
 
-from pyesef.download.common import Country, Filing
+from pyesef.download.common import RETRY_STATUS_CODES, Country, Filing
+from pyesef.download.http_cache import HttpCache
 from pyesef.log import LOGGER
+from pyesef.utils.decorators import retry
+from pyesef.utils.filing_filter import FilingFilter
 
-# Loads 500 items at a time
-API_URL = "https://filings.xbrl.org/api/filings?page%5Bsize%5D=500&page%5Bnumber%5D="
+API_URL = "https://filings.xbrl.org/api/filings"
 
+# Loads 500 items at a time
+PAGE_SIZE = 500
+
+# Downloads are limited to the Nordics unless other countries are selected
+DEFAULT_COUNTRY_SET = frozenset(country.value for country in Country)
+
+
+def get_page_url(filter_list: list[dict[str, Any]], page_no: int) -> str:
+    """Return the URL of a page of the API, filtered on the server."""
+    query: dict[str, Any] = {
+        "page[size]": PAGE_SIZE,
+        "page[number]": page_no,
+    }
+    if filter_list:
+        query["filter"] = json.dumps(filter_list, separators=(",", ":"))
+
+    return f"{API_URL}?{urlencode(query)}"
+
+
+@retry(
+    num_attempts=5,
+    exc=URLError,
+    log=True,
+    backoff=2,
+    jitter=True,
+    retry_on_status=RETRY_STATUS_CODES,
+)
+def _load_page(http_cache: HttpCache, url: str) -> Any:
+    """Load a page of the API."""
+    return json.loads(http_cache.get(url).decode())
+
+
+def get_next_page_url(
+    data: Any, filter_list: list[dict[str, Any]], page_no: int
+) -> str | None:
+    """
+    Return the URL of the page after a page, or None if it is the last page.
+
+    The next link of the page is followed, as it has the page numbering and page
+    size of the server. If the page has no links, pages are numbered until a page
+    has fewer items than requested.
+    """
+    if "links" in data:
+        next_url = data["links"].get("next")
+        return None if next_url is None else urljoin(API_URL, next_url)
+
+    if len(data["data"]) < PAGE_SIZE:
+        return None
+
+    return get_page_url(filter_list, page_no)
+
+
+def api_to_filing_record_list(
+    http_cache: HttpCache | None = None,
+    filing_filter: FilingFilter | None = None,
+) -> list[Filing]:
+    """
+    Load API data.
+
+    Pages are cached on disk and only downloaded again if they have changed. The
+    filters of filing_filter are sent to the API, so that only the selected
+    filings are paged through, and checked again on each filing.
+    """
+    filing_list: list[Filing] = []
+    hash_set: set[str] = set()
 
-DEBUG_FILTER_LEI_LIST: list[str] = []
+    if http_cache is None:
+        http_cache = HttpCache()
 
+    if filing_filter is None:
+        filing_filter = FilingFilter()
 
-def api_to_filing_record_list() -> list[Filing]:
-    """Load API data."""
-    filing_list: list[Filing] = []
-    hash_list: list[str] = []
+    if filing_filter.country_set is None:
+        filing_filter = replace(filing_filter, country_set=DEFAULT_COUNTRY_SET)
 
-    # Determine number of pages with data
-    with request.urlopen(f"{API_URL}0") as url:
-        data = json.loads(url.read().decode())
-        max_page_no = math.ceil(data["meta"]["count"] / 30)
+    filter_list = filing_filter.to_api_filter_list()
 
     page_no = 0
+    page_url: str | None = get_page_url(filter_list, page_no)
+    # A server that links back to a page it has sent must not page forever
+    page_url_set: set[str] = set()
 
-    while page_no < max_page_no:
+    while page_url is not None and page_url not in page_url_set:
         LOGGER.info(f"Working on page {page_no}")
-        with request.urlopen(f"{API_URL}{page_no}") as url:
-            data = json.loads(url.read().decode())
+        page_url_set.add(page_url)
+        data = _load_page(http_cache, page_url)
 
-            # There is no more data, we can return here
-            if len(data["data"]) == 0:
-                LOGGER.info("No data, aborting")
-                return filing_list
+        # There is no more data, we can return here
+        if len(data["data"]) == 0:
+            LOGGER.info("No data, aborting")
+            break
 
-            for filing in data["data"]:
+        for filing in data["data"]:
 
-                attributes = filing["attributes"]
-                country_iso_2 = attributes["country"]
+            attributes = filing["attributes"]
 
-                # Filter on the Nordics
-                if country_iso_2 not in [
-                    Country.DENMARK.value,
-                    Country.FINLAND.value,
-                    Country.ICELAND.value,
-                    Country.NORWAY.value,
-                    Country.SWEDEN.value,
-                ]:
-                    continue
+            relationships = filing["relationships"]
 
-                relationships = filing["relationships"]
+            related_list = str(relationships["entity"]["links"]["related"]).split("/")
 
-                related_list = str(relationships["entity"]["links"]["related"]).split(
-                    "/"
-                )
-
-                lei = related_list[-1]
+            lei = related_list[-1]
 
-                # Allow debugging by filtering on the LEI codes in DEBUG_FILTER_LEI_LIST
-                if len(DEBUG_FILTER_LEI_LIST) > 0 and lei not in DEBUG_FILTER_LEI_LIST:
-                    continue
+            period_end = attributes["period_end"]
 
-                period_end = attributes["period_end"]
+            if not filing_filter.includes(
+                country_iso_2=attributes["country"],
+                lei=lei,
+                period_end=period_end,
+            ):
+                continue
 
-                hash_key = f"{lei}{period_end}"
-                if hash_key not in hash_list:
-                    filing_list.append(
-                        Filing(
-                            lei=lei,
-                            country_iso_2=attributes["country"],
-                            period_end=period_end,
-                            package_url=attributes["package_url"],
-                        )
+            hash_key = f"{lei}{period_end}"
+            if hash_key not in hash_set:
+                filing_list.append(
+                    Filing(
+                        lei=lei,
+                        country_iso_2=attributes["country"],
+                        period_end=period_end,
+                        package_url=attributes["package_url"],
+                        sha256=attributes.get("sha256"),
                     )
-                    hash_list.append(hash_key)
+                )
+                hash_set.add(hash_key)
 
         page_no += 1
+        page_url = get_next_page_url(data, filter_list=filter_list, page_no=page_no)
+
+    LOGGER.info(
+        f"{http_cache.stats.hits} pages unchanged since the last run, "
+        f"{http_cache.stats.misses} pages downloaded"
+    )
 
     return filing_list
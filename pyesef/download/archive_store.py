@@ -0,0 +1,156 @@
+"""Store report packages by the hash of their content."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import shutil
+import sqlite3
+import time
+
+from pyesef.const import PATH_PROJECT_ROOT
+from pyesef.log import LOGGER
+from pyesef.parse_xbrl_file.ledger import get_content_hash
+
+_SQL_CREATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive (
+    content_hash TEXT PRIMARY KEY,
+    file_size INTEGER NOT NULL,
+    stored_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS location (
+    country_iso_2 TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    content_hash TEXT NOT NULL REFERENCES archive (content_hash),
+    PRIMARY KEY (country_iso_2, file_name)
+);
+
+CREATE INDEX IF NOT EXISTS location_content_hash ON location (content_hash);
+"""
+
+_SQL_ADD_LOCATION = """
+INSERT INTO location (country_iso_2, file_name, content_hash)
+VALUES (:country_iso_2, :file_name, :content_hash)
+ON CONFLICT (country_iso_2, file_name) DO UPDATE SET
+    content_hash = excluded.content_hash
+"""
+
+
+class ArchiveStore:
+    """
+    Content-addressed store of report packages.
+
+    Each package is stored once, named by the SHA-256 of its content. The
+    (country, file name) path in the archive folder, which the parser reads, is a
+    hard link to the stored package, or a copy if the file system has no hard
+    links. The location table maps each such path to its content hash, so a package
+    listed under several catalogue entries or countries is downloaded and stored
+    once, and has the same content hash in the ledger, so it is parsed once.
+    """
+
+    PATH_ARCHIVE_STORE = os.path.join(PATH_PROJECT_ROOT, "archive_store.sqlite")
+    PATH_CONTENT = os.path.join(PATH_PROJECT_ROOT, "archive_content")
+
+    def __init__(
+        self, path: str = PATH_ARCHIVE_STORE, content_folder: str = PATH_CONTENT
+    ) -> None:
+        """Init class."""
+        self.path = path
+        self.content_folder = content_folder
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(_SQL_CREATE_SCHEMA)
+
+    def get_content_path(self, content_hash: str) -> str:
+        """Return the path of a stored package, in a sub folder per hash prefix."""
+        return os.path.join(
+            self.content_folder, content_hash[:2], f"{content_hash}.zip"
+        )
+
+    def has_content(self, content_hash: str) -> bool:
+        """Return True if a package with the content hash is stored."""
+        row = self.connection.execute(
+            "SELECT 1 FROM archive WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        return row is not None and os.path.exists(self.get_content_path(content_hash))
+
+    def get_content_hash(self, country_iso_2: str, file_name: str) -> str | None:
+        """Return the content hash of a path, or None if it is not in the store."""
+        row = self.connection.execute(
+            "SELECT content_hash FROM location "
+            "WHERE country_iso_2 = ? AND file_name = ?",
+            (country_iso_2, file_name),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return str(row[0])
+
+    def add(
+        self, file_path: str, write_location: str, country_iso_2: str, file_name: str
+    ) -> str:
+        """
+        Move a downloaded package into the store and link it to its write location.
+
+        If a package with the same content is already stored, the file is deleted.
+        Return the content hash.
+        """
+        content_hash = get_content_hash(file_path)
+
+        if self.has_content(content_hash):
+            os.remove(file_path)
+        else:
+            content_path = self.get_content_path(content_hash)
+            Path(os.path.dirname(content_path)).mkdir(parents=True, exist_ok=True)
+            file_size = os.path.getsize(file_path)
+            os.replace(file_path, content_path)
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO archive (content_hash, file_size, "
+                    "stored_at) VALUES (?, ?, ?)",
+                    (content_hash, file_size, time.time()),
+                )
+
+        self.link(
+            content_hash,
+            write_location=write_location,
+            country_iso_2=country_iso_2,
+            file_name=file_name,
+        )
+
+        return content_hash
+
+    def link(
+        self, content_hash: str, write_location: str, country_iso_2: str, file_name: str
+    ) -> None:
+        """Make the write location a hard link to a stored package."""
+        content_path = self.get_content_path(content_hash)
+
+        # Link to a temporary name, so that the write location is never partial
+        link_location = f"{write_location}.link"
+        if os.path.exists(link_location):
+            os.remove(link_location)
+
+        try:
+            os.link(content_path, link_location)
+        except OSError as exc:
+            LOGGER.debug(f"Unable to link {content_path} due to {exc}, copying")
+            shutil.copyfile(content_path, link_location)
+
+        os.replace(link_location, write_location)
+
+        with self.connection:
+            self.connection.execute(
+                _SQL_ADD_LOCATION,
+                {
+                    "country_iso_2": country_iso_2,
+                    "file_name": file_name,
+                    "content_hash": content_hash,
+                },
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
@@ -4,10 +4,13 @@ from dataclasses import dataclass
 from enum import StrEnum
 import os
 
-from pyesef.parse_xbrl_file.read_and_save_filings import PATH_ARCHIVES
+from pyesef.const import PATH_ARCHIVES
 
 BASE_URL = "https://filings.xbrl.org/"
 
+# Throttling and transient server errors are retried, other errors are not
+RETRY_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
 
 class Country(StrEnum):
     """Representation of different countries."""
@@ -27,6 +30,8 @@ class Filing:
     package_url: str
     period_end: str
     lei: str
+    # The SHA-256 of the package, as listed in the API
+    sha256: str | None = None
 
     @property
     def file_url(self) -> str:
@@ -0,0 +1,106 @@
+"""Cache HTTP responses on disk."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+from pathlib import Path
+from urllib import request
+from urllib.error import HTTPError
+
+from pyesef.const import PATH_PROJECT_ROOT
+
+HTTP_STATUS_NOT_MODIFIED = 304
+
+
+@dataclass
+class HttpCacheStats:
+    """Counters of an HTTP cache."""
+
+    # Responses served from the cache after a 304 Not Modified
+    hits: int = 0
+    # Responses downloaded in full
+    misses: int = 0
+    bytes_downloaded: int = 0
+
+
+class HttpCache:
+    """
+    On-disk cache of HTTP responses.
+
+    Responses with an ETag or Last-Modified header are stored, and later requests
+    for the same URL are sent as conditional requests. If the server answers 304
+    Not Modified, the stored response is returned.
+    """
+
+    PATH_HTTP_CACHE = os.path.join(PATH_PROJECT_ROOT, "cache", "http")
+
+    def __init__(self, cache_folder: str = PATH_HTTP_CACHE, timeout: int = 30) -> None:
+        """Init class."""
+        self.cache_folder = cache_folder
+        self.timeout = timeout
+        self.stats = HttpCacheStats()
+
+    def _get_paths(self, url: str) -> tuple[str, str]:
+        """Return the paths of the stored body and headers of a URL."""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return (
+            os.path.join(self.cache_folder, f"{key}.body"),
+            os.path.join(self.cache_folder, f"{key}.json"),
+        )
+
+    def _store(self, url: str, body: bytes, validator_map: dict[str, str]) -> None:
+        """Store a response, replacing any earlier response atomically."""
+        body_path, header_path = self._get_paths(url)
+        Path(self.cache_folder).mkdir(parents=True, exist_ok=True)
+
+        for path, content in (
+            (body_path, body),
+            (header_path, json.dumps({"url": url, **validator_map}).encode()),
+        ):
+            with open(f"{path}.tmp", "wb") as _file:
+                _file.write(content)
+            os.replace(f"{path}.tmp", path)
+
+    def get(self, url: str) -> bytes:
+        """Return the body of a URL, from the cache if it has not been modified."""
+        body_path, header_path = self._get_paths(url)
+
+        request_header_map: dict[str, str] = {}
+        if os.path.exists(body_path) and os.path.exists(header_path):
+            with open(header_path, encoding="UTF-8") as _file:
+                validator_map = json.load(_file)
+            if "etag" in validator_map:
+                request_header_map["If-None-Match"] = validator_map["etag"]
+            if "last_modified" in validator_map:
+                request_header_map["If-Modified-Since"] = validator_map["last_modified"]
+
+        try:
+            with request.urlopen(
+                request.Request(url, headers=request_header_map),
+                timeout=self.timeout,
+            ) as response:
+                body: bytes = response.read()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except HTTPError as err:
+            if err.code != HTTP_STATUS_NOT_MODIFIED or not request_header_map:
+                raise
+            self.stats.hits += 1
+            with open(body_path, "rb") as _file:
+                return _file.read()
+
+        self.stats.misses += 1
+        self.stats.bytes_downloaded += len(body)
+
+        validator_map = {
+            key: value
+            for key, value in (("etag", etag), ("last_modified", last_modified))
+            if isinstance(value, str)
+        }
+        if validator_map:
+            self._store(url, body=body, validator_map=validator_map)
+
+        return body
@@ -0,0 +1,191 @@
+"""Record the performance of package downloads."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from enum import StrEnum
+import json
+import math
+import os
+import threading
+from typing import IO
+
+from pyesef.const import PATH_PROJECT_ROOT
+from pyesef.log import LOGGER
+
+# The number of slowest downloads listed in the summary
+DEFAULT_SLOWEST_COUNT = 5
+
+BYTES_PER_MB = 1024 * 1024
+
+
+class DownloadOutcome(StrEnum):
+    """Represent how a download ended."""
+
+    # The package was downloaded and is a valid zip-file
+    DOWNLOADED = "downloaded"
+    # The package was already stored, so nothing was downloaded
+    EXISTING = "existing"
+    # The package was downloaded, but is not a valid zip-file
+    INVALID = "invalid"
+    # The package could not be downloaded
+    FAILED = "failed"
+
+
+@dataclass
+class DownloadRecord:
+    """
+    The metrics of downloading one package.
+
+    The duration is from the first attempt until the package is verified, so it
+    includes retries. The transfer and verification durations are those of the last
+    attempt, which tells a slow server apart from a slow disk.
+    """
+
+    file_url: str
+    outcome: str = DownloadOutcome.FAILED
+    byte_count: int = 0
+    duration: float = 0.0
+    transfer_duration: float = 0.0
+    verify_duration: float = 0.0
+    status_code: int | None = None
+    retry_count: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Return the bytes per second of the transfer."""
+        if self.transfer_duration <= 0:
+            return 0.0
+        return self.byte_count / self.transfer_duration
+
+
+def get_percentile(value_list: list[float], percentile: float) -> float:
+    """Return the nearest-rank percentile of the values, or 0 if there are none."""
+    if not value_list:
+        return 0.0
+
+    sorted_list = sorted(value_list)
+    rank = math.ceil(percentile / 100 * len(sorted_list))
+    return sorted_list[min(max(rank, 1), len(sorted_list)) - 1]
+
+
+@dataclass(frozen=True)
+class DownloadSummary:
+    """The downloads of a run."""
+
+    download_count: int
+    existing_count: int
+    failed_count: int
+    byte_count: int
+    transfer_duration: float
+    p50_duration: float
+    p95_duration: float
+    slowest_list: list[DownloadRecord]
+
+    @property
+    def throughput(self) -> float:
+        """Return the bytes per second of all transfers."""
+        if self.transfer_duration <= 0:
+            return 0.0
+        return self.byte_count / self.transfer_duration
+
+
+def summarize_downloads(
+    record_list: list[DownloadRecord], slowest_count: int = DEFAULT_SLOWEST_COUNT
+) -> DownloadSummary:
+    """
+    Summarize the downloads of a run.
+
+    Latencies are those of the packages that were transferred, as packages that were
+    already stored take no time.
+    """
+    transferred_list = [
+        record
+        for record in record_list
+        if record.outcome in (DownloadOutcome.DOWNLOADED, DownloadOutcome.INVALID)
+    ]
+    duration_list = [record.duration for record in transferred_list]
+
+    return DownloadSummary(
+        download_count=sum(
+            record.outcome == DownloadOutcome.DOWNLOADED for record in record_list
+        ),
+        existing_count=sum(
+            record.outcome == DownloadOutcome.EXISTING for record in record_list
+        ),
+        failed_count=sum(
+            record.outcome in (DownloadOutcome.FAILED, DownloadOutcome.INVALID)
+            for record in record_list
+        ),
+        byte_count=sum(record.byte_count for record in transferred_list),
+        transfer_duration=sum(record.transfer_duration for record in transferred_list),
+        p50_duration=get_percentile(duration_list, 50),
+        p95_duration=get_percentile(duration_list, 95),
+        slowest_list=sorted(
+            transferred_list, key=lambda record: record.duration, reverse=True
+        )[:slowest_count],
+    )
+
+
+def log_download_summary(download_summary: DownloadSummary) -> None:
+    """Log the downloads of a run."""
+    LOGGER.info(
+        f"Downloaded {download_summary.download_count} packages, "
+        f"{download_summary.byte_count / BYTES_PER_MB:.1f} MB at "
+        f"{download_summary.throughput / BYTES_PER_MB:.2f} MB/s, latency p50 "
+        f"{download_summary.p50_duration:.1f}s and p95 "
+        f"{download_summary.p95_duration:.1f}s, "
+        f"{download_summary.existing_count} already stored, "
+        f"{download_summary.failed_count} failed"
+    )
+    for record in download_summary.slowest_list:
+        LOGGER.info(
+            f"Slow download: {record.file_url} took {record.duration:.1f}s, "
+            f"{record.byte_count / BYTES_PER_MB:.1f} MB at "
+            f"{record.throughput / BYTES_PER_MB:.2f} MB/s, verified in "
+            f"{record.verify_duration:.1f}s, {record.retry_count} retries"
+        )
+
+
+class DownloadTelemetry:
+    """
+    Log of package downloads.
+
+    Each download is appended to a JSON Lines file as soon as it ends, so the log
+    can be followed during a run and is kept across runs.
+    """
+
+    PATH_DOWNLOAD_LOG = os.path.join(PATH_PROJECT_ROOT, "download_log.jsonl")
+
+    def __init__(self, path: str = PATH_DOWNLOAD_LOG) -> None:
+        """Init class."""
+        self.path = path
+        self.record_list: list[DownloadRecord] = []
+        self._lock = threading.Lock()
+        self._file: IO[str] = open(  # pylint: disable=consider-using-with
+            path, "a", encoding="UTF-8"
+        )
+
+    def add(self, download_record: DownloadRecord) -> None:
+        """Add a download to the log."""
+        line = json.dumps(
+            {
+                "time": datetime.now(UTC).isoformat(timespec="seconds"),
+                **asdict(download_record),
+                "throughput": round(download_record.throughput, 1),
+            }
+        )
+        with self._lock:
+            self.record_list.append(download_record)
+            self._file.write(f"{line}\n")
+            self._file.flush()
+
+    def summarize(self, slowest_count: int = DEFAULT_SLOWEST_COUNT) -> DownloadSummary:
+        """Summarize the downloads added so far."""
+        with self._lock:
+            return summarize_downloads(self.record_list, slowest_count=slowest_count)
+
+    def close(self) -> None:
+        """Close the log file."""
+        self._file.close()
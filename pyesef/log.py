@@ -35,6 +35,9 @@ LOGGING_CONFIG = {
     },
 }
 
-logging.config.dictConfig(LOGGING_CONFIG)
-
 LOGGER = logging.getLogger(__package__)
+
+
+def setup_logging() -> None:
+    """Log to the console with colors."""
+    logging.config.dictConfig(LOGGING_CONFIG)
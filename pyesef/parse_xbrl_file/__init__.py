@@ -1,6 +1,26 @@
 """Init."""
 
-from .load_statement_definition import UpdateStatementDefinitionJson
-from .read_and_save_filings import ReadFiling
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .load_statement_definition import UpdateStatementDefinitionJson
+    from .read_and_save_filings import ReadFiling
 
 __all__ = ["ReadFiling", "UpdateStatementDefinitionJson"]
+
+# Arelle and pandas are slow to import, so the modules are imported on first use
+_LAZY_IMPORT_MAP = {
+    "ReadFiling": ".read_and_save_filings",
+    "UpdateStatementDefinitionJson": ".load_statement_definition",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import classes on first use."""
+    if name not in _LAZY_IMPORT_MAP:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return getattr(import_module(_LAZY_IMPORT_MAP[name], __name__), name)
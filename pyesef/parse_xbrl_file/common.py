@@ -1,10 +1,12 @@
 """Common functions and constants."""
 
+from __future__ import annotations
+
 from dataclasses import dataclass
 from datetime import date
 from enum import StrEnum
 import fractions
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from arelle import FileSource as FileSourceFile, PluginManager
 from arelle.Cntlr import Cntlr
@@ -12,6 +14,9 @@ from arelle.CntlrCmdLine import filesourceEntrypointFiles
 from arelle.FileSource import FileSource
 from arelle.ModelXbrl import ModelXbrl
 
+if TYPE_CHECKING:
+    from .entrypoint_index import EntrypointIndex
+
 
 class StatementName(StrEnum):
     """Define names of statements."""
@@ -135,8 +140,56 @@ class Controller(Cntlr):  # type: ignore
         super().__init__(logFileName="logToPrint", hasGui=False)
 
 
-def load_model_xbrl(zip_file_path: str, cntlr: Controller) -> ModelXbrl:
-    """Load a ModelXbrl from a file path."""
+def create_controller() -> Controller:
+    """Return a controller able to read ESEF-files."""
+    cntlr = Controller()
+
+    # Add support for reading ESEF-files
+    PluginManager.addPluginModule("validate/ESEF")
+
+    return cntlr
+
+
+def find_entrypoint(
+    zip_file_path: str, file_source: FileSource, cntlr: Controller
+) -> dict[str, Any]:
+    """Scan a package for its entrypoint."""
+    # Find entrypoint files
+    _entrypoint_files = filesourceEntrypointFiles(
+        filesource=file_source,
+        entrypointFiles=[{"file": zip_file_path}],
+    )
+
+    # This is required to correctly populate _entrypointFiles
+    for plugin_xbrl_method in PluginManager.pluginClassMethods(
+        "CntlrCmdLine.Filing.Start"
+    ):
+        plugin_xbrl_method(
+            cntlr,
+            None,
+            file_source,
+            _entrypoint_files,
+            sourceZipStream=None,
+            responseZipStream=None,
+        )
+
+    entrypoint: dict[str, Any] = _entrypoint_files[0]
+    return entrypoint
+
+
+def load_model_xbrl(
+    zip_file_path: str,
+    cntlr: Controller,
+    entrypoint_index: EntrypointIndex | None = None,
+    content_hash: str | None = None,
+) -> ModelXbrl:
+    """
+    Load a ModelXbrl from a file path.
+
+    If an entrypoint index and the content hash of the file are given, the
+    entrypoint is looked up in the index instead of scanning the package, and
+    stored in the index after a scan.
+    """
     try:
         file_source: FileSource = FileSourceFile.openFileSource(
             zip_file_path,
@@ -144,25 +197,23 @@ def load_model_xbrl(zip_file_path: str, cntlr: Controller) -> ModelXbrl:
             checkIfXmlIsEis=False,
         )
 
-        # Find entrypoint files
-        _entrypoint_files = filesourceEntrypointFiles(
-            filesource=file_source,
-            entrypointFiles=[{"file": zip_file_path}],
-        )
+        _entrypoint = None
+        if entrypoint_index is not None and content_hash is not None:
+            _entrypoint = entrypoint_index.get(
+                content_hash=content_hash, zip_file_path=zip_file_path
+            )
 
-        # This is required to correctly populate _entrypointFiles
-        for plugin_xbrl_method in PluginManager.pluginClassMethods(
-            "CntlrCmdLine.Filing.Start"
-        ):
-            plugin_xbrl_method(
-                cntlr,
-                None,
-                file_source,
-                _entrypoint_files,
-                sourceZipStream=None,
-                responseZipStream=None,
+        if _entrypoint is None:
+            _entrypoint = find_entrypoint(
+                zip_file_path=zip_file_path, file_source=file_source, cntlr=cntlr
             )
-        _entrypoint = _entrypoint_files[0]
+            if entrypoint_index is not None and content_hash is not None:
+                entrypoint_index.put(
+                    content_hash=content_hash,
+                    zip_file_path=zip_file_path,
+                    entrypoint=_entrypoint,
+                )
+
         _entrypoint_file = _entrypoint["file"]
         file_source.select(_entrypoint_file)
         cntlr.entrypointFile = _entrypoint_file
@@ -182,3 +233,30 @@ def load_model_xbrl(zip_file_path: str, cntlr: Controller) -> ModelXbrl:
         return model_xbrl
     except Exception as exc:
         raise OSError("File not loaded due to ", exc) from exc
+
+
+def load_taxonomy_model_xbrl(archive_file_path: str, cntlr: Controller) -> ModelXbrl:
+    """
+    Load a taxonomy file straight from its zip-file.
+
+    The path is the path of the zip-file followed by the path of the file in it, eg
+    taxonomy.zip/folder/file.xml. If the zip-file is a taxonomy package, the URLs of
+    the taxonomy are mapped to the files in it.
+    """
+    try:
+        file_source: FileSource = FileSourceFile.openFileSource(
+            archive_file_path,
+            cntlr,
+            checkIfXmlIsEis=False,
+        )
+
+        if file_source.isTaxonomyPackage:
+            file_source.loadTaxonomyPackageMappings()
+
+        model_xbrl = cntlr.modelManager.load(file_source, "Loading")
+
+        file_source.close()
+
+        return model_xbrl
+    except Exception as exc:
+        raise OSError("File not loaded due to ", exc) from exc
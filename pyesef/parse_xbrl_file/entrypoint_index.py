@@ -0,0 +1,228 @@
+"""Keep track of the entrypoints of packages."""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+from typing import Any
+
+from pyesef.const import PATH_ARCHIVES, PATH_PROJECT_ROOT
+from pyesef.log import LOGGER
+from pyesef.utils.file_handler import scan_files
+from pyesef.utils.file_name import read_package_file_name
+from pyesef.utils.shard import Shard
+
+from .ledger import get_content_hash
+from .scheduler import CostModel, schedule_largest_first
+
+FILE_ENDING_ZIP = ".zip"
+
+# Stands in for the path of the zip-file, so that an entry survives a move
+ZIP_FILE_PATH_PLACEHOLDER = "{zip_file_path}"
+
+_SQL_CREATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entrypoint (
+    content_hash TEXT PRIMARY KEY,
+    entrypoint TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+_SQL_PUT = """
+INSERT OR REPLACE INTO entrypoint (content_hash, entrypoint, created_at)
+VALUES (?, ?, ?)
+"""
+
+
+def _replace_path(value: Any, old_path: str, new_path: str) -> Any:
+    """Replace a path in all strings of a JSON structure."""
+    # The file of an inline XBRL document set has the path of each of its documents
+    if isinstance(value, str):
+        return value.replace(old_path, new_path)
+
+    if isinstance(value, list):
+        return [_replace_path(item, old_path, new_path) for item in value]
+
+    if isinstance(value, dict):
+        return {
+            key: _replace_path(item, old_path, new_path) for key, item in value.items()
+        }
+
+    return value
+
+
+class EntrypointIndex:
+    """
+    Index of the entrypoints of packages.
+
+    Finding the entrypoint of a package means scanning its contents, which is done
+    once per package. Entries are keyed by the content hash of the zip-file and
+    store paths relative to the zip-file, so that they are valid wherever the file
+    is.
+    """
+
+    PATH_INDEX = os.path.join(PATH_PROJECT_ROOT, "entrypoint_index.sqlite")
+
+    def __init__(self, path: str = PATH_INDEX) -> None:
+        """Init class."""
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(_SQL_CREATE_SCHEMA)
+
+    def get(self, content_hash: str, zip_file_path: str) -> dict[str, Any] | None:
+        """Return the entrypoint of a package, or None if it is not indexed."""
+        row = self.connection.execute(
+            "SELECT entrypoint FROM entrypoint WHERE content_hash = ?",
+            (content_hash,),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        entrypoint: dict[str, Any] = _replace_path(
+            json.loads(row[0]),
+            old_path=ZIP_FILE_PATH_PLACEHOLDER,
+            new_path=zip_file_path,
+        )
+        return entrypoint
+
+    def put(
+        self, content_hash: str, zip_file_path: str, entrypoint: dict[str, Any]
+    ) -> None:
+        """Store the entrypoint of a package."""
+        with self.connection:
+            self.connection.execute(
+                _SQL_PUT,
+                (
+                    content_hash,
+                    json.dumps(
+                        _replace_path(
+                            entrypoint,
+                            old_path=zip_file_path,
+                            new_path=ZIP_FILE_PATH_PLACEHOLDER,
+                        )
+                    ),
+                    time.time(),
+                ),
+            )
+
+    def get_content_hash_set(self) -> set[str]:
+        """Return the content hashes of all indexed packages."""
+        return {
+            row[0]
+            for row in self.connection.execute("SELECT content_hash FROM entrypoint")
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+
+# The controller of a worker process, created once per process
+_WORKER_STATE: dict[str, Any] = {}
+
+
+def _init_worker() -> None:
+    """Create the controller of a worker process."""
+    # pylint: disable=import-outside-toplevel
+    from .common import create_controller
+
+    _WORKER_STATE["cntlr"] = create_controller()
+
+
+def _find_entrypoint(zip_file_path: str) -> dict[str, Any] | None:
+    """Return the entrypoint of a package, run in a worker process."""
+    # pylint: disable=import-outside-toplevel
+    from arelle import FileSource as FileSourceFile
+
+    from .common import find_entrypoint
+
+    cntlr = _WORKER_STATE["cntlr"]
+    try:
+        file_source = FileSourceFile.openFileSource(
+            zip_file_path, cntlr, checkIfXmlIsEis=False
+        )
+        try:
+            return find_entrypoint(
+                zip_file_path=zip_file_path, file_source=file_source, cntlr=cntlr
+            )
+        finally:
+            file_source.close()
+    except Exception as exc:
+        LOGGER.warning(f"Unable to find the entrypoint of {zip_file_path}: {exc}")
+        return None
+
+
+def build_entrypoint_index(
+    filing_folder: str = PATH_ARCHIVES,
+    path: str = EntrypointIndex.PATH_INDEX,
+    max_workers: int | None = None,
+    shard: Shard | None = None,
+) -> None:
+    """
+    Index the entrypoints of all packages in a folder, in parallel.
+
+    Packages that are already indexed are skipped, as are the packages of other
+    shards if a shard is given. Like an export, packages that can't be identified
+    are in every shard. The packages are hashed and scanned in worker processes,
+    largest first, and the results are written to the index by this process.
+    """
+    entrypoint_index = EntrypointIndex(path=path)
+    indexed_hash_set = entrypoint_index.get_content_hash_set()
+
+    zip_file_path_list = [
+        entry.path for entry in scan_files(filing_folder, file_ending=FILE_ENDING_ZIP)
+    ]
+    if shard is not None:
+        zip_file_path_list = [
+            zip_file_path
+            for zip_file_path in zip_file_path_list
+            if (package_file_name := read_package_file_name(zip_file_path)) is None
+            or shard.includes(
+                lei=package_file_name.lei, period_end=package_file_name.period_end
+            )
+        ]
+
+    zip_file_path_list = [
+        scheduled_filing.zip_file_path
+        for scheduled_filing in schedule_largest_first(
+            zip_file_path_list, cost_model=CostModel()
+        )
+    ]
+
+    # Spawn the workers, as forking a process that runs threads may deadlock
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as executor:
+        job_list = [
+            (zip_file_path, content_hash)
+            for zip_file_path, content_hash in zip(
+                zip_file_path_list,
+                executor.map(get_content_hash, zip_file_path_list),
+                strict=True,
+            )
+            if content_hash not in indexed_hash_set
+        ]
+        LOGGER.info(f"Indexing {len(job_list)} packages")
+
+        for (zip_file_path, content_hash), entrypoint in zip(
+            job_list,
+            executor.map(_find_entrypoint, [job[0] for job in job_list]),
+            strict=True,
+        ):
+            if entrypoint is None:
+                continue
+            entrypoint_index.put(
+                content_hash=content_hash,
+                zip_file_path=zip_file_path,
+                entrypoint=entrypoint,
+            )
+
+    entrypoint_index.close()
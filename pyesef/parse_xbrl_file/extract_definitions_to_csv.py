@@ -25,7 +25,7 @@ def _get_definition(property_view: tuple[str, Any]) -> str | None:
         if item[0] == "label":
             try:
                 return cast(str, item[2][0][1])
-            except KeyError:
+            except (KeyError, IndexError):
                 return None
 
     return None
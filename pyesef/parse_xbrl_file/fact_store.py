@@ -0,0 +1,269 @@
+"""Store facts across filings."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from typing import Any
+from urllib.parse import quote
+
+import pandas as pd
+
+from pyesef.const import PATH_PROJECT_ROOT
+
+from .common import EsefData
+
+# The columns identifying a fact across filings
+FACT_KEY_COLUMN_LIST = ("lei", "period_end", "xml_name", "membership")
+
+# The columns of the dataframe returned by data_list_to_clean_df
+FACT_VALUE_COLUMN_LIST = (
+    "wider_anchor_or_xml_name",
+    "wider_anchor",
+    "currency",
+    "value",
+    "is_company_defined",
+    "label",
+    "level_1",
+    *EsefData.__add_to_dict__,
+)
+
+FACT_COLUMN_LIST = (
+    *FACT_KEY_COLUMN_LIST,
+    *FACT_VALUE_COLUMN_LIST,
+    "filing_id",
+    "filing_period_end",
+    "filed_at",
+)
+
+_COLUMN_DEFINITION = ", ".join(FACT_COLUMN_LIST)
+_COLUMN_PARAMETERS = ", ".join(f":{column}" for column in FACT_COLUMN_LIST)
+# SQLite treats NULLs as distinct in unique indexes, a fact without membership is
+# therefore keyed on an empty string
+_KEY_DEFINITION = "lei, period_end, xml_name, IFNULL(membership, '')"
+# Packages are named by the filer, so the same name may be used in several countries
+_FILING_KEY_DEFINITION = "IFNULL(country, ''), file_name"
+
+_SQL_CREATE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS filing (
+    id INTEGER PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    zip_file_path TEXT NOT NULL,
+    country TEXT,
+    parsed_at REAL NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_filing_key ON filing ({_FILING_KEY_DEFINITION});
+
+CREATE TABLE IF NOT EXISTS fact (
+    lei TEXT NOT NULL,
+    period_end TEXT NOT NULL,
+    xml_name TEXT NOT NULL,
+    membership TEXT,
+    wider_anchor_or_xml_name TEXT,
+    wider_anchor TEXT,
+    currency TEXT,
+    value INTEGER,
+    is_company_defined INTEGER,
+    label TEXT,
+    level_1 TEXT,
+    is_cash_flow INTEGER,
+    is_balance_sheet INTEGER,
+    is_income_statement INTEGER,
+    is_changes_in_equity INTEGER,
+    is_other INTEGER,
+    is_total INTEGER,
+    filing_id INTEGER NOT NULL REFERENCES filing (id),
+    filing_period_end TEXT NOT NULL,
+    filed_at REAL NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_fact_key ON fact ({_KEY_DEFINITION});
+CREATE INDEX IF NOT EXISTS ix_fact_lei ON fact (lei, level_1);
+CREATE INDEX IF NOT EXISTS ix_fact_period_end ON fact (period_end);
+CREATE INDEX IF NOT EXISTS ix_fact_wider_anchor_or_xml_name
+    ON fact (wider_anchor_or_xml_name);
+CREATE INDEX IF NOT EXISTS ix_fact_level_1 ON fact (level_1);
+CREATE INDEX IF NOT EXISTS ix_fact_filing_id ON fact (filing_id);
+
+CREATE TABLE IF NOT EXISTS fact_history (
+    {_COLUMN_DEFINITION},
+    superseded_by INTEGER NOT NULL REFERENCES filing (id),
+    superseded_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_fact_history_key ON fact_history ({_KEY_DEFINITION});
+
+CREATE TRIGGER IF NOT EXISTS tr_fact_history
+BEFORE UPDATE ON fact
+WHEN OLD.filing_id <> NEW.filing_id
+BEGIN
+    INSERT INTO fact_history
+    VALUES (
+        {", ".join(f"OLD.{column}" for column in FACT_COLUMN_LIST)},
+        NEW.filing_id,
+        strftime('%s', 'now')
+    );
+END;
+"""
+
+_SQL_UPSERT_FILING = f"""
+INSERT INTO filing (file_name, zip_file_path, country, parsed_at)
+VALUES (:file_name, :zip_file_path, :country, :parsed_at)
+ON CONFLICT ({_FILING_KEY_DEFINITION}) DO UPDATE SET
+    zip_file_path = excluded.zip_file_path,
+    parsed_at = excluded.parsed_at
+RETURNING id
+"""
+
+# Store an incoming fact directly as history when a newer filing already holds it
+_SQL_INSERT_STALE = f"""
+INSERT INTO fact_history
+SELECT {_COLUMN_PARAMETERS}, fact.filing_id, strftime('%s', 'now')
+FROM fact
+WHERE lei = :lei
+    AND period_end = :period_end
+    AND xml_name = :xml_name
+    AND IFNULL(membership, '') = IFNULL(:membership, '')
+    AND (fact.filing_period_end, fact.filed_at) > (:filing_period_end, :filed_at)
+"""
+
+_SQL_UPSERT = f"""
+INSERT INTO fact ({_COLUMN_DEFINITION})
+VALUES ({_COLUMN_PARAMETERS})
+ON CONFLICT ({_KEY_DEFINITION}) DO UPDATE SET
+    {", ".join(f"{column} = excluded.{column}" for column in FACT_VALUE_COLUMN_LIST)},
+    filing_id = excluded.filing_id,
+    filing_period_end = excluded.filing_period_end,
+    filed_at = excluded.filed_at
+WHERE (excluded.filing_period_end, excluded.filed_at)
+    >= (fact.filing_period_end, fact.filed_at)
+"""
+
+
+def connect_read_only(path: str) -> sqlite3.Connection:
+    """Open a fact store read-only, a missing one raises instead of being created."""
+    # Characters like ?, # and % have a meaning in a URI
+    return sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True)
+
+
+def _df_to_row_list(
+    df_to_save: pd.DataFrame, filing_id: int, filing_period_end: str, filed_at: float
+) -> list[dict[str, Any]]:
+    """Convert a cleaned dataframe to a list of rows accepted by sqlite3."""
+    df_rows = df_to_save.reindex(columns=list(FACT_COLUMN_LIST))
+    df_rows["period_end"] = pd.to_datetime(df_rows["period_end"]).dt.strftime(
+        "%Y-%m-%d"
+    )
+    df_rows["filing_id"] = filing_id
+    df_rows["filing_period_end"] = filing_period_end
+    df_rows["filed_at"] = filed_at
+
+    # Native Python types, with None for missing values
+    df_rows = df_rows.astype(object).where(pd.notna(df_rows), None)
+
+    return df_rows.to_dict("records")  # type: ignore[return-value]
+
+
+class FactStore:
+    """
+    Indexed store of facts across filings.
+
+    A fact is identified by its lei, period_end, xml_name and membership. When the
+    same fact is saved from several filings, the newest filing wins and the
+    superseded values are kept in the fact_history table. Filings are ordered by
+    their period end, eg the comparative figures of a later report restate those
+    of an earlier one, and filings of the same period by the time they were filed.
+    Each fact links to the zip-file it was read from through the filing table,
+    which identifies a zip-file by its country and file name.
+    """
+
+    PATH_FACT_STORE = os.path.join(PATH_PROJECT_ROOT, "output.sqlite")
+
+    def __init__(self, path: str = PATH_FACT_STORE) -> None:
+        """Init class."""
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        # Allow queries to read the store while a filing is being written
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_SQL_CREATE_SCHEMA)
+
+    def upsert(
+        self,
+        df_to_save: pd.DataFrame,
+        zip_file_path: str,
+        country: str | None = None,
+        *,
+        period_end: str | None = None,
+        filed_at: float | None = None,
+    ) -> None:
+        """
+        Upsert the facts of one filing.
+
+        The period end of the filing comes first when deciding which filing is the
+        newest, and filings without one are the oldest. The time the filing was
+        filed, by default now, only decides between filings of the same period.
+
+        All facts are inserted in batches inside one transaction. The cost is
+        proportional to the number of facts in the filing, as every fact is looked
+        up through the unique key index.
+        """
+        if df_to_save.empty:
+            return
+
+        if filed_at is None:
+            filed_at = time.time()
+
+        # A fact may be part of several statements in the same filing, keep one
+        # row per fact and prefer the one that has been classified
+        df_unique = df_to_save.sort_values(
+            "level_1", na_position="last", kind="stable"
+        ).drop_duplicates(subset=list(FACT_KEY_COLUMN_LIST))
+
+        with self.connection:
+            (filing_id,) = self.connection.execute(
+                _SQL_UPSERT_FILING,
+                {
+                    "file_name": os.path.basename(zip_file_path),
+                    "zip_file_path": zip_file_path,
+                    "country": country,
+                    "parsed_at": time.time(),
+                },
+            ).fetchone()
+
+            row_list = _df_to_row_list(
+                df_unique,
+                filing_id=filing_id,
+                filing_period_end=period_end or "",
+                filed_at=filed_at,
+            )
+
+            self.connection.executemany(_SQL_INSERT_STALE, row_list)
+            self.connection.executemany(_SQL_UPSERT, row_list)
+
+    def to_df(self) -> pd.DataFrame:
+        """Return the current facts."""
+        return pd.read_sql_query(
+            "SELECT fact.*, filing.file_name AS filing FROM fact "
+            "JOIN filing ON filing.id = fact.filing_id",
+            self.connection,
+            parse_dates=["period_end"],
+        )
+
+    def history_to_df(self) -> pd.DataFrame:
+        """Return the superseded facts."""
+        return pd.read_sql_query(
+            "SELECT fact_history.*, filing.file_name AS filing, "
+            "superseded.file_name AS superseded_by_filing FROM fact_history "
+            "JOIN filing ON filing.id = fact_history.filing_id "
+            "JOIN filing AS superseded ON superseded.id = fact_history.superseded_by",
+            self.connection,
+            parse_dates=["period_end"],
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        # Keep the statistics used by the query planner up to date
+        self.connection.execute("PRAGMA optimize")
+        self.connection.close()
@@ -0,0 +1,172 @@
+"""Keep track of parsed filings."""
+
+from __future__ import annotations
+
+from enum import StrEnum
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Any
+
+from pyesef.const import PATH_PROJECT_ROOT
+
+_SQL_CREATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (
+    content_hash TEXT PRIMARY KEY,
+    zip_file_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempt_count INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    output_location TEXT,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL
+);
+"""
+
+_SQL_START = """
+INSERT INTO job (content_hash, zip_file_path, status, attempt_count, started_at)
+VALUES (:content_hash, :zip_file_path, :status, 1, :started_at)
+ON CONFLICT (content_hash) DO UPDATE SET
+    zip_file_path = excluded.zip_file_path,
+    status = excluded.status,
+    attempt_count = attempt_count + 1,
+    error = NULL,
+    started_at = excluded.started_at,
+    finished_at = NULL,
+    duration = NULL
+"""
+
+_SQL_FINISH = """
+UPDATE job SET
+    status = :status,
+    error = :error,
+    output_location = :output_location,
+    finished_at = :finished_at,
+    duration = :finished_at - started_at
+WHERE content_hash = :content_hash
+"""
+
+
+class JobStatus(StrEnum):
+    """Represent the status of a parse job."""
+
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+def get_content_hash(zip_file_path: str) -> str:
+    """Return the SHA-256 of a file."""
+    with open(zip_file_path, "rb") as _file:
+        return hashlib.file_digest(_file, "sha256").hexdigest()
+
+
+class JobLedger:
+    """
+    Ledger of parse jobs.
+
+    Jobs are keyed by the content hash of the zip-file, so that a filing is
+    recognised even if it has been moved or downloaded again. Each change of status
+    is committed immediately, so the ledger survives a crash. A job left as running
+    is parsed again on the next run.
+    """
+
+    PATH_LEDGER = os.path.join(PATH_PROJECT_ROOT, "ledger.sqlite")
+
+    def __init__(self, path: str = PATH_LEDGER) -> None:
+        """Init class."""
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SQL_CREATE_SCHEMA)
+
+    def get_status(self, content_hash: str) -> JobStatus | None:
+        """Return the status of a job, or None if it has never been started."""
+        row = self.connection.execute(
+            "SELECT status FROM job WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return JobStatus(row[0])
+
+    def get_job(self, content_hash: str) -> dict[str, Any] | None:
+        """Return all fields of a job, or None if it has never been started."""
+        cursor = self.connection.execute(
+            "SELECT * FROM job WHERE content_hash = ?", (content_hash,)
+        )
+        row = cursor.fetchone()
+
+        if row is None:
+            return None
+
+        return dict(zip((column[0] for column in cursor.description), row))
+
+    def should_parse(self, content_hash: str, retry_failed: bool = False) -> bool:
+        """Return True if a job has not been completed."""
+        status = self.get_status(content_hash)
+
+        if status == JobStatus.DONE:
+            return False
+
+        if status == JobStatus.FAILED:
+            return retry_failed
+
+        return True
+
+    def start(self, content_hash: str, zip_file_path: str) -> None:
+        """Mark a job as running."""
+        with self.connection:
+            self.connection.execute(
+                _SQL_START,
+                {
+                    "content_hash": content_hash,
+                    "zip_file_path": zip_file_path,
+                    "status": JobStatus.RUNNING.value,
+                    "started_at": time.time(),
+                },
+            )
+
+    def finish(self, content_hash: str, output_location: str) -> None:
+        """Mark a job as done."""
+        self._set_finished(
+            content_hash=content_hash,
+            status=JobStatus.DONE,
+            error=None,
+            output_location=output_location,
+        )
+
+    def fail(self, content_hash: str, error: str) -> None:
+        """Mark a job as failed."""
+        self._set_finished(
+            content_hash=content_hash,
+            status=JobStatus.FAILED,
+            error=error,
+            output_location=None,
+        )
+
+    def _set_finished(
+        self,
+        content_hash: str,
+        status: JobStatus,
+        error: str | None,
+        output_location: str | None,
+    ) -> None:
+        """Store the outcome of a job."""
+        with self.connection:
+            self.connection.execute(
+                _SQL_FINISH,
+                {
+                    "content_hash": content_hash,
+                    "status": status.value,
+                    "error": error,
+                    "output_location": output_location,
+                    "finished_at": time.time(),
+                },
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
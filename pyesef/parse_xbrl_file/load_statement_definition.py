@@ -1,55 +1,107 @@
 """Based on https://gist.github.com/AustinMatherne/f9a101ff48298f5b97b26e7f6e28833b."""
 
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 import json
+import multiprocessing
 import os
+from pathlib import Path
+from typing import Any
+import zipfile
 
-from arelle import PluginManager
 from arelle.ModelXbrl import ModelXbrl
 from arelle.XbrlConst import parentChild
 import requests
 
-from pyesef.const import PATH_PROJECT_ROOT, PATH_STATIC
-from pyesef.utils.file_handler import delete_folder, unzip_file
+from pyesef.const import PATH_PROJECT_ROOT
+from pyesef.error import PyEsefError
+from pyesef.log import LOGGER
+
+from .common import (
+    Controller,
+    StatementName,
+    create_controller,
+    load_taxonomy_model_xbrl,
+)
+
+# Downloaded taxonomies are kept here between updates
+PATH_TAXONOMY_CACHE = os.path.join(PATH_PROJECT_ROOT, "taxonomies")
 
-from .common import Controller, StatementName, load_model_xbrl
+# The calculation linkbase of all statements, loaded to read the link roles
+FILE_NAME_CALCULATION = "esef_all-cal.xml"
 
 
-@dataclass
+@dataclass(frozen=True)
 class TaxonomyFileData:
     """Define taxonomy file data."""
 
     zip_url: str
-    folder_name: str
-    folder_date: str
+    cache_folder: str = PATH_TAXONOMY_CACHE
+
+    @property
+    def version(self) -> str:
+        """Return the version of the taxonomy, which is the name of the zip-file."""
+        return self.zip_url.split("/")[-1].removesuffix(".zip")
 
     @property
     def local_file_name(self) -> str:
         """Return file name."""
         split_zip_url = self.zip_url.split("/")
-        return os.path.join(PATH_STATIC, split_zip_url[-1])
+        return os.path.join(self.cache_folder, split_zip_url[-1])
+
+    def download(self) -> None:
+        """Download the zip-file, unless it is in the cache."""
+        if os.path.exists(self.local_file_name):
+            return
+
+        Path(self.cache_folder).mkdir(parents=True, exist_ok=True)
+
+        # Download to a temporary file, so that an aborted download isn't cached
+        part_file_name = f"{self.local_file_name}.part"
+        try:
+            with requests.get(self.zip_url, stream=True, timeout=30) as req:
+                req.raise_for_status()
+
+                with open(part_file_name, "wb") as _file:
+                    for chunk in req.iter_content(chunk_size=2048):
+                        _file.write(chunk)
+        except BaseException:
+            if os.path.exists(part_file_name):
+                os.remove(part_file_name)
+            raise
+
+        os.replace(part_file_name, self.local_file_name)
 
     @property
-    def local_folder_path(self) -> str:
-        """Return folder path."""
-        return os.path.join(PATH_STATIC, self.folder_name)
+    def calculation_path(self) -> str:
+        """Return the path of the calculation linkbase in the zip-file."""
+        with zipfile.ZipFile(self.local_file_name) as zip_file:
+            member_name = next(
+                (
+                    name
+                    for name in zip_file.namelist()
+                    if name.endswith(f"/{FILE_NAME_CALCULATION}")
+                ),
+                None,
+            )
+
+        if member_name is None:
+            raise PyEsefError(f"No {FILE_NAME_CALCULATION} in {self.zip_url}")
+
+        return f"{self.local_file_name}/{member_name}"
 
 
 TAXONOMY_URL_DATA = (
     TaxonomyFileData(
         zip_url="https://www.esma.europa.eu/sites/default/files/library/esef_taxonomy_2019.zip",
-        folder_name="esef_taxonomy_2019",
-        folder_date="2019-03-27",
     ),
     TaxonomyFileData(
         zip_url="https://www.esma.europa.eu/sites/default/files/library/esef_taxonomy_2020.zip",
-        folder_name="esef_taxonomy_2020",
-        folder_date="2020-03-16",
     ),
     TaxonomyFileData(
         zip_url="https://www.esma.europa.eu/sites/default/files/library/esef_taxonomy_2021.zip",
-        folder_name="esef_taxonomy_2021",
-        folder_date="2021-03-24",
     ),
 )
 
@@ -77,160 +129,169 @@ class LinkRoleDefinition:
     }
 
 
-class UpdateStatementDefinitionJson:
-    """Load link roles into static data."""
+# The link roles of each statement
+STATEMENT_LINK_ROLE_MAP = {
+    StatementName.CASH_FLOW: LinkRoleDefinition.CASH_FLOW,
+    StatementName.BALANCE_SHEET: LinkRoleDefinition.BALANCE_SHEET,
+    StatementName.INCOME_STATEMENT: LinkRoleDefinition.INCOME_STATEMENT,
+    StatementName.CHANGES_EQUITY: LinkRoleDefinition.CHANGES_EQUITY,
+}
 
-    PATH_JSON_MAP_FILE = os.path.join(
-        PATH_PROJECT_ROOT,
-        "pyesef",
-        "static",
-        "statement_definition.json",
+
+def _loop_rel_set(
+    link_role_definition: str, model_base_taxonomy: ModelXbrl
+) -> set[str]:
+    """Loop through relationship set."""
+    base_taxonomy_rels = model_base_taxonomy.relationshipSet(
+        parentChild, link_role_definition
     )
 
-    def __init__(self) -> None:
-        """Init class."""
-        self.output_data_dict: dict[str, list[str]] = {}
-        self.list_xml_definition: list[str] = []
-        self.xbrl_file_list: list[ModelXbrl] = []
+    base_taxonomy_clarks = {
+        rel.toModelObject.qname.clarkNotation
+        for rel in base_taxonomy_rels.modelRelationships
+    }
+    for root in base_taxonomy_rels.rootConcepts:
+        base_taxonomy_clarks.add(root.qname.clarkNotation)
 
-        self.cntlr = Controller()
+    return base_taxonomy_clarks
 
-        # Add support for reading ESEF-files
-        PluginManager.addPluginModule("validate/ESEF")
 
-        self.main()
+def read_statement_definition(
+    taxonomy_file_data: TaxonomyFileData, cntlr: Controller
+) -> dict[str, list[str]]:
+    """Return the items of each statement in a taxonomy, read from its zip-file."""
+    xbrl_taxonomy = load_taxonomy_model_xbrl(
+        archive_file_path=taxonomy_file_data.calculation_path, cntlr=cntlr
+    )
 
-    def main(self) -> None:
-        """Run sequence of methods."""
-        self.download_unzip_zip_file()
-        self.load_taxonomy_file()
-
-        self.load_cashflow()
-        self.load_balance_sheet()
-        self.load_income_statement()
-        self.load_changes_equity()
-        self.save_dict_to_json()
-
-        self.cleanup_files()
-
-    def cleanup_files(self) -> None:
-        """Delete files and folders."""
-        for file_data in TAXONOMY_URL_DATA:
-            delete_folder(file_data.local_folder_path)
-            os.remove(file_data.local_file_name)
-
-    def download_unzip_zip_file(self) -> None:
-        """Download zip files."""
-        for file_data in TAXONOMY_URL_DATA:
-            req = requests.get(file_data.zip_url, stream=True, timeout=30)
-            with open(file_data.local_file_name, "wb") as _file:
-                for chunk in req.iter_content(chunk_size=2048):
-                    _file.write(chunk)
-
-            unzip_file(file_data.local_file_name, extract_to=PATH_STATIC)
-
-            self.list_xml_definition.append(
-                os.path.join(
-                    PATH_STATIC,
-                    file_data.folder_name,
-                    "www.esma.europa.eu",
-                    "taxonomy",
-                    file_data.folder_date,
-                    "esef_all-cal.xml",
+    try:
+        return {
+            statement_name.value: sorted(
+                set().union(
+                    *(
+                        _loop_rel_set(
+                            link_role_definition=definition,
+                            model_base_taxonomy=xbrl_taxonomy,
+                        )
+                        for definition in link_role_definition_set
+                    )
                 )
             )
-
-    def _loop_rel_set(
-        self, link_role_definition: str, model_base_taxonomy: ModelXbrl
-    ) -> set[str]:
-        """Loop through relationship set."""
-        base_taxonomy_rels = model_base_taxonomy.relationshipSet(
-            parentChild, link_role_definition
-        )
-
-        base_taxonomy_clarks = {
-            rel.toModelObject.qname.clarkNotation
-            for rel in base_taxonomy_rels.modelRelationships
+            for statement_name, link_role_definition_set in (
+                STATEMENT_LINK_ROLE_MAP.items()
+            )
         }
-        for root in base_taxonomy_rels.rootConcepts:
-            base_taxonomy_clarks.add(root.qname.clarkNotation)
+    finally:
+        xbrl_taxonomy.close()
 
-        return base_taxonomy_clarks
 
-    def load_taxonomy_file(self) -> None:
-        """Load taxonomy files."""
-        for taxonomy_file in self.list_xml_definition:
-            xbrl_taxonomy = load_model_xbrl(
-                zip_file_path=taxonomy_file,
-                cntlr=self.cntlr,
-            )
+# The controller of a worker process, created once per process
+_WORKER_STATE: dict[str, Any] = {}
 
-            self.xbrl_file_list.append(xbrl_taxonomy)
 
-    def load_cashflow(self) -> None:
-        """Load all cash flow items."""
-        data_set = set()
+def _init_worker() -> None:
+    """Create the controller of a worker process."""
+    _WORKER_STATE["cntlr"] = create_controller()
 
-        for xbrl_taxonomy in self.xbrl_file_list:
-            for definition in LinkRoleDefinition.CASH_FLOW:
-                data_set.update(
-                    self._loop_rel_set(
-                        link_role_definition=definition,
-                        model_base_taxonomy=xbrl_taxonomy,
-                    )
-                )
 
-        sorted_list = sorted(data_set)
-        self.output_data_dict[StatementName.CASH_FLOW.value] = sorted_list
+def _read_taxonomy(taxonomy_file_data: TaxonomyFileData) -> dict[str, list[str]]:
+    """Download and read a taxonomy, run in a worker process."""
+    LOGGER.info(f"Reading taxonomy {taxonomy_file_data.version}")
+    taxonomy_file_data.download()
+    return read_statement_definition(
+        taxonomy_file_data=taxonomy_file_data, cntlr=_WORKER_STATE["cntlr"]
+    )
 
-    def load_balance_sheet(self) -> None:
-        """Load all balance sheet items."""
-        data_set = set()
 
-        for xbrl_taxonomy in self.xbrl_file_list:
-            for definition in LinkRoleDefinition.BALANCE_SHEET:
-                additional_set = self._loop_rel_set(
-                    link_role_definition=definition,
-                    model_base_taxonomy=xbrl_taxonomy,
-                )
-                data_set.update(additional_set)
+class UpdateStatementDefinitionJson:
+    """
+    Load link roles into static data.
 
-        sorted_list = sorted(data_set)
-        self.output_data_dict[StatementName.BALANCE_SHEET.value] = sorted_list
+    The versions of the taxonomy that have been read are stored in the JSON file,
+    and only new versions are read on an update. Each version is downloaded and
+    loaded in a worker process of its own, straight from its zip-file. Downloaded
+    taxonomies are kept in a cache folder.
+    """
 
-    def load_income_statement(self) -> None:
-        """Load all income statement items."""
-        data_set = set()
+    PATH_JSON_MAP_FILE = os.path.join(
+        PATH_PROJECT_ROOT,
+        "pyesef",
+        "static",
+        "statement_definition.json",
+    )
 
-        for xbrl_taxonomy in self.xbrl_file_list:
-            for definition in LinkRoleDefinition.INCOME_STATEMENT:
-                data_set.update(
-                    self._loop_rel_set(
-                        link_role_definition=definition,
-                        model_base_taxonomy=xbrl_taxonomy,
-                    )
-                )
+    # The key of the versions of the taxonomy read into the JSON file
+    KEY_TAXONOMY_VERSIONS = "TaxonomyVersions"
 
-        sorted_list = sorted(data_set)
-        self.output_data_dict[StatementName.INCOME_STATEMENT.value] = sorted_list
+    def __init__(
+        self,
+        taxonomy_list: tuple[TaxonomyFileData, ...] = TAXONOMY_URL_DATA,
+        path: str = PATH_JSON_MAP_FILE,
+        max_workers: int | None = None,
+    ) -> None:
+        """Init class."""
+        self.taxonomy_list = taxonomy_list
+        self.path = path
+        self.max_workers = max_workers
+        self.output_data_dict: dict[str, list[str]] = {}
 
-    def load_changes_equity(self) -> None:
-        """Load all changes in equity items."""
-        data_set = set()
+        self.main()
 
-        for xbrl_taxonomy in self.xbrl_file_list:
-            for definition in LinkRoleDefinition.CHANGES_EQUITY:
-                data_set.update(
-                    self._loop_rel_set(
-                        link_role_definition=definition,
-                        model_base_taxonomy=xbrl_taxonomy,
+    def main(self) -> None:
+        """Read the new versions of the taxonomy into the JSON file."""
+        self.read_json()
+
+        read_version_set = set(self.output_data_dict[self.KEY_TAXONOMY_VERSIONS])
+        new_taxonomy_list = [
+            taxonomy_file_data
+            for taxonomy_file_data in self.taxonomy_list
+            if taxonomy_file_data.version not in read_version_set
+        ]
+
+        if not new_taxonomy_list:
+            LOGGER.info("Statement definitions are up to date")
+            return
+
+        # Spawn the workers, as forking a process that runs threads may deadlock
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers or len(new_taxonomy_list),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        ) as executor:
+            try:
+                for taxonomy_file_data, statement_definition in zip(
+                    new_taxonomy_list,
+                    executor.map(_read_taxonomy, new_taxonomy_list),
+                    strict=True,
+                ):
+                    self.add_statement_definition(
+                        version=taxonomy_file_data.version,
+                        statement_definition=statement_definition,
                     )
-                )
+            finally:
+                # Keep the versions that were read if another version fails
+                self.save_dict_to_json()
+
+    def read_json(self) -> None:
+        """Read the JSON file, if it exists."""
+        if os.path.exists(self.path):
+            with open(self.path, encoding="UTF-8") as json_file:
+                self.output_data_dict = json.load(json_file)
+
+        self.output_data_dict.setdefault(self.KEY_TAXONOMY_VERSIONS, [])
+
+    def add_statement_definition(
+        self, version: str, statement_definition: dict[str, list[str]]
+    ) -> None:
+        """Add the items of each statement in a version of the taxonomy."""
+        for statement_name, item_list in statement_definition.items():
+            self.output_data_dict[statement_name] = sorted(
+                set(self.output_data_dict.get(statement_name, [])) | set(item_list)
+            )
 
-        sorted_list = sorted(data_set)
-        self.output_data_dict[StatementName.CHANGES_EQUITY.value] = sorted_list
+        self.output_data_dict[self.KEY_TAXONOMY_VERSIONS].append(version)
 
     def save_dict_to_json(self) -> None:
         """Save data dict to JSON file."""
-        with open(self.PATH_JSON_MAP_FILE, "w", encoding="UTF-8") as json_file:
+        with open(self.path, "w", encoding="UTF-8") as json_file:
             json.dump(self.output_data_dict, json_file)
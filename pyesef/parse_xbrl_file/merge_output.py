@@ -0,0 +1,209 @@
+"""Merge output files."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import closing
+import csv
+from dataclasses import fields
+from datetime import date, datetime
+import heapq
+import os
+import sqlite3
+import tempfile
+from typing import Any
+
+from openpyxl import Workbook, load_workbook
+
+from pyesef.error import PyEsefError
+from pyesef.log import LOGGER
+
+from .common import EsefData
+from .fact_store import connect_read_only
+from .read_and_save_filings import DUPLICATE_COLUMN_LIST
+from .save_excel import DataSheetName
+
+FILE_ENDING_CSV = ".csv"
+FILE_ENDING_SQLITE = ".sqlite"
+FILE_ENDING_XLSX = ".xlsx"
+
+# The columns of the dataframe returned by data_list_to_clean_df
+OUTPUT_COLUMN_LIST = [
+    *(field.name for field in fields(EsefData)),
+    *EsefData.__add_to_dict__,
+]
+
+BOOLEAN_COLUMN_LIST = ["is_company_defined", *EsefData.__add_to_dict__]
+
+# Sort on the duplicate columns, with NULL sorted as an empty string to match
+# _get_sort_key
+_SQL_ORDER_BY = ", ".join(f"IFNULL({column}, '')" for column in DUPLICATE_COLUMN_LIST)
+_SQL_INSERT_SPOOL = (
+    f"INSERT INTO spool VALUES ({', '.join('?' * len(OUTPUT_COLUMN_LIST))})"
+)
+
+Row = dict[str, Any]
+
+
+def _get_sort_key(row: Row) -> tuple[Any, ...]:
+    """Return the duplicate columns of a row, used to sort and compare rows."""
+    return tuple(
+        "" if row[column] is None else row[column] for column in DUPLICATE_COLUMN_LIST
+    )
+
+
+def _normalize_row(row: Row) -> Row:
+    """Return a row with the same types regardless of the input file type."""
+    period_end = row["period_end"]
+    if isinstance(period_end, datetime):
+        period_end = period_end.date()
+    elif isinstance(period_end, str):
+        period_end = date.fromisoformat(period_end[:10])
+
+    normalized_row = {
+        **row,
+        "period_end": period_end,
+    }
+
+    for column in BOOLEAN_COLUMN_LIST:
+        if normalized_row[column] is not None:
+            normalized_row[column] = bool(normalized_row[column])
+
+    return normalized_row
+
+
+def _read_sorted_sqlite(
+    connection: sqlite3.Connection, table_name: str
+) -> Iterator[Row]:
+    """Stream the rows of a table, sorted by the duplicate columns."""
+    cursor = connection.execute(
+        f"SELECT {', '.join(OUTPUT_COLUMN_LIST)} FROM {table_name} "
+        f"ORDER BY {_SQL_ORDER_BY}"
+    )
+    for values in cursor:
+        yield _normalize_row(dict(zip(OUTPUT_COLUMN_LIST, values, strict=True)))
+
+
+def _read_xlsx_row_list(input_path: str) -> Iterator[tuple[Any, ...]]:
+    """Stream the rows of the data sheet of an Excel output file."""
+    workbook = load_workbook(input_path, read_only=True)
+    try:
+        row_iterator = workbook[DataSheetName.DATA.value].iter_rows(values_only=True)
+        header = next(row_iterator, None)
+        if header is None:
+            return
+
+        column_idx_list = [header.index(column) for column in OUTPUT_COLUMN_LIST]
+        for values in row_iterator:
+            # Skip blank separator rows
+            if all(value is None for value in values):
+                continue
+            yield tuple(
+                (
+                    value.date().isoformat()
+                    if isinstance(value := values[idx], datetime)
+                    else value
+                )
+                for idx in column_idx_list
+            )
+    finally:
+        workbook.close()
+
+
+def _read_sorted_xlsx(input_path: str, spool_path: str) -> Iterator[Row]:
+    """
+    Stream the rows of an Excel output file, sorted by the duplicate columns.
+
+    The rows are spooled to an SQLite file on disk, which sorts them without
+    holding them in memory.
+    """
+    with closing(sqlite3.connect(spool_path)) as connection:
+        connection.execute(f"CREATE TABLE spool ({', '.join(OUTPUT_COLUMN_LIST)})")
+        with connection:
+            connection.executemany(
+                _SQL_INSERT_SPOOL,
+                _read_xlsx_row_list(input_path),
+            )
+
+        yield from _read_sorted_sqlite(connection, table_name="spool")
+
+
+def _read_sorted(input_path: str, spool_path: str) -> Iterator[Row]:
+    """Stream the rows of an output file, sorted by the duplicate columns."""
+    if input_path.endswith(FILE_ENDING_XLSX):
+        yield from _read_sorted_xlsx(input_path, spool_path=spool_path)
+    elif input_path.endswith(FILE_ENDING_SQLITE):
+        with closing(connect_read_only(input_path)) as connection:
+            yield from _read_sorted_sqlite(connection, table_name="fact")
+    else:
+        raise PyEsefError(f"Unable to merge {input_path}, unknown file type")
+
+
+def _drop_duplicates(row_iterator: Iterator[Row]) -> Iterator[Row]:
+    """Drop rows equal to the previous row in the duplicate columns."""
+    previous_key = None
+    for row in row_iterator:
+        key = _get_sort_key(row)
+        if key == previous_key:
+            continue
+        previous_key = key
+        yield row
+
+
+def _write_xlsx(output_path: str, row_iterator: Iterator[Row]) -> int:
+    """Write rows to an Excel file without holding them in memory."""
+    row_count = 0
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(DataSheetName.DATA.value)
+    worksheet.append(OUTPUT_COLUMN_LIST)
+    for row in row_iterator:
+        worksheet.append([row[column] for column in OUTPUT_COLUMN_LIST])
+        row_count += 1
+    workbook.save(output_path)
+    return row_count
+
+
+def _write_csv(output_path: str, row_iterator: Iterator[Row]) -> int:
+    """Write rows to a CSV file."""
+    row_count = 0
+    with open(output_path, "w", encoding="UTF-8", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=OUTPUT_COLUMN_LIST)
+        writer.writeheader()
+        for row in row_iterator:
+            writer.writerow(row)
+            row_count += 1
+    return row_count
+
+
+def merge_output_files(input_path_list: list[str], output_path: str) -> None:
+    """
+    Merge output files into one file.
+
+    Excel files and SQLite fact stores are read as sorted streams and k-way merged,
+    dropping duplicates on the same columns as data_list_to_clean_df. Memory use
+    does not depend on the size of the input files. The output is an Excel or a CSV
+    file, depending on the file ending of output_path.
+    """
+    if output_path.endswith(FILE_ENDING_XLSX):
+        writer = _write_xlsx
+    elif output_path.endswith(FILE_ENDING_CSV):
+        writer = _write_csv
+    else:
+        raise PyEsefError(f"Unable to write {output_path}, unknown file type")
+
+    with tempfile.TemporaryDirectory() as spool_folder:
+        merged_row_iterator = heapq.merge(
+            *(
+                _read_sorted(
+                    input_path,
+                    spool_path=os.path.join(spool_folder, f"{idx}.sqlite"),
+                )
+                for idx, input_path in enumerate(input_path_list)
+            ),
+            key=_get_sort_key,
+        )
+        row_count = writer(output_path, _drop_duplicates(merged_row_iterator))
+
+    LOGGER.info(
+        f"Merged {len(input_path_list)} files into {output_path} ({row_count} rows)"
+    )
@@ -3,44 +3,140 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from decimal import ROUND_HALF_EVEN, Decimal
+import fractions
 from functools import cached_property
+from importlib.util import find_spec
 import json
 import logging
 import os
 from pathlib import Path
+from queue import Queue
 import time
+from typing import Any
 
-from arelle import PluginManager
 from arelle.ModelDtsObject import ModelRelationship
 from arelle.ModelRelationshipSet import ModelRelationshipSet
 from arelle.ModelValue import QName
 from arelle.ModelXbrl import ModelXbrl
 from arelle.XbrlConst import parentChild, summationItem
+import numpy as np
 import pandas as pd
 
+from pyesef.utils.budget import BudgetWorker, FilingBudget
 from pyesef.utils.data_management import asdict_with_properties
-
-from ..const import PATH_PROJECT_ROOT
+from pyesef.utils.file_handler import scan_files
+from pyesef.utils.file_name import get_identity_path, read_package_file_name
+from pyesef.utils.filing_filter import FilingFilter
+from pyesef.utils.metrics import METRICS
+from pyesef.utils.shard import Shard
+
+from ..const import (
+    PATH_ARCHIVES,
+    PATH_FAILED,
+    PATH_PARSED,
+    ExtractionEngine,
+)
 from ..error import PyEsefError
-from .common import Controller, EsefData, clean_linkrole, load_model_xbrl
+from .common import (
+    Controller,
+    EsefData,
+    clean_linkrole,
+    create_controller,
+    load_model_xbrl,
+)
+from .entrypoint_index import EntrypointIndex
 from .extract_definitions_to_csv import extract_definitions_to_csv
+from .fact_store import FactStore
+from .ledger import JobLedger, get_content_hash
 from .load_statement_definition import (
     StatementName,
     UpdateStatementDefinitionJson,
 )
 from .read_facts import StatementBaseName, facts_to_data_list
+from .read_inline_facts import read_inline_facts
 from .save_excel import SaveToExcel
+from .taxonomy_labels import TaxonomyLabels
 
 FILE_ENDING_ZIP = ".zip"
 
-PATH_FAILED = os.path.abspath(os.path.join(PATH_PROJECT_ROOT, "error"))
-PATH_ARCHIVES = os.path.abspath(os.path.join(PATH_PROJECT_ROOT, "archives"))
-PATH_PARSED = os.path.abspath(os.path.join(PATH_PROJECT_ROOT, "parsed"))
-PATH_FAILED = os.path.abspath(os.path.join(PATH_PROJECT_ROOT, "error"))
+# Rows with the same values in these columns are duplicates
+DUPLICATE_COLUMN_LIST = [
+    "period_end",
+    "lei",
+    "wider_anchor_or_xml_name",
+    "xml_name",
+    "level_1",
+    "value",
+]
+
+
+# The compact value column holds the value times 10 to this power
+VALUE_SCALE = 4
+
+# The range of the values of an int64 column
+INT64_INFO = np.iinfo(np.int64)
+
+# Columns with few distinct values, stored as categoricals in the compact schema
+COMPACT_CATEGORY_COLUMN_LIST = [
+    "lei",
+    "currency",
+    "xml_name",
+    "wider_anchor_or_xml_name",
+    "wider_anchor",
+    "level_1",
+    "membership",
+    "label",
+]
+
+# Arrow-backed strings are used for the categories if pyarrow is installed
+COMPACT_STRING_DTYPE = pd.StringDtype(
+    "pyarrow" if find_spec("pyarrow") is not None else "python"
+)
+
+
+def scale_value(value: Decimal | fractions.Fraction | int | float) -> int:
+    """Return a value times 10 to the power of VALUE_SCALE, rounded half to even."""
+    if isinstance(value, fractions.Fraction):
+        decimal_value = Decimal(value.numerator) / Decimal(value.denominator)
+    elif isinstance(value, float):
+        # The shortest repr of a float is the value that was parsed
+        decimal_value = Decimal(str(value))
+    else:
+        decimal_value = Decimal(value)
+
+    return int(decimal_value.scaleb(VALUE_SCALE).to_integral_value(ROUND_HALF_EVEN))
+
+
+def to_compact_df(df_to_compact: pd.DataFrame) -> pd.DataFrame:
+    """Return a dataframe with categorical string columns."""
+    return df_to_compact.astype(
+        {
+            column: pd.CategoricalDtype(
+                pd.Index(
+                    df_to_compact[column].dropna().unique(),
+                    dtype=COMPACT_STRING_DTYPE,
+                ).sort_values()
+            )
+            for column in COMPACT_CATEGORY_COLUMN_LIST
+            if column in df_to_compact.columns
+        }
+    )
 
 
-def data_list_to_clean_df(data_list: list[EsefData]) -> pd.DataFrame:
-    """Convert a list of filing data to a Pandas dataframe."""
+def data_list_to_clean_df(
+    data_list: list[EsefData], compact: bool = False
+) -> pd.DataFrame:
+    """
+    Convert a list of filing data to a Pandas dataframe.
+
+    By default, the value column is an int. With the compact schema, the value
+    column is an int64 of the value times 10 to the power of VALUE_SCALE, which
+    keeps the decimals, and string columns with few distinct values are
+    categoricals. The frame then takes several times less memory and groups faster.
+    If a scaled value doesn't fit in an int64, the value column holds Python ints
+    instead.
+    """
     data_frame_from_data_class = pd.json_normalize(  # type: ignore[arg-type]
         asdict_with_properties(obj) for obj in data_list
     )
@@ -52,10 +148,19 @@ def data_list_to_clean_df(data_list: list[EsefData]) -> pd.DataFrame:
         data_frame_from_data_class["period_end"]
     )
 
-    # Make the value column an int
-    data_frame_from_data_class["value"] = data_frame_from_data_class["value"].astype(
-        int
-    )
+    if compact:
+        scaled_value = data_frame_from_data_class["value"].map(scale_value)
+        if scaled_value.empty or (
+            INT64_INFO.min <= scaled_value.min()
+            and scaled_value.max() <= INT64_INFO.max
+        ):
+            scaled_value = scaled_value.astype("int64")
+        data_frame_from_data_class["value"] = scaled_value
+    else:
+        # Make the value column an int
+        data_frame_from_data_class["value"] = data_frame_from_data_class[
+            "value"
+        ].astype(int)
 
     # Drop beginning-of-year items
     data_frame_from_data_class = data_frame_from_data_class.query(
@@ -73,30 +178,30 @@ def data_list_to_clean_df(data_list: list[EsefData]) -> pd.DataFrame:
     df_before_duplicate_drop = data_frame_from_data_class.copy()
 
     # It's easier to look for duplicates when using ints than when using floats
-    try:
-        df_before_duplicate_drop.loc[:, "value_int"] = (
-            df_before_duplicate_drop["value"] * 100
-        ).astype(int)
-    except OverflowError:
-        df_before_duplicate_drop.loc[:, "value_int"] = (
-            df_before_duplicate_drop["value"]
-        ).astype(int)
+    if compact:
+        df_before_duplicate_drop.loc[:, "value_int"] = df_before_duplicate_drop["value"]
+    else:
+        try:
+            df_before_duplicate_drop.loc[:, "value_int"] = (
+                df_before_duplicate_drop["value"] * 100
+            ).astype(int)
+        except OverflowError:
+            df_before_duplicate_drop.loc[:, "value_int"] = (
+                df_before_duplicate_drop["value"]
+            ).astype(int)
 
     # Drop any duplicates
     df_before_duplicate_drop = df_before_duplicate_drop.drop_duplicates(
-        subset=[
-            "period_end",
-            "lei",
-            "wider_anchor_or_xml_name",
-            "xml_name",
-            "level_1",
-            "value",
-        ],
+        subset=DUPLICATE_COLUMN_LIST,
         ignore_index=True,
     )
 
     df_before_duplicate_drop = df_before_duplicate_drop.drop(columns=["value_int"])
 
+    if compact:
+        df_before_duplicate_drop = to_compact_df(df_before_duplicate_drop)
+        df_before_duplicate_drop.attrs["value_scale"] = VALUE_SCALE
+
     return df_before_duplicate_drop
 
 
@@ -153,59 +258,21 @@ class ParseListData:
     language_code: str
 
 
-class ReadFiling:
-    """
-    Read and save filings.
-
-    The data will be stored in a Excel file.
-    """
-
-    TEMPLATE_OUTPUT_PATH_EXCEL = "output.xlsx"
+class FilingReader:
+    """Read the facts of filings with an Arelle controller."""
 
     def __init__(
         self,
-        filing_folder: str = PATH_ARCHIVES,
-        should_move_parsed_file: bool = True,
+        cntlr: Controller,
+        engine: ExtractionEngine = ExtractionEngine.ARELLE,
+        entrypoint_index_path: str = EntrypointIndex.PATH_INDEX,
     ) -> None:
         """Init class."""
-        start_time = time.time()
-
-        self.filing_folder = filing_folder
-        self.file_to_parse_list: list[ParseListData] = []
-        self.should_move_parsed_file = should_move_parsed_file
+        self.cntlr = cntlr  # The Arelle controller
+        self.engine = engine
         self.definitions: pd.DataFrame = pd.DataFrame()
-
-        self.cntlr = Controller()  # The Arelle controller
-
-        # Add support for reading ESEF-files
-        PluginManager.addPluginModule("validate/ESEF")
-
-        self.find_files()
-        self.parse_file_list()
-
-        # Close the controller
-        self.cntlr.close()
-        end_time = time.time()
-        total_time = round(end_time - start_time, 0)
-        self.cntlr.addToLog(
-            f"Parsed {len(self.file_to_parse_list)} files in {total_time}s"
-        )
-
-    def find_files(self) -> None:
-        """Loop through the archive folder and locate relevant files to parse."""
-        for subdir, _, files in os.walk(PATH_ARCHIVES):
-            for file in files:
-                zip_file_path = os.path.join(subdir, file)
-
-                if not zip_file_path.endswith(FILE_ENDING_ZIP):
-                    continue
-
-                self.file_to_parse_list.append(
-                    ParseListData(
-                        zip_file_path=zip_file_path,
-                        language_code=subdir.split("/")[-1],  # Language code
-                    )
-                )
+        self.entrypoint_index = EntrypointIndex(path=entrypoint_index_path)
+        self.taxonomy_labels = TaxonomyLabels(cntlr=cntlr)
 
     @cached_property
     def model_role_map(self) -> dict[str, set[str]]:
@@ -268,72 +335,417 @@ class ReadFiling:
             changes_equity=changes_equity_name,
         )
 
-    def parse_file_list(self) -> None:
-        """PARSE FILE."""
-        for idx, parse_list_data in enumerate(self.file_to_parse_list):
-            filing_list: list[EsefData] = []
-
+    def read_fact_list(
+        self, parse_list_data: ParseListData, content_hash: str | None = None
+    ) -> list[EsefData]:
+        """Read the facts of a file with the selected engine."""
+        if self.engine == ExtractionEngine.INLINE:
             try:
-                # Load zip-file into a ModelXbrl instance
-                model_xbrl = load_model_xbrl(
+                fact_list = read_inline_facts(
                     zip_file_path=parse_list_data.zip_file_path,
-                    cntlr=self.cntlr,
+                    model_role_map=self.model_role_map,
+                    taxonomy_labels=self.taxonomy_labels,
                 )
-
-                statement_base_name = self.get_statement_base_name(
-                    model_xbrl=model_xbrl
+            except Exception as exc:
+                self.cntlr.addToLog(
+                    f"Loading {parse_list_data.zip_file_path} with Arelle due to {exc}",
+                    level=logging.WARNING,
                 )
-
-                if self.definitions.empty and len(model_xbrl.facts):
-                    self.definitions = extract_definitions_to_csv(
-                        model_xbrl.facts[0].concept
+            else:
+                # Like Arelle, the definitions are those of the schema of the first
+                # fact, if it is in a taxonomy instead of the package
+                if self.definitions.empty and fact_list:
+                    self.definitions = self.taxonomy_labels.get_definitions(
+                        fact_list[0].xml_name
                     )
+                return fact_list
 
-                # Extract the model roles
-                to_model_to_linkrole_map = _extract_model_roles(
-                    model_xbrl=model_xbrl,
-                )
+        return self.read_fact_list_arelle(
+            parse_list_data=parse_list_data, content_hash=content_hash
+        )
 
-                fact_list = facts_to_data_list(
-                    model_xbrl=model_xbrl,
-                    to_model_to_linkrole_map=to_model_to_linkrole_map,
-                    statement_base_name=statement_base_name,
-                )
-                filing_list.extend(fact_list)
+    def read_fact_list_arelle(
+        self, parse_list_data: ParseListData, content_hash: str | None = None
+    ) -> list[EsefData]:
+        """
+        Load a file into a ModelXbrl instance and read its facts.
+
+        With the content hash of the file, its entrypoint is read from the index.
+        """
+        model_xbrl = load_model_xbrl(
+            zip_file_path=parse_list_data.zip_file_path,
+            cntlr=self.cntlr,
+            entrypoint_index=self.entrypoint_index,
+            content_hash=content_hash,
+        )
 
-                df_result = data_list_to_clean_df(filing_list)
-                self.save_to_excel(df_result=df_result)
+        try:
+            statement_base_name = self.get_statement_base_name(model_xbrl=model_xbrl)
 
-                model_xbrl.modelManager.cntlr.addToLog(
-                    f"Finished working on: {idx}/{len(self.file_to_parse_list)}"
+            if self.definitions.empty and len(model_xbrl.facts):
+                self.definitions = extract_definitions_to_csv(
+                    model_xbrl.facts[0].concept
                 )
 
-                model_xbrl.close()
+            # Extract the model roles
+            to_model_to_linkrole_map = _extract_model_roles(
+                model_xbrl=model_xbrl,
+            )
 
-                if not self.should_move_parsed_file:
-                    continue
+            return facts_to_data_list(
+                model_xbrl=model_xbrl,
+                to_model_to_linkrole_map=to_model_to_linkrole_map,
+                statement_base_name=statement_base_name,
+            )
+        finally:
+            model_xbrl.close()
 
-                self.move_parsed_file(
-                    zip_file_path=parse_list_data.zip_file_path,
-                    target_path=os.path.join(
-                        PATH_PARSED, parse_list_data.language_code
-                    ),
-                )
-                self.cntlr.addToLog("Moved files to parsed folder")
+    def close(self) -> None:
+        """Close the entrypoint index."""
+        self.entrypoint_index.close()
 
-            except Exception as exc:
-                if not self.should_move_parsed_file:
-                    continue
-                self.move_parsed_file(
-                    zip_file_path=parse_list_data.zip_file_path,
-                    target_path=os.path.join(
-                        PATH_FAILED, parse_list_data.language_code
-                    ),
+
+# The filing reader of the budget worker, created once per worker
+_WORKER_STATE: dict[str, Any] = {}
+
+
+def _init_budget_worker(engine: ExtractionEngine, entrypoint_index_path: str) -> None:
+    """Create the controller and the filing reader of the budget worker."""
+    _WORKER_STATE["reader"] = FilingReader(
+        cntlr=create_controller(),
+        engine=engine,
+        entrypoint_index_path=entrypoint_index_path,
+    )
+
+
+def _read_fact_list_in_worker(
+    parse_list_data: ParseListData, content_hash: str | None
+) -> tuple[list[EsefData], pd.DataFrame]:
+    """Read the facts of a file in the budget worker."""
+    reader: FilingReader = _WORKER_STATE["reader"]
+    fact_list = reader.read_fact_list(
+        parse_list_data=parse_list_data, content_hash=content_hash
+    )
+    return fact_list, reader.definitions
+
+
+class ReadFiling(FilingReader):
+    """
+    Read and save filings.
+
+    The data will be stored in a Excel file.
+    """
+
+    TEMPLATE_OUTPUT_PATH_EXCEL = "output.xlsx"
+
+    def __init__(
+        self,
+        filing_folder: str = PATH_ARCHIVES,
+        should_move_parsed_file: bool = True,
+        *,
+        filing_queue: Queue[ParseListData | None] | None = None,
+        retry_failed: bool = False,
+        shard: Shard | None = None,
+        filing_filter: FilingFilter | None = None,
+        file_to_parse_list: list[ParseListData] | None = None,
+        cntlr: Controller | None = None,
+        engine: ExtractionEngine = ExtractionEngine.ARELLE,
+        budget: FilingBudget | None = None,
+        fact_store_path: str = FactStore.PATH_FACT_STORE,
+        ledger_path: str = JobLedger.PATH_LEDGER,
+        output_path_excel: str = SaveToExcel.TEMPLATE_OUTPUT_PATH_EXCEL,
+        entrypoint_index_path: str = EntrypointIndex.PATH_INDEX,
+    ) -> None:
+        """
+        Init class.
+
+        If a filing queue is given, files are parsed as they are put on the queue
+        instead of being looked up in the archive folder. Likewise, if a list of
+        files is given, only those files are parsed. A running controller can be
+        passed in to avoid the start-up cost of a new one. Files that the ledger
+        marks as parsed are skipped, as are files that failed unless retry_failed
+        is set. If a shard is given, only the files of that shard are parsed and the
+        output is written to files of their own. If a filing filter is given, only
+        the selected files in the filing folder are parsed. With the inline engine,
+        facts are read from the inline XBRL report and Arelle is only used for
+        filings that can't be read that way. If a budget is given, each filing is
+        read in a worker process that is killed when it goes over the budget, and
+        the filing is then handled like any other failed filing. The worker is
+        spawned once and restarted after it is killed. The facts are upserted into
+        the fact store, the jobs are tracked in the ledger, the facts are saved to
+        Excel and the entrypoints are indexed, at the given paths.
+        """
+        start_time = time.time()
+
+        self.filing_folder = filing_folder
+        self.file_to_parse_list: list[ParseListData] = []
+        self.should_move_parsed_file = should_move_parsed_file
+        self.retry_failed = retry_failed
+        self.shard = shard
+        self.filing_filter = filing_filter
+        self.budget = budget
+        self.budget_worker: BudgetWorker | None = None
+
+        self.output_path_excel = output_path_excel
+        if shard is not None:
+            self.output_path_excel = shard.apply_to_path(self.output_path_excel)
+            fact_store_path = shard.apply_to_path(fact_store_path)
+            ledger_path = shard.apply_to_path(ledger_path)
+            entrypoint_index_path = shard.apply_to_path(entrypoint_index_path)
+
+        self.fact_store = FactStore(path=fact_store_path)
+        self.ledger = JobLedger(path=ledger_path)
+
+        self.should_close_cntlr = cntlr is None
+        if cntlr is None:
+            cntlr = create_controller()
+        super().__init__(
+            cntlr=cntlr, engine=engine, entrypoint_index_path=entrypoint_index_path
+        )
+
+        if filing_queue is not None:
+            self.parse_file_queue(filing_queue=filing_queue)
+        elif file_to_parse_list is not None:
+            self.file_to_parse_list.extend(file_to_parse_list)
+            self.parse_file_list()
+        else:
+            self.find_files()
+            self.parse_file_list()
+
+        # Stop the budget worker, close the controller unless owned by the caller,
+        # the fact store, the ledger and the entrypoint index
+        if self.budget_worker is not None:
+            self.budget_worker.close()
+        if self.should_close_cntlr:
+            self.cntlr.close()
+        self.fact_store.close()
+        self.ledger.close()
+        self.close()
+        end_time = time.time()
+        total_time = round(end_time - start_time, 0)
+        self.cntlr.addToLog(
+            f"Parsed {len(self.file_to_parse_list)} files in {total_time}s"
+        )
+
+    def find_files(self) -> None:
+        """
+        Loop through the filing folder and locate relevant files to parse.
+
+        The shard and the filing filter are applied before any file is loaded, with
+        the LEI and period end stored by the downloader, or read from the package
+        file name or zip directory. Files that can't be identified are in every
+        shard and are only filtered on country. Hard links to
+        a package found already, which the archive store makes for a package listed
+        under several paths, are left out.
+        """
+        file_id_set: set[tuple[int, int]] = set()
+        # The inode of a file is read with its folder, only the folders are stat'ed
+        # for their device
+        device_map: dict[str, int] = {}
+        for entry in scan_files(
+            os.path.normpath(self.filing_folder), file_ending=FILE_ENDING_ZIP
+        ):
+            folder = os.path.dirname(entry.path)
+            if folder not in device_map:
+                device_map[folder] = os.stat(folder).st_dev
+            file_id = (device_map[folder], entry.inode())
+            if file_id in file_id_set:
+                continue
+            file_id_set.add(file_id)
+
+            zip_file_path = entry.path
+            language_code = os.path.basename(os.path.dirname(zip_file_path))
+
+            if self.should_parse_file(
+                zip_file_path=zip_file_path, language_code=language_code
+            ):
+                self.file_to_parse_list.append(
+                    ParseListData(
+                        zip_file_path=zip_file_path,
+                        language_code=language_code,
+                    )
                 )
+
+    def should_parse_file(self, zip_file_path: str, language_code: str) -> bool:
+        """Return True if a file belongs to the shard and the filing filter."""
+        if self.shard is None and self.filing_filter is None:
+            return True
+
+        package_file_name = read_package_file_name(zip_file_path)
+
+        # A file that can't be identified is parsed by the node that has it
+        if (
+            self.shard is not None
+            and package_file_name is not None
+            and not self.shard.includes(
+                lei=package_file_name.lei,
+                period_end=package_file_name.period_end,
+            )
+        ):
+            return False
+
+        if self.filing_filter is None:
+            return True
+
+        # Files directly in the filing folder are not in a country folder
+        country_iso_2: str | None = language_code
+        if os.path.dirname(zip_file_path) == os.path.normpath(self.filing_folder):
+            country_iso_2 = None
+
+        if package_file_name is None:
+            return self.filing_filter.includes_country(country_iso_2)
+
+        return self.filing_filter.includes(
+            country_iso_2=country_iso_2,
+            lei=package_file_name.lei,
+            period_end=package_file_name.period_end,
+        )
+
+    def parse_file_list(self) -> None:
+        """Parse all files found in the archive folder."""
+        METRICS.export.add_total(len(self.file_to_parse_list))
+
+        for idx, parse_list_data in enumerate(self.file_to_parse_list):
+            self.parse_file(
+                parse_list_data=parse_list_data,
+                progress=f"{idx}/{len(self.file_to_parse_list)}",
+            )
+
+    def parse_file_queue(self, filing_queue: Queue[ParseListData | None]) -> None:
+        """Parse files as soon as they are put on the queue, until None is put."""
+        while (parse_list_data := filing_queue.get()) is not None:
+            self.file_to_parse_list.append(parse_list_data)
+            METRICS.export.add_total(1)
+            self.parse_file(
+                parse_list_data=parse_list_data,
+                progress=str(len(self.file_to_parse_list)),
+            )
+
+    def parse_file(self, parse_list_data: ParseListData, progress: str) -> None:
+        """
+        Parse a file and save its facts.
+
+        A file that can't be hashed, read or saved is logged, marked as failed in
+        the ledger if it could be hashed, and moved to the error folder, so that the
+        remaining files are still parsed.
+        """
+        filing_list: list[EsefData] = []
+        content_hash: str | None = None
+        start_time = time.monotonic()
+
+        try:
+            content_hash = get_content_hash(parse_list_data.zip_file_path)
+            if not self.ledger.should_parse(
+                content_hash=content_hash, retry_failed=self.retry_failed
+            ):
                 self.cntlr.addToLog(
-                    f"Moved file to error folder due to {exc}",
-                    level=logging.WARNING,
+                    f"Skipping {parse_list_data.zip_file_path}, already in ledger"
+                )
+                METRICS.export.record_skipped()
+                return
+
+            self.ledger.start(
+                content_hash=content_hash,
+                zip_file_path=parse_list_data.zip_file_path,
+            )
+            start_time = time.monotonic()
+
+            filing_list.extend(
+                self.read_fact_list_within_budget(
+                    parse_list_data=parse_list_data, content_hash=content_hash
                 )
+            )
+
+            df_result = data_list_to_clean_df(filing_list)
+            self.save_to_excel(df_result=df_result)
+            self.save_to_fact_store(
+                df_result=df_result,
+                parse_list_data=parse_list_data,
+            )
+            self.ledger.finish(
+                content_hash=content_hash,
+                output_location=self.fact_store.path,
+            )
+            duration = time.monotonic() - start_time
+            METRICS.export.record(duration=duration, item_count=len(df_result))
+
+            self.cntlr.addToLog(f"Finished working on: {progress}")
+
+            if not self.should_move_parsed_file:
+                return
+
+            self.move_parsed_file(
+                zip_file_path=parse_list_data.zip_file_path,
+                target_path=os.path.join(PATH_PARSED, parse_list_data.language_code),
+            )
+            self.cntlr.addToLog("Moved files to parsed folder")
+
+        except Exception as exc:
+            self.handle_failed_file(
+                parse_list_data=parse_list_data,
+                content_hash=content_hash,
+                exc=exc,
+                duration=time.monotonic() - start_time,
+            )
+
+    def handle_failed_file(
+        self,
+        parse_list_data: ParseListData,
+        content_hash: str | None,
+        exc: Exception,
+        duration: float,
+    ) -> None:
+        """Log a file that failed, record it and move it to the error folder."""
+        self.cntlr.addToLog(
+            f"Unable to parse {parse_list_data.zip_file_path} due to {exc}",
+            level=logging.WARNING,
+        )
+        METRICS.export.record(duration=duration, failed=True)
+
+        try:
+            if content_hash is not None:
+                self.ledger.fail(content_hash=content_hash, error=str(exc))
+
+            if not self.should_move_parsed_file:
+                return
+
+            self.move_parsed_file(
+                zip_file_path=parse_list_data.zip_file_path,
+                target_path=os.path.join(PATH_FAILED, parse_list_data.language_code),
+            )
+            self.cntlr.addToLog("Moved file to error folder")
+        except Exception as fail_exc:
+            self.cntlr.addToLog(
+                f"Unable to record the failure of {parse_list_data.zip_file_path} "
+                f"due to {fail_exc}",
+                level=logging.WARNING,
+            )
+
+    def read_fact_list_within_budget(
+        self, parse_list_data: ParseListData, content_hash: str | None = None
+    ) -> list[EsefData]:
+        """Read the facts of a file, in the budget worker if there is a budget."""
+        if self.budget is None:
+            return self.read_fact_list(
+                parse_list_data=parse_list_data, content_hash=content_hash
+            )
+
+        if self.budget_worker is None:
+            self.budget_worker = BudgetWorker(
+                initializer=_init_budget_worker,
+                initargs=(self.engine, self.entrypoint_index.path),
+            )
+
+        fact_list, definitions = self.budget_worker.run(
+            _read_fact_list_in_worker,
+            parse_list_data,
+            content_hash,
+            budget=self.budget,
+        )
+        if self.definitions.empty:
+            self.definitions = definitions
+
+        return fact_list
 
     def save_to_excel(self, df_result: pd.DataFrame) -> None:
         """Save data to Excel."""
@@ -342,12 +754,40 @@ class ReadFiling:
             df_to_save=df_result,
         )
 
+    def save_to_fact_store(
+        self, df_result: pd.DataFrame, parse_list_data: ParseListData
+    ) -> None:
+        """
+        Upsert data into the SQLite fact store.
+
+        The period end of the filing decides which filing is the newest. The
+        modification time of the zip-file, which is when it was downloaded, only
+        decides between filings of the same period.
+        """
+        package_file_name = read_package_file_name(parse_list_data.zip_file_path)
+        self.fact_store.upsert(
+            df_to_save=df_result,
+            zip_file_path=parse_list_data.zip_file_path,
+            country=parse_list_data.language_code,
+            period_end=(
+                package_file_name.period_end if package_file_name is not None else None
+            ),
+            filed_at=os.path.getmtime(parse_list_data.zip_file_path),
+        )
+
     @staticmethod
     def move_parsed_file(zip_file_path: str, target_path: str) -> None:
-        """Move a file from the filings folder to the parsed folder."""
+        """Move a file, and the identity stored next to it, to the target folder."""
         Path(target_path).mkdir(parents=True, exist_ok=True)
 
         os.replace(
             zip_file_path,
             os.path.join(target_path, os.path.basename(zip_file_path)),
         )
+
+        identity_path = get_identity_path(zip_file_path)
+        if os.path.exists(identity_path):
+            os.replace(
+                identity_path,
+                os.path.join(target_path, os.path.basename(identity_path)),
+            )
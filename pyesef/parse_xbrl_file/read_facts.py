@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
 from enum import Enum
 import fractions
+import re
 from typing import Any, cast
 
 from arelle import XbrlConst
@@ -15,6 +16,7 @@ from arelle.ModelObject import ModelObject
 from arelle.ModelValue import QName, dateTime
 from arelle.ModelXbrl import ModelXbrl
 from arelle.ValidateXbrlCalcs import roundValue
+import numpy as np
 
 from pyesef.parse_xbrl_file.load_statement_definition import StatementName
 
@@ -30,6 +32,119 @@ class BaseXBRLiType(Enum):
     DATE = "dateItemType"
 
 
+def round_numeric_value(val: str, decimals: str | None, precision: str | None) -> Any:
+    """Round a numeric value using its reported decimals."""
+    if decimals is None or decimals == "INF":  # show using decimals or reported format
+        dec = len(val.partition(".")[2])
+    else:  # max decimals at 28
+        dec = max(
+            min(int(decimals), 28), -28
+        )  # 2.7 wants short int, 3.2 takes regular int, don't use _INT here
+    return roundValue(val, precision, dec)  # round using reported decimals
+
+
+# Whole numbers with at most this many digits fit an int64, also once rounded
+MAX_FAST_DIGIT_COUNT = 18
+
+# The digits of the Decimal context Arelle rounds values in
+DECIMAL_DIGIT_COUNT = 28
+
+
+def _get_fast_places(decimals: str | None) -> int | None:
+    """
+    Return the decimals a whole number is rounded to, with 0 if it is kept as is.
+
+    None means that the decimals are left to round_numeric_value.
+    """
+    if decimals is None or decimals == "INF":
+        return 0
+
+    if re.fullmatch(r"-?[0-9]+", decimals) is None:
+        return None
+
+    return max(min(int(decimals), DECIMAL_DIGIT_COUNT), -DECIMAL_DIGIT_COUNT)
+
+
+def round_numeric_value_list(
+    value_list: list[str],
+    decimals_list: list[str | None],
+    precision_list: list[str | None],
+) -> list[Any]:
+    """
+    Round numeric values using their reported decimals, in one vectorized pass.
+
+    Each value equals that of round_numeric_value. Whole numbers of up to
+    MAX_FAST_DIGIT_COUNT digits without a precision, which are almost all values in
+    a filing, are rounded half to even as int64 and returned as an int. The other
+    values are rounded one by one by round_numeric_value.
+    """
+    value_count = len(value_list)
+    if value_count == 0:
+        return []
+
+    # A value that isn't ASCII isn't a whole number either, so it is left out
+    if not "".join(value_list).isascii():
+        value_list_ascii = [val if val.isascii() else "" for val in value_list]
+    else:
+        value_list_ascii = value_list
+    value_array = np.array(value_list_ascii, dtype=np.bytes_)
+
+    # Parse each distinct decimals once, of which a filing has a handful
+    decimals_array = np.array(decimals_list, dtype=object)
+    places_array = np.zeros(value_count, dtype=np.int64)
+    is_fast = np.array([precision is None for precision in precision_list])
+    for decimals in set(decimals_list):
+        places = _get_fast_places(decimals)
+        is_decimals = decimals_array == decimals
+        if places is None:
+            is_fast &= ~is_decimals
+        else:
+            places_array[is_decimals] = places
+
+    is_negative = np.char.startswith(value_array, b"-")
+    digit_array = np.char.lstrip(value_array, b"-")
+    digit_count = np.char.str_len(digit_array)
+
+    is_fast &= (
+        # One minus sign at most, followed by nothing but digits
+        (digit_count == np.char.str_len(value_array) - is_negative)
+        & np.char.isdigit(digit_array)
+        & (digit_count <= MAX_FAST_DIGIT_COUNT)
+        # Arelle can't add more than 28 digits in all, which raises an error
+        & (digit_count + np.maximum(places_array, 0) <= DECIMAL_DIGIT_COUNT)
+    )
+
+    absolute_array = np.zeros(value_count, dtype=np.int64)
+    absolute_array[is_fast] = digit_array[is_fast].astype(np.int64)
+
+    # Round to a negative number of decimals, ie to tens, hundreds etc. A power of
+    # ten above 10**18 rounds every fast value to 0.
+    is_rounded = is_fast & (places_array < 0)
+    power_array = np.ones(value_count, dtype=np.int64)
+    power_array[is_rounded] = 10 ** np.minimum(
+        -places_array[is_rounded], MAX_FAST_DIGIT_COUNT
+    )
+    quotient_array, remainder_array = np.divmod(absolute_array, power_array)
+    is_round_up = (2 * remainder_array > power_array) | (
+        (2 * remainder_array == power_array) & (quotient_array % 2 == 1)
+    )
+    rounded_array = np.where(
+        is_rounded,
+        (quotient_array + is_round_up) * power_array,
+        absolute_array,
+    )
+    rounded_array[is_rounded & (places_array < -MAX_FAST_DIGIT_COUNT)] = 0
+    rounded_array = np.where(is_negative, -rounded_array, rounded_array)
+
+    result_list: list[Any] = rounded_array.tolist()
+    for idx in np.flatnonzero(~is_fast).tolist():
+        result_list[idx] = round_numeric_value(
+            value_list[idx], decimals_list[idx], precision_list[idx]
+        )
+
+    return result_list
+
+
 def parsed_value(
     fact: ModelFact,
 ) -> fractions.Fraction | int | Any | bool | str | None:
@@ -57,16 +172,9 @@ def parsed_value(
         return int(val)
 
     if concept.isNumeric:
-        dec = fact.decimals
-
-        if dec is None or dec == "INF":  # show using decimals or reported format
-            dec = len(val.partition(".")[2])
-        else:  # max decimals at 28
-            dec = max(
-                min(int(dec), 28), -28
-            )  # 2.7 wants short int, 3.2 takes regular int, don't use _INT here
-        num = roundValue(val, fact.precision, dec)  # round using reported decimals
-        return num
+        return round_numeric_value(
+            val, decimals=fact.decimals, precision=fact.precision
+        )
 
     if concept.baseXbrliType == BaseXBRLiType.DATE:
         return dateTime(val)
@@ -80,6 +188,42 @@ def parsed_value(
     return val
 
 
+@dataclass
+class NumericValueBatch:
+    """Numeric values to round in one pass, with where their facts are in a list."""
+
+    index_list: list[int] = field(default_factory=list)
+    value_list: list[str] = field(default_factory=list)
+    decimals_list: list[str | None] = field(default_factory=list)
+    precision_list: list[str | None] = field(default_factory=list)
+
+    def add(self, index: int, fact: ModelFact) -> None:
+        """Add the value of a fact, which is at the index of the list."""
+        self.index_list.append(index)
+        self.value_list.append(fact.value.strip())
+        self.decimals_list.append(fact.decimals)
+        self.precision_list.append(fact.precision)
+
+    def round_into(self, fact_list: list[EsefData]) -> None:
+        """Round the values and set them on the facts of the list."""
+        rounded_list = round_numeric_value_list(
+            self.value_list, self.decimals_list, self.precision_list
+        )
+        for idx, value in zip(self.index_list, rounded_list):
+            fact_list[idx].value = value
+
+
+def _is_rounded_numeric(fact: ModelFact, concept: ModelConcept) -> bool:
+    """Return true if parsed_value would round the value of the fact."""
+    return bool(
+        not concept.isTuple
+        and not fact.isNil
+        and not concept.isFraction
+        and not concept.isInteger
+        and concept.isNumeric
+    )
+
+
 def _get_label(property_view: tuple[tuple[str, str]]) -> str | None:
     """Extract label."""
     for item in property_view:
@@ -188,6 +332,8 @@ def facts_to_data_list(
 
     wider_anchor_map = _wider_anchor_to_dict(model_xbrl=model_xbrl)
 
+    numeric_value_batch = NumericValueBatch()
+
     for fact in model_xbrl_fact_list:
         concept: ModelConcept | None = fact.concept
         context: ModelContext | None = fact.context
@@ -218,9 +364,11 @@ def facts_to_data_list(
             _, lei = context.entityIdentifier
             _, membership_name = _get_membership(context.scenario)
 
-            value = parsed_value(fact)
-
-            if value is None:
+            if _is_rounded_numeric(fact, concept):
+                # Rounded with the other numeric values once all facts are read
+                numeric_value_batch.add(index=len(fact_list), fact=fact)
+                value = None
+            elif (value := parsed_value(fact)) is None:
                 continue
 
             if wider_anchor is None:
@@ -230,13 +378,9 @@ def facts_to_data_list(
 
             value = cast(int, value)
 
-            if xml_name in to_model_to_linkrole_map:
-                xml_level_1_key = to_model_to_linkrole_map[xml_name]
-            else:
-                xml_level_1_key = None
-
             level_1 = _get_level_1(
-                xml_level_1_key=xml_level_1_key, statement_base_name=statement_base_name
+                xml_level_1_key=to_model_to_linkrole_map.get(xml_name),
+                statement_base_name=statement_base_name,
             )
 
             fact_list.append(
@@ -257,4 +401,9 @@ def facts_to_data_list(
         except Exception as exc:
             raise PyEsefError(f"Unable to parse fact {fact} ", exc) from exc
 
+    try:
+        numeric_value_batch.round_into(fact_list)
+    except Exception as exc:
+        raise PyEsefError("Unable to parse the numeric facts", exc) from exc
+
     return fact_list
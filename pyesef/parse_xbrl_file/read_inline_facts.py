@@ -0,0 +1,684 @@
+"""
+Read facts from the inline XBRL report of a filing, without loading the DTS.
+
+Only numeric facts are read, which is all facts_to_data_list keeps. Contexts, units
+and the format, scale and sign of each fact are resolved from the report itself.
+Numeric facts can't be continued, so ix:continuation is not followed. Statement
+classification, wider anchors and labels are read from the linkbases in the
+package, whose locators are resolved to concepts through the schemas they point to.
+Labels of concepts that the filer has not labelled, eg those of the IFRS
+taxonomy, are read from the taxonomies that the package refers to, which are loaded
+with Arelle once each, or are the QName if no taxonomy labels are given.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+import posixpath
+from typing import IO, TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+import zipfile
+
+from arelle import XbrlConst
+from arelle.FunctionIxt import ixtNamespaceFunctions
+from arelle.XmlUtil import collapseWhitespace, datetimeValue
+from lxml import etree
+
+from ..const import NiceType
+from ..error import PyEsefError
+from .common import EsefData, StatementName, clean_linkrole
+from .read_facts import (
+    StatementBaseName,
+    _get_is_extension,
+    _get_level_1,
+    _get_period_end,
+    round_numeric_value_list,
+)
+
+if TYPE_CHECKING:
+    from .taxonomy_labels import TaxonomyLabels
+
+NS_IX_LIST = (
+    "http://www.xbrl.org/2013/inlineXBRL",
+    "http://www.xbrl.org/2008/inlineXBRL",
+)
+NS_LINK = "http://www.xbrl.org/2003/linkbase"
+NS_XBRLI = "http://www.xbrl.org/2003/instance"
+NS_XLINK = "http://www.w3.org/1999/xlink"
+NS_XSI = "http://www.w3.org/2001/XMLSchema-instance"
+NS_XSD = "http://www.w3.org/2001/XMLSchema"
+
+TAG_CONTEXT = f"{{{NS_XBRLI}}}context"
+TAG_UNIT = f"{{{NS_XBRLI}}}unit"
+TAG_NON_FRACTION_LIST = [f"{{{ns}}}nonFraction" for ns in NS_IX_LIST]
+TAG_EXCLUDE_LIST = [f"{{{ns}}}exclude" for ns in NS_IX_LIST]
+TAG_LINKBASE = f"{{{NS_LINK}}}linkbase"
+TAG_IMPORT = f"{{{NS_XSD}}}import"
+TAG_LINKBASE_REF = f"{{{NS_LINK}}}linkbaseRef"
+TAG_ELEMENT = f"{{{NS_XSD}}}element"
+
+# The language of the label used if the filer has labels in several languages
+DEFAULT_LABEL_LANG = "en"
+
+MEASURE_SHARES = (NS_XBRLI, "shares")
+
+FILE_ENDING_REPORT_LIST = (".xhtml", ".html")
+FILE_ENDING_LINKBASE = ".xml"
+FILE_ENDING_SCHEMA = ".xsd"
+
+
+class InlineXbrlError(PyEsefError):
+    """The filing can't be read without Arelle."""
+
+
+def _xlink(name: str) -> str:
+    """Return the Clark notation of an XLink attribute."""
+    return f"{{{NS_XLINK}}}{name}"
+
+
+@dataclass
+class InlineContext:
+    """Represent the parts of a context used by numeric facts."""
+
+    lei: str
+    period_end: date | None
+    membership: str | None
+
+
+@dataclass
+class InlineUnit:
+    """Represent a unit."""
+
+    multiply_list: list[tuple[str, str]]
+    divide_list: list[tuple[str, str]]
+    value: str
+
+    @property
+    def nice_type(self) -> str | None:
+        """Return the nice type of facts with this unit, if they are about shares."""
+        if self.multiply_list == [MEASURE_SHARES] and not self.divide_list:
+            return NiceType.SHARES.value
+
+        if self.divide_list == [MEASURE_SHARES]:
+            return NiceType.PER_SHARE.value
+
+        return None
+
+
+@dataclass
+class InlineFact:
+    """Represent a numeric fact of an inline XBRL report."""
+
+    name: str
+    context_ref: str | None
+    unit_ref: str | None
+    decimals: str | None
+    precision: str | None
+    # The transformed and scaled value, or None if nil
+    value: str | None
+
+
+@dataclass
+class ConceptResolver:
+    """
+    Resolve the hrefs of locators to the local names of their concepts.
+
+    The schemas map the id of each concept to its name. Concepts of schemas that
+    aren't read, eg of a taxonomy that wasn't loaded, are resolved from their id,
+    which is usually the prefix and the local name joined by an underscore.
+    """
+
+    # The local names of concepts, by the path or URL of their schema and their id
+    concept_name_map: dict[str, str] = field(default_factory=dict)
+    prefix_list: list[str] = field(default_factory=list)
+
+    def get_local_name(self, href: str | None, base_name: str) -> str | None:
+        """Return the local name of a concept, from an href relative to a file."""
+        if href is None:
+            return None
+
+        path, _, concept_id = href.partition("#")
+        if not urlsplit(path).scheme:
+            path = posixpath.normpath(
+                posixpath.join(posixpath.dirname(base_name), path)
+            )
+
+        concept_name = self.concept_name_map.get(f"{path}#{concept_id}")
+        if concept_name is not None:
+            return concept_name
+
+        # Local names may contain underscores, so only a known prefix is split off
+        for prefix in sorted(self.prefix_list, key=len, reverse=True):
+            if concept_id.startswith(f"{prefix}_"):
+                return concept_id[len(prefix) + 1 :]
+
+        return concept_id.partition("_")[2] or concept_id
+
+
+@dataclass
+class PackageLinkbases:
+    """Represent the relationships in the linkbases of a package."""
+
+    to_model_to_linkrole_map: dict[str, str] = field(default_factory=dict)
+    wider_anchor_map: dict[str, str] = field(default_factory=dict)
+    label_map: dict[str, str] = field(default_factory=dict)
+    role_concept_map: dict[str, set[str]] = field(default_factory=dict)
+
+
+def _iter_inner_text(element: etree._Element) -> Iterator[str]:
+    """Yield the text of an element, leaving out ix:exclude and comments."""
+    if element.text:
+        yield element.text
+
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in TAG_EXCLUDE_LIST:
+            yield from _iter_inner_text(child)
+        if child.tail:
+            yield child.tail
+
+
+def _resolve_qname(element: etree._Element, prefixed_name: str) -> tuple[str, str]:
+    """Return the namespace and local name of a prefixed name."""
+    prefix, _, local_name = prefixed_name.strip().rpartition(":")
+    namespace = element.nsmap.get(prefix or None)
+    if namespace is None:
+        raise InlineXbrlError(f"Unknown prefix in {prefixed_name}")
+
+    return namespace, local_name
+
+
+def get_inline_value(element: etree._Element) -> str:
+    """
+    Return the value of an ix:nonFraction element.
+
+    The value is transformed, scaled and signed in the same way as by Arelle.
+    """
+    value = "".join(_iter_inner_text(element))
+
+    format_name = element.get("format")
+    if format_name is not None:
+        value = collapseWhitespace(value)
+        namespace, local_name = _resolve_qname(element, format_name)
+        transform = ixtNamespaceFunctions.get(namespace, {}).get(local_name)
+        if transform is None:
+            raise InlineXbrlError(f"Unsupported transform {format_name}")
+        try:
+            value = transform(value)
+        except Exception as exc:
+            raise InlineXbrlError(f"Unable to transform {value}", exc) from exc
+
+    try:
+        num = Decimal(value)
+        scale = element.get("scale")
+        if scale is not None:
+            num *= 10 ** Decimal(scale.strip())
+    except (ValueError, InvalidOperation) as exc:
+        raise InlineXbrlError(f"Invalid value for number {value}", exc) from exc
+
+    if element.get("sign"):
+        num = -num
+
+    if num.is_infinite():
+        return "-INF" if num < 0 else "INF"
+    if num.is_nan():
+        return "NaN"
+
+    # Drop any .0
+    if num == num.to_integral() and ".0" not in value:
+        num = num.quantize(Decimal(1))
+
+    return f"{num:f}"
+
+
+def _read_fact(element: etree._Element) -> InlineFact:
+    """Read an ix:nonFraction element."""
+    is_nil = element.get(f"{{{NS_XSI}}}nil") in ("true", "1")
+
+    return InlineFact(
+        name=element.get("name", ""),
+        context_ref=element.get("contextRef"),
+        unit_ref=element.get("unitRef"),
+        decimals=element.get("decimals"),
+        precision=element.get("precision"),
+        value=None if is_nil else get_inline_value(element),
+    )
+
+
+def _read_context(element: etree._Element) -> InlineContext:
+    """Read an xbrli:context element."""
+    identifier = element.find(f"{{{NS_XBRLI}}}entity/{{{NS_XBRLI}}}identifier")
+    lei = "" if identifier is None else (identifier.text or "").strip()
+
+    period_end = None
+    end_date = element.find(f"{{{NS_XBRLI}}}period/{{{NS_XBRLI}}}endDate")
+    if end_date is None:
+        end_date = element.find(f"{{{NS_XBRLI}}}period/{{{NS_XBRLI}}}instant")
+    if end_date is not None:
+        end_datetime = datetimeValue((end_date.text or "").strip(), addOneDay=True)
+        if end_datetime is not None:
+            period_end = _get_period_end(end_datetime)
+
+    # Like Arelle, read the membership from the text of the scenario
+    membership = None
+    scenario = element.find(f"{{{NS_XBRLI}}}scenario")
+    if scenario is not None:
+        item_list = "".join(scenario.itertext()).split(":")
+        if len(item_list) == 2:
+            membership = item_list[1]
+
+    return InlineContext(lei=lei, period_end=period_end, membership=membership)
+
+
+def _read_measure_list(
+    element: etree._Element | None,
+) -> list[tuple[str, str]]:
+    """Read the sorted measures of an xbrli:unit or xbrli:divide part."""
+    if element is None:
+        return []
+
+    return sorted(
+        _resolve_qname(measure, measure.text or "")
+        for measure in element.findall(f"{{{NS_XBRLI}}}measure")
+    )
+
+
+def _get_measure_string(measure: tuple[str, str], element: etree._Element) -> str:
+    """Return a measure in the same format as Arelle."""
+    namespace, local_name = measure
+    if namespace in (NS_XBRLI, XbrlConst.iso4217):
+        return local_name
+
+    prefix = next(
+        (prefix for prefix, uri in element.nsmap.items() if uri == namespace), None
+    )
+    return local_name if prefix is None else f"{prefix}:{local_name}"
+
+
+def _read_unit(element: etree._Element) -> InlineUnit:
+    """Read an xbrli:unit element."""
+    divide = element.find(f"{{{NS_XBRLI}}}divide")
+    if divide is None:
+        multiply_list = _read_measure_list(element)
+        divide_list = []
+    else:
+        multiply_list = _read_measure_list(divide.find(f"{{{NS_XBRLI}}}unitNumerator"))
+        divide_list = _read_measure_list(divide.find(f"{{{NS_XBRLI}}}unitDenominator"))
+
+    value_list = [_get_measure_string(measure, element) for measure in multiply_list]
+    if divide_list:
+        value_list.append("/")
+        value_list.extend(
+            _get_measure_string(measure, element) for measure in divide_list
+        )
+
+    return InlineUnit(
+        multiply_list=multiply_list,
+        divide_list=divide_list,
+        value=" ".join(value_list),
+    )
+
+
+def _read_report(
+    stream: IO[bytes],
+    fact_list: list[InlineFact],
+    context_map: dict[str, InlineContext],
+    unit_map: dict[str, InlineUnit],
+) -> None:
+    """Read the numeric facts, contexts and units of a report in one pass."""
+    for _, element in etree.iterparse(
+        stream,
+        events=("end",),
+        tag=[*TAG_NON_FRACTION_LIST, TAG_CONTEXT, TAG_UNIT],
+        huge_tree=True,
+    ):
+        if element.tag == TAG_CONTEXT:
+            context_map[element.get("id", "")] = _read_context(element)
+        elif element.tag == TAG_UNIT:
+            unit_map[element.get("id", "")] = _read_unit(element)
+        elif element.get("target") is None:
+            # Facts of other targets are not loaded by Arelle either
+            fact_list.append(_read_fact(element))
+
+        # A fact nested in another fact is part of the value of the outer fact
+        parent = element.getparent()
+        if parent is None or parent.tag not in TAG_NON_FRACTION_LIST:
+            element.clear(keep_tail=True)
+
+
+def _select_label(label_list: list[tuple[str, str]]) -> str:
+    """Return the label in the default language, else the first label."""
+    for lang, label in label_list:
+        if lang == DEFAULT_LABEL_LANG:
+            return label
+
+    for lang, label in label_list:
+        if lang.startswith(DEFAULT_LABEL_LANG):
+            return label
+
+    return label_list[0][1]
+
+
+def _read_locator_and_resource_map(
+    extended_link: etree._Element, base_name: str, concept_resolver: ConceptResolver
+) -> tuple[dict[str, str | None], dict[str, list[tuple[str, str, str]]]]:
+    """
+    Read the locators and resources of an extended link, by XLink label.
+
+    Locators are read as the local name of their concept, and resources as their
+    role, language and text.
+    """
+    locator_map: dict[str, str | None] = {}
+    resource_map: dict[str, list[tuple[str, str, str]]] = {}
+    for child in extended_link:
+        child_type = child.get(_xlink("type"))
+        if child_type == "locator":
+            locator_map[child.get(_xlink("label"), "")] = (
+                concept_resolver.get_local_name(child.get(_xlink("href")), base_name)
+            )
+        elif child_type == "resource":
+            resource_map.setdefault(child.get(_xlink("label"), ""), []).append(
+                (
+                    child.get(_xlink("role"), XbrlConst.standardLabel),
+                    child.get("{http://www.w3.org/XML/1998/namespace}lang", ""),
+                    "".join(child.itertext()),
+                )
+            )
+
+    return locator_map, resource_map
+
+
+def _read_extended_link(
+    extended_link: etree._Element,
+    base_name: str,
+    concept_resolver: ConceptResolver,
+    package_linkbases: PackageLinkbases,
+    label_list_map: dict[str, list[tuple[str, str]]],
+) -> None:
+    """Read the relationships of an extended link."""
+    role = extended_link.get(_xlink("role"), "")
+    locator_map, resource_map = _read_locator_and_resource_map(
+        extended_link, base_name=base_name, concept_resolver=concept_resolver
+    )
+
+    for arc in extended_link:
+        if arc.get(_xlink("type")) != "arc":
+            continue
+
+        arcrole = arc.get(_xlink("arcrole"))
+        from_name = locator_map.get(arc.get(_xlink("from"), ""))
+        to_label = arc.get(_xlink("to"), "")
+        to_name = locator_map.get(to_label)
+
+        if from_name is None:
+            continue
+
+        if arcrole == XbrlConst.conceptLabel:
+            label_list_map.setdefault(from_name, []).extend(
+                (lang, text)
+                for label_role, lang, text in resource_map.get(to_label, [])
+                if label_role == XbrlConst.standardLabel
+            )
+        elif to_name is None:
+            continue
+        elif arcrole == XbrlConst.summationItem:
+            package_linkbases.to_model_to_linkrole_map[to_name] = clean_linkrole(role)
+        elif arcrole == XbrlConst.parentChild:
+            package_linkbases.role_concept_map.setdefault(role, set()).update(
+                (from_name, to_name)
+            )
+        elif arcrole == XbrlConst.widerNarrower:
+            package_linkbases.wider_anchor_map.setdefault(to_name, from_name)
+
+
+def read_package_linkbases(
+    zip_file: zipfile.ZipFile,
+    name_list: list[str],
+    concept_resolver: ConceptResolver | None = None,
+) -> PackageLinkbases:
+    """Read the calculation, presentation, definition and label linkbases."""
+    if concept_resolver is None:
+        concept_resolver = ConceptResolver()
+
+    package_linkbases = PackageLinkbases()
+    label_list_map: dict[str, list[tuple[str, str]]] = {}
+
+    for name in sorted(name_list):
+        if not name.endswith(FILE_ENDING_LINKBASE) or "META-INF/" in name:
+            continue
+
+        with zip_file.open(name) as stream:
+            root = etree.parse(stream).getroot()
+
+        if root.tag != TAG_LINKBASE:
+            continue
+
+        for extended_link in root:
+            if extended_link.get(_xlink("type")) == "extended":
+                _read_extended_link(
+                    extended_link,
+                    base_name=name,
+                    concept_resolver=concept_resolver,
+                    package_linkbases=package_linkbases,
+                    label_list_map=label_list_map,
+                )
+
+    package_linkbases.label_map = {
+        name: _select_label(label_list)
+        for name, label_list in label_list_map.items()
+        if label_list
+    }
+
+    return package_linkbases
+
+
+def read_taxonomy_url_list(
+    zip_file: zipfile.ZipFile, name_list: list[str]
+) -> list[str]:
+    """Return the URLs of the schemas and linkbases outside the package."""
+    url_set: set[str] = set()
+    for name in name_list:
+        if not name.endswith(FILE_ENDING_SCHEMA) or "META-INF/" in name:
+            continue
+
+        with zip_file.open(name) as stream:
+            for _, element in etree.iterparse(
+                stream, events=("end",), tag=[TAG_IMPORT, TAG_LINKBASE_REF]
+            ):
+                url = element.get("schemaLocation") or element.get(_xlink("href"))
+                if url is not None and urlsplit(url).scheme in ("http", "https"):
+                    url_set.add(url)
+
+    return sorted(url_set)
+
+
+def read_concept_name_map(
+    zip_file: zipfile.ZipFile, name_list: list[str]
+) -> dict[str, str]:
+    """Return the local names of the concepts of the package, by schema and id."""
+    concept_name_map: dict[str, str] = {}
+    for name in name_list:
+        if not name.endswith(FILE_ENDING_SCHEMA) or "META-INF/" in name:
+            continue
+
+        with zip_file.open(name) as stream:
+            for _, element in etree.iterparse(stream, events=("end",), tag=TAG_ELEMENT):
+                concept_id = element.get("id")
+                concept_name = element.get("name")
+                if concept_id is not None and concept_name is not None:
+                    concept_name_map[f"{name}#{concept_id}"] = concept_name
+
+    return concept_name_map
+
+
+def get_statement_base_name(
+    role_concept_map: dict[str, set[str]],
+    model_role_map: Mapping[str, Iterable[str]],
+) -> StatementBaseName:
+    """
+    Return the link roles of the statements.
+
+    Like ReadFiling.find_link_role, each statement is the presentation role with
+    most concepts in common with its definition, but concepts are compared by
+    local name.
+    """
+    link_role_map: dict[str, str] = {}
+    for statement_name in StatementName:
+        base_name_set = {
+            clark.rpartition("}")[2] for clark in model_role_map[statement_name.value]
+        }
+        max_score = 0
+        filer_role = ""
+        for role, concept_set in role_concept_map.items():
+            score = len(concept_set & base_name_set)
+            if score > max_score:
+                max_score = score
+                filer_role = role
+        link_role_map[statement_name.value] = filer_role.split("/")[-1]
+
+    return StatementBaseName(
+        balance_sheet=link_role_map[StatementName.BALANCE_SHEET.value],
+        cash_flow=link_role_map[StatementName.CASH_FLOW.value],
+        income_statement=link_role_map[StatementName.INCOME_STATEMENT.value],
+        changes_equity=link_role_map[StatementName.CHANGES_EQUITY.value],
+    )
+
+
+def _to_esef_data(
+    fact: InlineFact,
+    *,
+    value: Any,
+    context: InlineContext,
+    unit: InlineUnit,
+    package_linkbases: PackageLinkbases,
+    label_map: Mapping[str, str],
+    statement_base_name: StatementBaseName,
+) -> EsefData:
+    """Convert a fact in the same way as facts_to_data_list."""
+    prefix, _, xml_name = fact.name.rpartition(":")
+
+    if context.period_end is None:
+        raise InlineXbrlError(f"Fact {fact.name} has no period end")
+
+    wider_anchor = package_linkbases.wider_anchor_map.get(xml_name) or None
+
+    return EsefData(
+        period_end=context.period_end,
+        lei=context.lei,
+        wider_anchor_or_xml_name=wider_anchor or xml_name,
+        wider_anchor=wider_anchor,
+        xml_name=xml_name,
+        currency=unit.value,
+        value=value,
+        is_company_defined=_get_is_extension(prefix),
+        membership=context.membership,
+        label=label_map.get(xml_name, fact.name),
+        level_1=_get_level_1(
+            xml_level_1_key=package_linkbases.to_model_to_linkrole_map.get(xml_name),
+            statement_base_name=statement_base_name,
+        ),
+    )
+
+
+def read_inline_facts(
+    zip_file_path: str,
+    model_role_map: Mapping[str, Iterable[str]],
+    taxonomy_labels: TaxonomyLabels | None = None,
+) -> list[EsefData]:
+    """
+    Read the numeric facts of a filing, with the same fields as facts_to_data_list.
+
+    Concepts that the filer has not labelled get the label of the taxonomy they are
+    in, if taxonomy labels are given. Raise InlineXbrlError if the filing can't be
+    read this way, eg if it uses a custom transform, so that it can be loaded by
+    Arelle instead.
+    """
+    fact_list: list[InlineFact] = []
+    context_map: dict[str, InlineContext] = {}
+    unit_map: dict[str, InlineUnit] = {}
+
+    try:
+        with zipfile.ZipFile(zip_file_path) as zip_file:
+            name_list = zip_file.namelist()
+            report_name_list = [
+                name
+                for name in name_list
+                if f"/{name}".rpartition("/")[0].endswith("/reports")
+                and name.endswith(FILE_ENDING_REPORT_LIST)
+            ]
+            if not report_name_list:
+                raise InlineXbrlError(f"No inline XBRL report in {zip_file_path}")
+
+            for name in sorted(report_name_list):
+                with zip_file.open(name) as stream:
+                    _read_report(
+                        stream,
+                        fact_list=fact_list,
+                        context_map=context_map,
+                        unit_map=unit_map,
+                    )
+
+            taxonomy_url_list = read_taxonomy_url_list(zip_file, name_list)
+            concept_resolver = ConceptResolver(
+                concept_name_map=read_concept_name_map(zip_file, name_list),
+                prefix_list=sorted({fact.name.partition(":")[0] for fact in fact_list}),
+            )
+            if taxonomy_labels is not None:
+                concept_resolver.concept_name_map.update(
+                    taxonomy_labels.get_concept_name_map(taxonomy_url_list)
+                )
+
+            package_linkbases = read_package_linkbases(
+                zip_file, name_list, concept_resolver=concept_resolver
+            )
+    except (OSError, zipfile.BadZipFile, etree.XMLSyntaxError) as exc:
+        raise InlineXbrlError(f"Unable to read {zip_file_path}", exc) from exc
+
+    statement_base_name = get_statement_base_name(
+        role_concept_map=package_linkbases.role_concept_map,
+        model_role_map=model_role_map,
+    )
+
+    label_map: dict[str, str] = {}
+    if taxonomy_labels is not None:
+        label_map.update(taxonomy_labels.get_label_map(taxonomy_url_list))
+    label_map.update(package_linkbases.label_map)
+
+    kept_list: list[tuple[InlineFact, InlineContext, InlineUnit]] = []
+    for fact in fact_list:
+        context = context_map.get(fact.context_ref or "")
+        unit = unit_map.get(fact.unit_ref or "")
+
+        # We don't want to save facts about shares, nor nil facts
+        if (
+            context is None
+            or fact.value is None
+            or (unit is not None and unit.nice_type is not None)
+        ):
+            continue
+
+        if unit is None:
+            raise InlineXbrlError(f"Fact {fact.name} has no unit")
+
+        kept_list.append((fact, context, unit))
+
+    value_list = round_numeric_value_list(
+        [str(fact.value).strip() for fact, _, _ in kept_list],
+        decimals_list=[fact.decimals for fact, _, _ in kept_list],
+        precision_list=[fact.precision for fact, _, _ in kept_list],
+    )
+
+    return [
+        _to_esef_data(
+            fact,
+            value=value,
+            context=context,
+            unit=unit,
+            package_linkbases=package_linkbases,
+            label_map=label_map,
+            statement_base_name=statement_base_name,
+        )
+        for (fact, context, unit), value in zip(kept_list, value_list)
+    ]
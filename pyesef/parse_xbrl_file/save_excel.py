@@ -57,14 +57,14 @@ class SaveToExcel:
         mode = "w"
         if_sheet_exists = None
 
-        if os.path.exists(self.TEMPLATE_OUTPUT_PATH_EXCEL):
-            reader = pd.read_excel(self.TEMPLATE_OUTPUT_PATH_EXCEL)
+        if os.path.exists(self.parent.output_path_excel):
+            reader = pd.read_excel(self.parent.output_path_excel)
             startrow = reader.shape[0] + 1
             mode = "a"
             if_sheet_exists = "overlay"
 
         with pd.ExcelWriter(
-            path=self.TEMPLATE_OUTPUT_PATH_EXCEL,
+            path=self.parent.output_path_excel,
             engine="openpyxl",
             mode=mode,  # type: ignore[arg-type]
             if_sheet_exists=if_sheet_exists,  # type: ignore[arg-type]
@@ -0,0 +1,85 @@
+"""Order filings by their estimated cost, for parallel workers."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+import os
+import zipfile
+
+BYTES_PER_MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ZipStats:
+    """The size in bytes and the number of members of a zip-file."""
+
+    file_size: int
+    member_count: int
+
+
+def read_zip_stats(zip_file_path: str) -> ZipStats:
+    """Return the size and member count of a zip-file, which only reads its index."""
+    file_size = os.path.getsize(zip_file_path)
+
+    try:
+        with zipfile.ZipFile(zip_file_path) as zip_file:
+            member_count = len(zip_file.infolist())
+    except (OSError, zipfile.BadZipFile):
+        member_count = 0
+
+    return ZipStats(file_size=file_size, member_count=member_count)
+
+
+@dataclass(frozen=True)
+class CostModel:
+    """
+    Estimate the seconds it takes to parse a filing.
+
+    The cost is linear in the size of the zip-file in MB and its member count. The
+    coefficients only have to get the order of filings right.
+    """
+
+    seconds_per_mb: float = 2.0
+    seconds_per_member: float = 0.01
+    seconds_fixed: float = 1.0
+
+    def predict(self, zip_stats: ZipStats) -> float:
+        """Return the estimated seconds to parse a filing."""
+        return max(
+            self.seconds_per_mb * zip_stats.file_size / BYTES_PER_MB
+            + self.seconds_per_member * zip_stats.member_count
+            + self.seconds_fixed,
+            0.0,
+        )
+
+
+@dataclass(frozen=True)
+class ScheduledFiling:
+    """A filing with its estimated cost."""
+
+    zip_file_path: str
+    predicted_duration: float
+
+
+def schedule_largest_first(
+    zip_file_path_list: Iterable[str], cost_model: CostModel
+) -> list[ScheduledFiling]:
+    """
+    Return filings ordered by their estimated cost, most expensive first.
+
+    Handing out the most expensive filings first keeps a large filing from being
+    started last, which bounds the time parallel workers wait for each other.
+    Filings with the same cost keep their order.
+    """
+    return sorted(
+        (
+            ScheduledFiling(
+                zip_file_path=zip_file_path,
+                predicted_duration=cost_model.predict(read_zip_stats(zip_file_path)),
+            )
+            for zip_file_path in zip_file_path_list
+        ),
+        key=lambda scheduled_filing: scheduled_filing.predicted_duration,
+        reverse=True,
+    )
@@ -0,0 +1,117 @@
+"""Read the labels and definitions of the taxonomies that filings refer to."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+import logging
+
+import pandas as pd
+
+from .common import Controller
+from .extract_definitions_to_csv import extract_definitions_to_csv
+
+
+class TaxonomyLabels:
+    """
+    Labels and definitions of the concepts of the taxonomies that filings refer to.
+
+    A filing refers to the IFRS taxonomy by URL instead of including it, so the
+    labels of IFRS concepts are not in the package. Each taxonomy is loaded with
+    Arelle the first time a filing refers to it, and only its standard labels, the
+    names of its concepts by id and the definitions of its concepts are kept.
+    """
+
+    def __init__(self, cntlr: Controller) -> None:
+        """Init class."""
+        self.cntlr = cntlr
+        self._label_map_by_url: dict[str, dict[str, str]] = {}
+        # The local names of concepts, by the URL of their schema and their id
+        self._concept_name_map: dict[str, str] = {}
+        # The definitions of the schema of each concept, by local name
+        self._definitions_map: dict[str, pd.DataFrame] = {}
+
+    def get_label_map(self, url_list: Iterable[str]) -> dict[str, str]:
+        """Return the standard labels of the taxonomies, by concept local name."""
+        label_map: dict[str, str] = {}
+        for url in url_list:
+            for name, label in self._get_url_label_map(url).items():
+                label_map.setdefault(name, label)
+
+        return label_map
+
+    def get_concept_name_map(self, url_list: Iterable[str]) -> dict[str, str]:
+        """
+        Return the local names of the concepts of the taxonomies loaded so far.
+
+        The names are keyed by the URL of their schema and their id, like the href
+        of a locator. The taxonomies are loaded first, unless they are loaded.
+        """
+        for url in url_list:
+            self._get_url_label_map(url)
+
+        return self._concept_name_map
+
+    def get_definitions(self, xml_name: str) -> pd.DataFrame:
+        """
+        Return the definitions of the schema of a concept, like Arelle does.
+
+        The frame is empty if the concept is not in a taxonomy loaded so far.
+        """
+        return self._definitions_map.get(xml_name, pd.DataFrame())
+
+    def _get_url_label_map(self, url: str) -> dict[str, str]:
+        """Return the standard labels of a taxonomy, which is loaded the first time."""
+        if url not in self._label_map_by_url:
+            self._label_map_by_url[url] = self._load(url)
+
+        return self._label_map_by_url[url]
+
+    def _load(self, url: str) -> dict[str, str]:
+        """Load a taxonomy and return its standard labels."""
+        # The ESEF disclosure system would require the taxonomy to be a report package
+        model_manager = self.cntlr.modelManager
+        disclosure_system_name = model_manager.disclosureSystem.name
+        model_manager.disclosureSystem.select(None)
+        try:
+            model_xbrl = model_manager.load(url)
+        except Exception as exc:
+            self.cntlr.addToLog(
+                f"Unable to load taxonomy {url} due to {exc}", level=logging.WARNING
+            )
+            return {}
+        finally:
+            model_manager.disclosureSystem.select(disclosure_system_name)
+
+        try:
+            if model_xbrl.modelDocument is None:
+                self.cntlr.addToLog(
+                    f"Unable to load taxonomy {url}", level=logging.WARNING
+                )
+                return {}
+
+            label_map: dict[str, str] = {}
+            document_definitions_map: dict[str, pd.DataFrame] = {}
+            for concept in model_xbrl.qnameConcepts.values():
+                if concept.id is not None:
+                    self._concept_name_map.setdefault(
+                        f"{concept.modelDocument.uri}#{concept.id}", concept.name
+                    )
+
+                label = concept.label(
+                    lang=model_manager.defaultLang, fallbackToQname=False
+                )
+                if label is None:
+                    continue
+
+                label_map.setdefault(concept.name, label)
+
+                uri = concept.modelDocument.uri
+                if uri not in document_definitions_map:
+                    document_definitions_map[uri] = extract_definitions_to_csv(concept)
+                self._definitions_map.setdefault(
+                    concept.name, document_definitions_map[uri]
+                )
+
+            return label_map
+        finally:
+            model_xbrl.close()
@@ -0,0 +1,77 @@
+"""Stream downloaded packages to the parser."""
+
+from __future__ import annotations
+
+from queue import Queue
+import threading
+
+from pyesef.const import ExtractionEngine
+from pyesef.download import download_packages
+from pyesef.download.common import Filing
+from pyesef.parse_xbrl_file.read_and_save_filings import ParseListData, ReadFiling
+from pyesef.utils.budget import FilingBudget
+from pyesef.utils.filing_filter import FilingFilter
+from pyesef.utils.shard import Shard
+
+# The number of verified packages waiting to be parsed before downloads pause
+DEFAULT_QUEUE_SIZE = 10
+
+
+def download_and_export(
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    *,
+    retry_failed: bool = False,
+    shard: Shard | None = None,
+    filing_filter: FilingFilter | None = None,
+    engine: ExtractionEngine = ExtractionEngine.ARELLE,
+    budget: FilingBudget | None = None,
+) -> None:
+    """
+    Download packages and parse each one as soon as it has been verified.
+
+    Downloads run in a background thread and put the packages on a bounded queue,
+    while the packages are parsed in the calling thread. Network time and parsing
+    time then overlap. If the downloads fail, the packages downloaded so far are
+    parsed and the error is raised afterwards.
+    """
+    filing_queue: Queue[ParseListData | None] = Queue(maxsize=queue_size)
+    download_error_list: list[Exception] = []
+
+    def _on_package_ready(filing: Filing) -> None:
+        """Put a verified package on the queue."""
+        filing_queue.put(
+            ParseListData(
+                zip_file_path=filing.write_location,
+                language_code=filing.country_iso_2,
+            )
+        )
+
+    def _download() -> None:
+        """Download all packages and tell the parser when done."""
+        try:
+            download_packages(
+                on_package_ready=_on_package_ready,
+                shard=shard,
+                filing_filter=filing_filter,
+            )
+        except Exception as exc:
+            download_error_list.append(exc)
+        finally:
+            filing_queue.put(None)
+
+    download_thread = threading.Thread(target=_download, name="download", daemon=True)
+    download_thread.start()
+
+    ReadFiling(
+        should_move_parsed_file=False,
+        filing_queue=filing_queue,
+        retry_failed=retry_failed,
+        shard=shard,
+        engine=engine,
+        budget=budget,
+    )
+
+    download_thread.join()
+
+    if download_error_list:
+        raise download_error_list[0]
@@ -0,0 +1,89 @@
+"""Query parsed facts."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from contextlib import closing
+from datetime import date
+from typing import Any
+
+import pandas as pd
+
+from pyesef.parse_xbrl_file.fact_store import FactStore, connect_read_only
+
+
+def _to_list(value: str | Iterable[str] | None) -> list[str] | None:
+    """Return a list of values, or None if there is nothing to filter on."""
+    if value is None:
+        return None
+
+    if isinstance(value, str):
+        return [value]
+
+    return list(value)
+
+
+def _in_clause(column: str, value_list: list[str]) -> str:
+    """Return an SQL IN-clause with one placeholder per value."""
+    return f"{column} IN ({', '.join('?' * len(value_list))})"
+
+
+def _to_iso_date(value: date | str) -> str:
+    """Return a date, datetime or date string as YYYY-MM-DD, as in the fact store."""
+    return pd.Timestamp(value).date().isoformat()
+
+
+def query_facts(
+    *,
+    lei: str | Iterable[str] | None = None,
+    country: str | Iterable[str] | None = None,
+    period_start: date | str | None = None,
+    period_end: date | str | None = None,
+    level_1: str | Iterable[str] | None = None,
+    item_list: Iterable[str] | None = None,
+    path: str = FactStore.PATH_FACT_STORE,
+) -> pd.DataFrame:
+    """
+    Return the facts matching all filters as a dataframe.
+
+    The filters are pushed down to the fact store, so that only indexed rows are
+    read. The period range is inclusive and item names are matched against
+    wider_anchor_or_xml_name.
+    """
+    where_list: list[str] = []
+    parameter_list: list[Any] = []
+
+    for column, value in (
+        ("fact.lei", lei),
+        ("filing.country", country),
+        ("fact.level_1", level_1),
+        ("fact.wider_anchor_or_xml_name", item_list),
+    ):
+        value_list = _to_list(value)
+        if value_list is None:
+            continue
+        where_list.append(_in_clause(column, value_list))
+        parameter_list.extend(value_list)
+
+    if period_start is not None:
+        where_list.append("fact.period_end >= ?")
+        parameter_list.append(_to_iso_date(period_start))
+
+    if period_end is not None:
+        where_list.append("fact.period_end <= ?")
+        parameter_list.append(_to_iso_date(period_end))
+
+    sql = (
+        "SELECT fact.*, filing.file_name AS filing, filing.country FROM fact "
+        "JOIN filing ON filing.id = fact.filing_id"
+    )
+    if where_list:
+        sql = f"{sql} WHERE {' AND '.join(where_list)}"
+
+    with closing(connect_read_only(path)) as connection:
+        return pd.read_sql_query(
+            sql,
+            connection,
+            params=parameter_list,
+            parse_dates=["period_end"],
+        )
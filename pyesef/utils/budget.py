@@ -0,0 +1,186 @@
+"""Run work in a process that is killed when it goes over budget."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import multiprocessing
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+import time
+from typing import Any, TypeVar
+
+from pyesef.error import PyEsefError
+from pyesef.utils.metrics import get_rss_bytes
+
+# Seconds between checks of the worker process
+POLL_INTERVAL = 0.2
+
+_T = TypeVar("_T")
+
+
+class BudgetExceededError(PyEsefError):
+    """The work went over its time or memory budget."""
+
+
+@dataclass(frozen=True)
+class FilingBudget:
+    """The wall-clock time in seconds and the memory in bytes a filing may use."""
+
+    time_limit: float | None = None
+    memory_limit: int | None = None
+
+
+def _run_worker(
+    connection: Connection,
+    initializer: Callable[..., None] | None,
+    initargs: tuple[Any, ...],
+) -> None:
+    """Run the functions sent by the parent, until it sends None."""
+    if initializer is not None:
+        initializer(*initargs)
+    connection.send(("ready", None))
+
+    while (job := connection.recv()) is not None:
+        function, args = job
+        try:
+            result = ("ok", function(*args))
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            result = ("error", f"{type(exc).__name__}: {exc}")
+
+        connection.send(result)
+
+    connection.close()
+
+
+class BudgetWorker:
+    """
+    A worker process that runs functions within a budget.
+
+    The worker is started with the spawn method, so it is safe to start from a
+    process that runs threads, eg the download thread of the pipeline or the
+    request threads of the daemon. The worker is kept between calls, so the state
+    that the initializer sets up, eg an Arelle controller, is created once. The
+    functions, their arguments and their results are pickled, so the functions must
+    be defined at the top level of a module.
+
+    The worker is killed and BudgetExceededError is raised if a call runs for
+    longer than the time limit or the resident memory of the worker goes over the
+    memory limit, and a new worker is started for the next call. As the worker
+    doesn't share memory with this process, its resident memory includes that of
+    the interpreter, the imported modules and the state set up by the initializer,
+    which the memory limit must leave room for.
+    """
+
+    def __init__(
+        self,
+        initializer: Callable[..., None] | None = None,
+        initargs: tuple[Any, ...] = (),
+    ) -> None:
+        """Init class."""
+        self.initializer = initializer
+        self.initargs = initargs
+        self._context = multiprocessing.get_context("spawn")
+        self._process: BaseProcess | None = None
+        self._connection: Connection | None = None
+
+    @property
+    def pid(self) -> int | None:
+        """Return the process id of the worker, if it is running."""
+        return None if self._process is None else self._process.pid
+
+    def _start(self) -> tuple[BaseProcess, Connection]:
+        """Start the worker, unless it is running."""
+        if self._process is not None and self._connection is not None:
+            return self._process, self._connection
+
+        parent_connection, child_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_run_worker,
+            args=(child_connection, self.initializer, self.initargs),
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+
+        self._process = process
+        self._connection = parent_connection
+
+        # Wait for the initializer, which is not part of the budget of a call
+        try:
+            parent_connection.recv()
+        except EOFError as exc:
+            self._stop(kill=True)
+            raise PyEsefError("The worker process failed to start") from exc
+
+        return process, parent_connection
+
+    def run(self, function: Callable[..., _T], *args: Any, budget: FilingBudget) -> _T:
+        """
+        Run a function in the worker and return its result.
+
+        The worker is started first if it isn't running. Errors raised in the
+        worker are raised as PyEsefError.
+        """
+        process, connection = self._start()
+        connection.send((function, args))
+
+        deadline = (
+            time.monotonic() + budget.time_limit
+            if budget.time_limit is not None
+            else None
+        )
+
+        try:
+            while not connection.poll(POLL_INTERVAL):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise BudgetExceededError(
+                        f"Exceeded the time budget of {budget.time_limit}s"
+                    )
+                if (
+                    budget.memory_limit is not None
+                    and process.pid is not None
+                    and get_rss_bytes(pid=process.pid) > budget.memory_limit
+                ):
+                    raise BudgetExceededError(
+                        f"Exceeded the memory budget of {budget.memory_limit} bytes"
+                    )
+
+            try:
+                status, value = connection.recv()
+            except EOFError as exc:
+                process.join()
+                raise PyEsefError(
+                    f"The worker process exited with code {process.exitcode}"
+                ) from exc
+        except BaseException:
+            self._stop(kill=True)
+            raise
+
+        if status == "error":
+            raise PyEsefError(value)
+
+        result: _T = value
+        return result
+
+    def _stop(self, kill: bool) -> None:
+        """Stop the worker, by killing it or by asking it to exit."""
+        if self._process is None or self._connection is None:
+            return
+
+        if kill:
+            self._process.kill()
+        else:
+            try:
+                self._connection.send(None)
+            except OSError:
+                self._process.kill()
+
+        self._process.join()
+        self._connection.close()
+        self._process = None
+        self._connection = None
+
+    def close(self) -> None:
+        """Stop the worker."""
+        self._stop(kill=False)
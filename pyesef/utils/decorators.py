@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
-from collections.abc import Callable
+from collections.abc import Callable, Collection
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
 import functools
-from time import sleep
+import random
+import threading
+from time import monotonic, sleep
 from typing import Any, TypeVar
 
 from pyesef.log import LOGGER
@@ -12,33 +17,173 @@ from pyesef.log import LOGGER
 RT = TypeVar("RT")
 
 
+@dataclass
+class RetryStats:
+    """Counters of a function decorated with retry."""
+
+    calls: int = 0
+    retries: int = 0
+    failures: int = 0
+    sleep_time: float = 0.0
+    lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+
+def get_status_code(err: BaseException) -> int | None:
+    """Return the HTTP status code of an exception from requests or urllib."""
+    response = getattr(err, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if status_code is None:
+        status_code = getattr(err, "code", None)
+
+    if isinstance(status_code, int):
+        return status_code
+
+    return None
+
+
+def get_retry_after(err: BaseException) -> float | None:
+    """Return the seconds to wait from the Retry-After header of an exception."""
+    response = getattr(err, "response", None)
+    headers = getattr(response, "headers", None) or getattr(err, "headers", None)
+    if headers is None:
+        return None
+
+    retry_after = headers.get("Retry-After")
+    if not isinstance(retry_after, str):
+        return None
+
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+
+    # The header may also be an HTTP date
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    return max((retry_at - datetime.now(UTC)).total_seconds(), 0.0)
+
+
+def get_retry_stats(func: Callable[..., Any]) -> RetryStats:
+    """Return the counters of a function decorated with retry."""
+    retry_stats: RetryStats = getattr(func, "retry_stats")
+    return retry_stats
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Define when and after how long to retry."""
+
+    num_attempts: int
+    sleeptime: float
+    backoff: float
+    max_sleeptime: float | None
+    jitter: bool
+    max_total_time: float | None
+    retry_on_status: Collection[int] | None
+
+    def get_sleep_time(self, attempt: int, err: BaseException) -> float:
+        """Return the time to sleep before the next attempt."""
+        sleep_time = self.sleeptime * self.backoff**attempt
+        if self.max_sleeptime is not None:
+            sleep_time = min(sleep_time, self.max_sleeptime)
+        if self.jitter:
+            sleep_time = random.uniform(0, sleep_time)
+
+        retry_after = get_retry_after(err)
+        if retry_after is not None:
+            sleep_time = max(sleep_time, retry_after)
+
+        return sleep_time
+
+    def should_retry(
+        self, attempt: int, err: BaseException, elapsed_time: float
+    ) -> bool:
+        """Return True if another attempt may be made after elapsed_time."""
+        if attempt >= self.num_attempts - 1:
+            return False
+
+        if self.max_total_time is not None and elapsed_time > self.max_total_time:
+            return False
+
+        if self.retry_on_status is None:
+            return True
+
+        status_code = get_status_code(err)
+        return status_code is None or status_code in self.retry_on_status
+
+
 def retry(
     num_attempts: int = 3,
-    exc: type[BaseException] = Exception,
+    exc: type[BaseException] | tuple[type[BaseException], ...] = Exception,
     log: bool = False,
-    sleeptime: int = 1,
+    sleeptime: float = 1,
+    *,
+    backoff: float = 1,
+    max_sleeptime: float | None = None,
+    jitter: bool = False,
+    max_total_time: float | None = None,
+    retry_on_status: Collection[int] | None = None,
 ) -> Callable[[Callable[..., RT]], Callable[..., RT]]:
-    """Retry function."""
+    """
+    Retry function.
+
+    The sleep between attempts starts at sleeptime and is multiplied by backoff
+    after each attempt, up to max_sleeptime. With jitter, a random part of the sleep
+    is used, so that concurrent callers don't retry in step. A Retry-After header
+    on the exception is honoured. No retry is made if it would exceed
+    max_total_time seconds since the first attempt. If retry_on_status is given,
+    exceptions with an HTTP status code are only retried for those codes.
+    """
+    retry_policy = RetryPolicy(
+        num_attempts=num_attempts,
+        sleeptime=sleeptime,
+        backoff=backoff,
+        max_sleeptime=max_sleeptime,
+        jitter=jitter,
+        max_total_time=max_total_time,
+        retry_on_status=retry_on_status,
+    )
 
     def decorator(func: Callable[..., RT]) -> Callable[..., RT]:
         """Create a decorator."""
+        retry_stats = RetryStats()
 
         @functools.wraps(func)
         def func_wrapper(*args: Any, **kwargs: Any) -> Any:
             """Wrap the function."""
+            start_time = monotonic()
+            with retry_stats.lock:
+                retry_stats.calls += 1
             last_exception = None  # Initialize last_exception variable
             for i in range(num_attempts):
                 try:
                     return func(*args, **kwargs)
                 except exc as err:
                     last_exception = err  # Update last_exception
-                    if i == num_attempts - 1:
+                    sleep_time = retry_policy.get_sleep_time(attempt=i, err=err)
+                    if not retry_policy.should_retry(
+                        attempt=i,
+                        err=err,
+                        elapsed_time=monotonic() - start_time + sleep_time,
+                    ):
+                        with retry_stats.lock:
+                            retry_stats.failures += 1
                         raise
+
                     if log:
                         LOGGER.warning(
-                            f"Failed with error {err}, trying again",
+                            f"Failed with error {err}, trying again in "
+                            f"{sleep_time:.1f}s",
                         )
-                    sleep(sleeptime)
+                    with retry_stats.lock:
+                        retry_stats.retries += 1
+                        retry_stats.sleep_time += sleep_time
+                    sleep(sleep_time)
 
             # If all attempts fail, raise the last caught exception
             if last_exception is not None:
@@ -48,6 +193,8 @@ def retry(
                 "No exception occurred"
             )  # Handle case where no exception was caught
 
+        setattr(func_wrapper, "retry_stats", retry_stats)
+
         return func_wrapper
 
     return decorator
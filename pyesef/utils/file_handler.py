@@ -1,18 +1,24 @@
 """File handlers."""
 
-import shutil
-import zipfile
+from collections.abc import Iterator
+import os
 
 
-def unzip_file(zip_file: str, extract_to: str) -> None:
-    """Unzip a ZIP file to the specified directory."""
-    with zipfile.ZipFile(zip_file, "r") as zip_ref:
-        zip_ref.extractall(extract_to)
+def scan_files(folder: str, file_ending: str) -> Iterator[os.DirEntry[str]]:
+    """
+    Yield the files with a file ending in a folder and its sub folders.
 
-
-def delete_folder(folder_path: str) -> None:
-    """Delete the specified folder and its contents."""
+    The folders are read with os.scandir, which doesn't stat each file, in name
+    order. A missing folder yields nothing.
+    """
     try:
-        shutil.rmtree(folder_path)
-    except Exception:
-        pass
+        with os.scandir(folder) as iterator:
+            entry_list = sorted(iterator, key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return
+
+    for entry in entry_list:
+        if entry.is_dir(follow_symlinks=False):
+            yield from scan_files(entry.path, file_ending=file_ending)
+        elif entry.name.endswith(file_ending):
+            yield entry
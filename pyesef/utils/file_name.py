@@ -0,0 +1,95 @@
+"""File name utils."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import json
+import os
+import re
+import zipfile
+
+# Report packages are usually named <LEI>-<period end>-<language>.zip
+PACKAGE_FILE_NAME_PATTERN = re.compile(
+    r"^(?P<lei>[0-9A-Z]{18}[0-9]{2})-(?P<period_end>\d{4}-\d{2}-\d{2})"
+)
+
+# The identity of a downloaded package is kept in a file next to it, named like the
+# package with this ending
+IDENTITY_FILE_ENDING = ".identity.json"
+
+
+@dataclass(frozen=True)
+class PackageFileName:
+    """Represent the identity of a filing read from a package file name."""
+
+    lei: str
+    period_end: str
+
+
+def parse_package_file_name(zip_file_path: str) -> PackageFileName | None:
+    """Return the LEI and period end of a package, or None if not in the name."""
+    match = PACKAGE_FILE_NAME_PATTERN.match(os.path.basename(zip_file_path))
+
+    if match is None:
+        return None
+
+    return PackageFileName(lei=match["lei"], period_end=match["period_end"])
+
+
+def get_identity_path(zip_file_path: str) -> str:
+    """Return the path of the file with the identity of a package."""
+    return f"{zip_file_path}{IDENTITY_FILE_ENDING}"
+
+
+def write_package_identity(
+    zip_file_path: str, package_file_name: PackageFileName
+) -> None:
+    """
+    Store the LEI and period end of a package next to it.
+
+    The downloader stores the identity listed in the API, so that an export reads
+    the same identity as the download, whatever the package is named.
+    """
+    with open(get_identity_path(zip_file_path), "w", encoding="UTF-8") as _file:
+        json.dump(asdict(package_file_name), _file)
+
+
+def _read_package_identity(zip_file_path: str) -> PackageFileName | None:
+    """Return the identity stored next to a package, or None if there is none."""
+    try:
+        with open(get_identity_path(zip_file_path), encoding="UTF-8") as _file:
+            identity = json.load(_file)
+        return PackageFileName(lei=identity["lei"], period_end=identity["period_end"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def read_package_file_name(zip_file_path: str) -> PackageFileName | None:
+    """
+    Return the LEI and period end of a package, without loading the filing.
+
+    The identity stored by the downloader is used first. If there is none, it is
+    read from the package file name, or else the names of the files in the zip are
+    searched, as the report folder and the report are usually named in the same
+    way. Only the zip directory is read.
+    """
+    package_file_name = _read_package_identity(zip_file_path)
+    if package_file_name is not None:
+        return package_file_name
+
+    package_file_name = parse_package_file_name(zip_file_path)
+    if package_file_name is not None:
+        return package_file_name
+
+    try:
+        with zipfile.ZipFile(zip_file_path) as zip_file:
+            name_list = zip_file.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+    for name in name_list:
+        for part in name.split("/"):
+            if (package_file_name := parse_package_file_name(part)) is not None:
+                return package_file_name
+
+    return None
@@ -0,0 +1,125 @@
+"""Filing filter utils."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+# Larger LEI sets make the request URL too long and are only filtered locally
+MAX_API_LEI_COUNT = 50
+
+
+def read_lei_file(path: str) -> frozenset[str]:
+    """
+    Read a file with one LEI per line.
+
+    Blank lines and lines starting with # are ignored.
+    """
+    with open(path, encoding="UTF-8") as _file:
+        return frozenset(
+            line.strip().upper()
+            for line in _file
+            if line.strip() and not line.lstrip().startswith("#")
+        )
+
+
+@dataclass(frozen=True)
+class FilingFilter:
+    """
+    Select filings by country, LEI and period end.
+
+    A field set to None does not filter. The period end range is inclusive, and
+    period ends are compared as dates.
+    """
+
+    country_set: frozenset[str] | None = None
+    lei_set: frozenset[str] | None = None
+    period_end_from: date | None = None
+    period_end_to: date | None = None
+
+    def includes_country(self, country_iso_2: str | None) -> bool:
+        """
+        Return True if filings from a country are selected.
+
+        An unknown country is not filtered on.
+        """
+        return (
+            self.country_set is None
+            or country_iso_2 is None
+            or country_iso_2 in self.country_set
+        )
+
+    def includes(
+        self, country_iso_2: str | None, lei: str, period_end: date | str
+    ) -> bool:
+        """
+        Return True if a filing is selected.
+
+        A period end given as a string must be an ISO date, else the filing is only
+        selected if the period end is not filtered on.
+        """
+        if not self.includes_country(country_iso_2):
+            return False
+
+        if self.lei_set is not None and lei not in self.lei_set:
+            return False
+
+        if self.period_end_from is None and self.period_end_to is None:
+            return True
+
+        if isinstance(period_end, str):
+            try:
+                period_end = date.fromisoformat(period_end)
+            except ValueError:
+                return False
+
+        if self.period_end_from is not None and period_end < self.period_end_from:
+            return False
+
+        if self.period_end_to is not None and period_end > self.period_end_to:
+            return False
+
+        return True
+
+    def to_api_filter_list(self) -> list[dict[str, Any]]:
+        """Return the filters in the JSON:API format of filings.xbrl.org."""
+        filter_list: list[dict[str, Any]] = []
+
+        if self.country_set is not None:
+            filter_list.append(
+                {"name": "country", "op": "in_", "val": sorted(self.country_set)}
+            )
+
+        if self.lei_set is not None and len(self.lei_set) <= MAX_API_LEI_COUNT:
+            filter_list.append(
+                {
+                    "name": "entity",
+                    "op": "has",
+                    "val": {
+                        "name": "identifier",
+                        "op": "in_",
+                        "val": sorted(self.lei_set),
+                    },
+                }
+            )
+
+        if self.period_end_from is not None:
+            filter_list.append(
+                {
+                    "name": "period_end",
+                    "op": "ge",
+                    "val": self.period_end_from.isoformat(),
+                }
+            )
+
+        if self.period_end_to is not None:
+            filter_list.append(
+                {
+                    "name": "period_end",
+                    "op": "le",
+                    "val": self.period_end_to.isoformat(),
+                }
+            )
+
+        return filter_list
@@ -0,0 +1,284 @@
+"""Live progress metrics."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import resource
+import threading
+import time
+
+from pyesef.log import LOGGER
+
+# Upper bounds in seconds of the buckets of the per-filing latency histogram
+LATENCY_BUCKET_LIST = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+DEFAULT_TEXTFILE_INTERVAL = 15.0
+
+METRIC_PREFIX = "pyesef"
+
+# The name, type and help of each metric family, without the prefix
+METRIC_FAMILY_LIST = (
+    ("filings_total", "counter", "Filings processed, by stage and status."),
+    ("filings_remaining", "gauge", "Filings left to process, by stage."),
+    ("items_total", "counter", "Facts exported or packages downloaded."),
+    ("items_per_second", "gauge", "Items processed per second since the start."),
+    ("bytes_total", "counter", "Bytes processed."),
+    ("bytes_per_second", "gauge", "Bytes processed per second since the start."),
+    ("eta_seconds", "gauge", "Estimated seconds left, from the mean latency."),
+    ("filing_latency_seconds", "histogram", "Seconds taken per filing."),
+    ("resident_memory_bytes", "gauge", "Resident memory of this process."),
+)
+
+
+def get_rss_bytes(pid: int | None = None) -> int:
+    """
+    Return the resident set size of a process, by default this process.
+
+    Where it can't be read, the peak is returned for this process and 0 for others.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", encoding="UTF-8") as _file:
+            return int(_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        if pid is not None:
+            return 0
+        # The peak is reported in kB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclass
+class StageMetrics:
+    """Counters of a stage of a run, eg download or export."""
+
+    name: str
+    start_time: float = field(default_factory=time.monotonic)
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    skipped: int = 0
+    # Facts for the export, packages for the download
+    item_count: int = 0
+    byte_count: int = 0
+    latency_sum: float = 0.0
+    latency_bucket_count_list: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKET_LIST) + 1)
+    )
+    lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def add_total(self, count: int) -> None:
+        """Add filings to be processed."""
+        with self.lock:
+            self.total += count
+
+    def add_bytes(self, count: int) -> None:
+        """Add processed bytes."""
+        with self.lock:
+            self.byte_count += count
+
+    def record(
+        self, duration: float, item_count: int = 0, failed: bool = False
+    ) -> None:
+        """Record a processed filing."""
+        with self.lock:
+            if failed:
+                self.failed += 1
+            else:
+                self.done += 1
+            self.item_count += item_count
+            self.latency_sum += duration
+            self.latency_bucket_count_list[
+                bisect_left(LATENCY_BUCKET_LIST, duration)
+            ] += 1
+
+    def record_skipped(self) -> None:
+        """Record a filing that didn't have to be processed."""
+        with self.lock:
+            self.skipped += 1
+
+    @property
+    def remaining(self) -> int:
+        """Return the number of filings left."""
+        return max(self.total - self.done - self.failed - self.skipped, 0)
+
+    @property
+    def eta(self) -> float | None:
+        """Return the estimated seconds left, from the mean latency so far."""
+        processed = self.done + self.failed
+        if processed == 0:
+            return None
+
+        return self.remaining * self.latency_sum / processed
+
+    def to_prometheus_sample_map(self) -> dict[str, list[str]]:
+        """Return the samples of the stage in the Prometheus text format, by family."""
+        elapsed_time = max(time.monotonic() - self.start_time, 1e-9)
+        label = f'stage="{self.name}"'
+
+        with self.lock:
+            sample_map = {
+                "filings_total": [
+                    f'{METRIC_PREFIX}_filings_total{{{label},status="done"}} '
+                    f"{self.done}",
+                    f'{METRIC_PREFIX}_filings_total{{{label},status="failed"}} '
+                    f"{self.failed}",
+                    f'{METRIC_PREFIX}_filings_total{{{label},status="skipped"}} '
+                    f"{self.skipped}",
+                ],
+                "filings_remaining": [
+                    f"{METRIC_PREFIX}_filings_remaining{{{label}}} {self.remaining}"
+                ],
+                "items_total": [
+                    f"{METRIC_PREFIX}_items_total{{{label}}} {self.item_count}"
+                ],
+                "items_per_second": [
+                    f"{METRIC_PREFIX}_items_per_second{{{label}}} "
+                    f"{self.item_count / elapsed_time:.3f}"
+                ],
+                "bytes_total": [
+                    f"{METRIC_PREFIX}_bytes_total{{{label}}} {self.byte_count}"
+                ],
+                "bytes_per_second": [
+                    f"{METRIC_PREFIX}_bytes_per_second{{{label}}} "
+                    f"{self.byte_count / elapsed_time:.3f}"
+                ],
+                "eta_seconds": [],
+                "filing_latency_seconds": [],
+            }
+
+            if (eta := self.eta) is not None:
+                sample_map["eta_seconds"].append(
+                    f"{METRIC_PREFIX}_eta_seconds{{{label}}} {eta:.1f}"
+                )
+
+            cumulative_count = 0
+            for upper_bound, count in zip(
+                (*LATENCY_BUCKET_LIST, "+Inf"),
+                self.latency_bucket_count_list,
+                strict=True,
+            ):
+                cumulative_count += count
+                sample_map["filing_latency_seconds"].append(
+                    f"{METRIC_PREFIX}_filing_latency_seconds_bucket"
+                    f'{{{label},le="{upper_bound}"}} {cumulative_count}'
+                )
+            sample_map["filing_latency_seconds"].extend(
+                [
+                    f"{METRIC_PREFIX}_filing_latency_seconds_sum{{{label}}} "
+                    f"{self.latency_sum:.3f}",
+                    f"{METRIC_PREFIX}_filing_latency_seconds_count{{{label}}} "
+                    f"{cumulative_count}",
+                ]
+            )
+
+        return sample_map
+
+
+class RunMetrics:
+    """Metrics of all stages of a run."""
+
+    def __init__(self) -> None:
+        """Init class."""
+        self.download = StageMetrics(name="download")
+        self.export = StageMetrics(name="export")
+
+    def to_prometheus_text(self) -> str:
+        """
+        Return all metrics in the Prometheus text format.
+
+        Each family is a block of its HELP and TYPE lines and the samples of all
+        stages, as the format doesn't allow the samples of a family to be split.
+        """
+        stage_sample_map_list = [
+            self.download.to_prometheus_sample_map(),
+            self.export.to_prometheus_sample_map(),
+        ]
+
+        line_list: list[str] = []
+        for name, metric_type, description in METRIC_FAMILY_LIST:
+            line_list.extend(
+                [
+                    f"# HELP {METRIC_PREFIX}_{name} {description}",
+                    f"# TYPE {METRIC_PREFIX}_{name} {metric_type}",
+                ]
+            )
+            for stage_sample_map in stage_sample_map_list:
+                line_list.extend(stage_sample_map.get(name, []))
+
+        line_list.append(f"{METRIC_PREFIX}_resident_memory_bytes {get_rss_bytes()}")
+        return "\n".join(line_list) + "\n"
+
+
+# The metrics of this process
+METRICS = RunMetrics()
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serve the metrics."""
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Return the metrics in the Prometheus text format."""
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+
+        body = METRICS.to_prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        """Don't log scrapes."""
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve the metrics on http://host:port/metrics from a background thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    LOGGER.info(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+    return server
+
+
+def write_metrics_textfile(path: str) -> None:
+    """Write the metrics to a file, replacing it atomically."""
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="UTF-8") as _file:
+        _file.write(METRICS.to_prometheus_text())
+    os.replace(temporary_path, path)
+
+
+def start_metrics_textfile_writer(
+    path: str, interval: float = DEFAULT_TEXTFILE_INTERVAL
+) -> Callable[[], None]:
+    """
+    Write the metrics to a file every interval seconds from a background thread.
+
+    The file can be read by the textfile collector of the Prometheus node exporter.
+    The returned function writes the file a last time and stops the thread.
+    """
+    stop_event = threading.Event()
+
+    def _write() -> None:
+        """Write the file until stopped."""
+        while not stop_event.wait(interval):
+            write_metrics_textfile(path)
+        write_metrics_textfile(path)
+
+    thread = threading.Thread(target=_write, name="metrics-textfile", daemon=True)
+    thread.start()
+
+    def _stop() -> None:
+        """Stop the thread after a last write."""
+        stop_event.set()
+        thread.join()
+
+    return _stop
@@ -0,0 +1,45 @@
+"""Shard utils."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+import os
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    A slice of all filings.
+
+    Each filing is assigned to a shard by a stable hash of its LEI and period end,
+    so that several nodes can work on disjoint slices without coordination.
+    """
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        """Validate the shard."""
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f"Invalid shard {self.index}/{self.count}")
+
+    @classmethod
+    def from_string(cls, value: str) -> Shard:
+        """Create a shard from a string like 0/4."""
+        index, _, count = value.partition("/")
+        return cls(index=int(index), count=int(count))
+
+    def _includes_key(self, key: str) -> bool:
+        """Return True if the key hashes to this shard."""
+        digest = hashlib.sha256(key.encode()).digest()
+        return int.from_bytes(digest[:8], "big") % self.count == self.index
+
+    def includes(self, lei: str, period_end: str) -> bool:
+        """Return True if a filing belongs to this shard."""
+        return self._includes_key(f"{lei}/{period_end}")
+
+    def apply_to_path(self, path: str) -> str:
+        """Return an output path unique to this shard."""
+        root, extension = os.path.splitext(path)
+        return f"{root}.shard-{self.index}-of-{self.count}{extension}"
@@ -0,0 +1,175 @@
+"""Wide-format matrix of facts."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from pyesef.parse_xbrl_file.fact_store import FactStore
+from pyesef.query import query_facts
+
+# The columns the entities, periods and items are read from
+ENTITY_COLUMN = "lei"
+PERIOD_COLUMN = "period_end"
+ITEM_COLUMN = "xml_name"
+
+
+@dataclass
+class WideMatrix:
+    """
+    Sparse entity by period by item matrix of facts.
+
+    Entities, periods and items are stored once, as sorted code dictionaries. Each
+    fact is a cell given by its three codes, with its value and the code of its
+    currency, so only the cells that hold a value take up space. The values are
+    floats, so that decimals are kept.
+    """
+
+    lei_list: npt.NDArray[np.str_]
+    period_end_list: npt.NDArray[np.str_]
+    item_list: npt.NDArray[np.str_]
+    currency_list: npt.NDArray[np.str_]
+
+    lei_code: npt.NDArray[np.int32]
+    period_end_code: npt.NDArray[np.int32]
+    item_code: npt.NDArray[np.int32]
+    currency_code: npt.NDArray[np.int32]
+    value: npt.NDArray[np.float64]
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        """Return the number of entities, periods and items."""
+        return len(self.lei_list), len(self.period_end_list), len(self.item_list)
+
+    def save(self, path: str) -> None:
+        """Save the matrix and its code dictionaries to an uncompressed .npz-file."""
+        np.savez(
+            path, **{field.name: getattr(self, field.name) for field in fields(self)}
+        )
+
+    @classmethod
+    def load(cls, path: str) -> WideMatrix:
+        """Load a matrix saved with save."""
+        with np.load(path, allow_pickle=False) as npz_file:
+            return cls(**{field.name: npz_file[field.name] for field in fields(cls)})
+
+    def cross_section(
+        self, period_end: date | str, item_list: list[str] | None = None
+    ) -> pd.DataFrame:
+        """
+        Return the values of one period, with a row per entity and a column per item.
+
+        Only entities and items with a value in the period are included, unless the
+        items are given. Cells without a value are NaN.
+        """
+        period_end_code = np.searchsorted(self.period_end_list, str(period_end))
+        if period_end_code == len(self.period_end_list) or self.period_end_list[
+            period_end_code
+        ] != str(period_end):
+            raise KeyError(f"No facts for the period {period_end}")
+
+        mask = self.period_end_code == period_end_code
+        if item_list is not None:
+            mask &= np.isin(
+                self.item_code, np.flatnonzero(np.isin(self.item_list, item_list))
+            )
+
+        # Number the entities and items of the period from 0
+        row_code_list, row_code = np.unique(self.lei_code[mask], return_inverse=True)
+        column_code_list, column_code = np.unique(
+            self.item_code[mask], return_inverse=True
+        )
+
+        data = np.full((len(row_code_list), len(column_code_list)), np.nan)
+        data[row_code, column_code] = self.value[mask]
+
+        df_cross_section = pd.DataFrame(
+            data,
+            index=pd.Index(self.lei_list[row_code_list], name=ENTITY_COLUMN),
+            columns=pd.Index(self.item_list[column_code_list], name=ITEM_COLUMN),
+        )
+
+        if item_list is not None:
+            df_cross_section = df_cross_section.reindex(columns=item_list)
+
+        return df_cross_section
+
+
+def _to_codes(series: pd.Series) -> tuple[npt.NDArray[np.str_], npt.NDArray[np.int32]]:
+    """Return the sorted categories of a column and the code of each row."""
+    categorical = pd.Categorical(series.astype(str))
+    return (
+        categorical.categories.to_numpy(dtype=str),
+        categorical.codes.astype(np.int32),
+    )
+
+
+def build_wide_matrix(df_facts: pd.DataFrame) -> WideMatrix:
+    """
+    Build a wide matrix from cleaned facts in long format.
+
+    Facts with a membership are left out, as they are a breakdown of the item
+    rather than its value, as are facts without a value. The items are the concepts
+    the facts are tagged with, as several concepts can share a wider anchor. If a
+    concept is stated with different values for an entity and period, eg in filings
+    that restate it, the median value is kept. The values of a compact frame are
+    scaled back by its value_scale.
+    """
+    df_cells = df_facts.dropna(subset=["value"])
+    if "membership" in df_cells.columns:
+        df_cells = df_cells[df_cells["membership"].isna()]
+
+    value = df_cells["value"].astype(np.float64)
+    if "value_scale" in df_facts.attrs:
+        value /= 10 ** df_facts.attrs["value_scale"]
+
+    df_cells = (
+        pd.DataFrame(
+            {
+                ENTITY_COLUMN: df_cells[ENTITY_COLUMN].astype(str),
+                PERIOD_COLUMN: pd.to_datetime(df_cells[PERIOD_COLUMN]).dt.strftime(
+                    "%Y-%m-%d"
+                ),
+                ITEM_COLUMN: df_cells[ITEM_COLUMN].astype(str),
+                "currency": df_cells["currency"].astype(object).fillna(""),
+                "value": value,
+            }
+        )
+        .groupby([ENTITY_COLUMN, PERIOD_COLUMN, ITEM_COLUMN], as_index=False)
+        .agg(value=("value", "median"), currency=("currency", "min"))
+    )
+
+    lei_list, lei_code = _to_codes(df_cells[ENTITY_COLUMN])
+    period_end_list, period_end_code = _to_codes(df_cells[PERIOD_COLUMN])
+    item_list, item_code = _to_codes(df_cells[ITEM_COLUMN])
+    currency_list, currency_code = _to_codes(df_cells["currency"])
+
+    return WideMatrix(
+        lei_list=lei_list,
+        period_end_list=period_end_list,
+        item_list=item_list,
+        currency_list=currency_list,
+        lei_code=lei_code,
+        period_end_code=period_end_code,
+        item_code=item_code,
+        currency_code=currency_code,
+        value=df_cells["value"].to_numpy(dtype=np.float64),
+    )
+
+
+def export_wide_matrix(
+    output_path: str, path: str = FactStore.PATH_FACT_STORE, **filters: Any
+) -> WideMatrix:
+    """
+    Export the facts of the fact store to a wide matrix .npz-file.
+
+    The filters are those of query_facts.
+    """
+    wide_matrix = build_wide_matrix(query_facts(path=path, **filters))
+    wide_matrix.save(output_path)
+    return wide_matrix
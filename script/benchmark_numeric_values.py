@@ -0,0 +1,59 @@
+"""
+Compare rounding numeric values one by one with rounding them in one pass.
+
+Run with: python script/benchmark_numeric_values.py [FACT_COUNT]
+"""
+
+import random
+import sys
+import timeit
+
+from pyesef.parse_xbrl_file.read_facts import (
+    round_numeric_value,
+    round_numeric_value_list,
+)
+
+DEFAULT_FACT_COUNT = 100_000
+REPEAT_COUNT = 5
+
+
+def main() -> None:
+    """Print the seconds per run of both ways on values like those of a filing."""
+    fact_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FACT_COUNT
+
+    random.seed(0)
+    value_list = [str(random.randint(-(10**10), 10**10)) for _ in range(fact_count)]
+    decimals_list: list[str | None] = [
+        random.choice(["0", "-3", "-6", "INF", None]) for _ in range(fact_count)
+    ]
+    precision_list: list[str | None] = [None] * fact_count
+
+    one_by_one = min(
+        timeit.repeat(
+            lambda: [
+                round_numeric_value(val, decimals, precision)
+                for val, decimals, precision in zip(
+                    value_list, decimals_list, precision_list
+                )
+            ],
+            number=1,
+            repeat=REPEAT_COUNT,
+        )
+    )
+    batched = min(
+        timeit.repeat(
+            lambda: round_numeric_value_list(value_list, decimals_list, precision_list),
+            number=1,
+            repeat=REPEAT_COUNT,
+        )
+    )
+
+    sys.stdout.write(
+        f"{fact_count} values\n"
+        f"round_numeric_value:      {one_by_one:.3f}s\n"
+        f"round_numeric_value_list: {batched:.3f}s ({one_by_one / batched:.1f}x)\n"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Fixtures shared by the tests."""
+
+from collections.abc import Iterator
+import os
+
+import pytest
+
+from pyesef.parse_xbrl_file.common import Controller, create_controller
+
+# The IFRS taxonomy that the report packages in tests/fixtures refer to, by URL
+PATH_TAXONOMY_CACHE = os.path.abspath(
+    os.path.join("tests", "fixtures", "taxonomy_cache")
+)
+
+
+@pytest.fixture
+def offline_cntlr() -> Iterator[Controller]:
+    """Return a controller that reads taxonomies from the fixtures, offline."""
+    cntlr = create_controller()
+    cntlr.webCache.cacheDir = PATH_TAXONOMY_CACHE
+    cntlr.webCache.workOffline = True
+    yield cntlr
+    cntlr.close()
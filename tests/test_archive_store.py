@@ -0,0 +1,72 @@
+"""Tests for the content-addressed archive store."""
+
+import hashlib
+import os
+from unittest.mock import patch
+
+from pyesef.download.archive_store import ArchiveStore
+
+
+def test_archive_store(tmp_path) -> None:
+    """Test that a package is stored once and linked to each of its paths."""
+    archive_store = ArchiveStore(
+        path=str(tmp_path / "archive_store.sqlite"),
+        content_folder=str(tmp_path / "content"),
+    )
+    content_hash = hashlib.sha256(b"zip").hexdigest()
+
+    for country_iso_2 in ["SE", "NO"]:
+        (tmp_path / country_iso_2).mkdir()
+        (tmp_path / "report.zip.part").write_bytes(b"zip")
+        assert (
+            archive_store.add(
+                str(tmp_path / "report.zip.part"),
+                write_location=str(tmp_path / country_iso_2 / "report.zip"),
+                country_iso_2=country_iso_2,
+                file_name="report.zip",
+            )
+            == content_hash
+        )
+        assert not (tmp_path / "report.zip.part").exists()
+
+    content_path = archive_store.get_content_path(content_hash)
+    assert content_path == str(
+        tmp_path / "content" / content_hash[:2] / f"{content_hash}.zip"
+    )
+    assert os.path.samefile(tmp_path / "SE" / "report.zip", content_path)
+    assert os.path.samefile(tmp_path / "NO" / "report.zip", content_path)
+    assert archive_store.get_content_hash("NO", "report.zip") == content_hash
+    assert archive_store.connection.execute(
+        "SELECT COUNT(*) FROM archive"
+    ).fetchone() == (1,)
+
+    # The stored package has been deleted
+    os.remove(content_path)
+    assert not archive_store.has_content(content_hash)
+
+    archive_store.close()
+
+
+def test_archive_store__no_hard_links(tmp_path) -> None:
+    """Test that the package is copied if it can't be linked."""
+    archive_store = ArchiveStore(
+        path=str(tmp_path / "archive_store.sqlite"),
+        content_folder=str(tmp_path / "content"),
+    )
+    (tmp_path / "report.zip.part").write_bytes(b"zip")
+
+    with patch("pyesef.download.archive_store.os.link", side_effect=OSError):
+        archive_store.add(
+            str(tmp_path / "report.zip.part"),
+            write_location=str(tmp_path / "report.zip"),
+            country_iso_2="SE",
+            file_name="report.zip",
+        )
+
+    assert (tmp_path / "report.zip").read_bytes() == b"zip"
+    assert not os.path.samefile(
+        tmp_path / "report.zip",
+        archive_store.get_content_path(hashlib.sha256(b"zip").hexdigest()),
+    )
+
+    archive_store.close()
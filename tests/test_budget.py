@@ -0,0 +1,97 @@
+"""Tests for running work within a budget."""
+
+import os
+import time
+
+import pytest
+
+from pyesef.error import PyEsefError
+from pyesef.utils.budget import BudgetExceededError, BudgetWorker, FilingBudget
+
+# The state of the worker process, set up by its initializer
+_WORKER_STATE: dict[str, int] = {}
+
+
+def _init_worker(value: int) -> None:
+    """Set up the state of the worker process."""
+    _WORKER_STATE["value"] = value
+
+
+def _multiply(factor: int) -> tuple[int, int]:
+    """Return the state of the worker times a factor, and the process id."""
+    return _WORKER_STATE["value"] * factor, os.getpid()
+
+
+def _fail() -> None:
+    """Raise an error."""
+    raise ValueError("Broken package")
+
+
+def _sleep() -> None:
+    """Sleep for longer than the budget."""
+    time.sleep(30)
+
+
+def _allocate() -> None:
+    """Use more memory than the budget."""
+    data = bytearray(200 * 1024 * 1024)
+    time.sleep(30)
+    del data
+
+
+def test_budget_worker() -> None:
+    """Test that the worker is set up once and kept between calls."""
+    budget_worker = BudgetWorker(initializer=_init_worker, initargs=(21,))
+
+    value, pid = budget_worker.run(_multiply, 2, budget=FilingBudget())
+    assert value == 42
+    assert pid != os.getpid()
+    assert budget_worker.run(_multiply, 3, budget=FilingBudget()) == (63, pid)
+
+    budget_worker.close()
+    assert budget_worker.pid is None
+
+
+def test_budget_worker__error() -> None:
+    """Test that an error in the worker is raised, and the worker is kept."""
+    budget_worker = BudgetWorker(initializer=_init_worker, initargs=(21,))
+
+    with pytest.raises(PyEsefError, match="ValueError: Broken package"):
+        budget_worker.run(_fail, budget=FilingBudget())
+
+    pid = budget_worker.pid
+    assert budget_worker.run(_multiply, 2, budget=FilingBudget()) == (42, pid)
+
+    budget_worker.close()
+
+
+def test_budget_worker__time_limit() -> None:
+    """Test that a worker is killed when it runs for too long, and restarted."""
+    budget_worker = BudgetWorker(initializer=_init_worker, initargs=(21,))
+    _, pid = budget_worker.run(_multiply, 2, budget=FilingBudget())
+    start_time = time.monotonic()
+
+    with pytest.raises(BudgetExceededError, match="time budget of 0.5s"):
+        budget_worker.run(_sleep, budget=FilingBudget(time_limit=0.5))
+
+    assert time.monotonic() - start_time < 10
+    assert budget_worker.pid is None
+
+    value, new_pid = budget_worker.run(_multiply, 2, budget=FilingBudget())
+    assert value == 42
+    assert new_pid != pid
+
+    budget_worker.close()
+
+
+def test_budget_worker__memory_limit() -> None:
+    """Test that a worker is killed when it uses too much memory."""
+    budget_worker = BudgetWorker()
+
+    with pytest.raises(BudgetExceededError, match="memory budget"):
+        budget_worker.run(
+            _allocate,
+            budget=FilingBudget(time_limit=20, memory_limit=100 * 1024 * 1024),
+        )
+
+    budget_worker.close()
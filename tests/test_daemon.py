@@ -0,0 +1,54 @@
+"""Tests for the daemon."""
+
+import json
+import os
+import socket
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from pyesef.daemon import ParseDaemon
+
+
+@patch("pyesef.daemon.create_controller", MagicMock())
+def test_find_new_files(tmp_path) -> None:
+    """Test that the watcher only returns new and changed files."""
+    (tmp_path / "SE").mkdir()
+    zip_file_path = tmp_path / "SE" / "filing.zip"
+    zip_file_path.write_bytes(b"zip")
+    (tmp_path / "SE" / "notes.txt").write_bytes(b"txt")
+
+    daemon = ParseDaemon(socket_path=None, watch_folder=str(tmp_path))
+    assert daemon.find_new_files() == [str(zip_file_path)]
+    assert not daemon.find_new_files()
+
+    zip_file_path.write_bytes(b"changed zip")
+    assert daemon.find_new_files() == [str(zip_file_path)]
+
+
+@patch("pyesef.daemon.create_controller", MagicMock())
+def test_socket_job(tmp_path) -> None:
+    """Test that a job sent to the socket is parsed and answered."""
+    socket_path = str(tmp_path / "pyesef.sock")
+    daemon = ParseDaemon(socket_path=socket_path, watch_folder=None)
+
+    with (
+        patch.object(daemon, "parse", return_value={"status": "done"}) as mock_parse,
+        patch.object(daemon, "watch"),
+    ):
+        run_thread = threading.Thread(target=daemon.run, daemon=True)
+        run_thread.start()
+
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.01)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(json.dumps({"zip_file_path": "SE/filing.zip"}).encode())
+            client.sendall(b"\n")
+            response = json.loads(client.makefile().readline())
+
+    assert response == {"status": "done"}
+    mock_parse.assert_called_once_with(zip_file_path=os.path.abspath("SE/filing.zip"))
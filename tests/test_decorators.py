@@ -0,0 +1,100 @@
+"""Tests for decorators."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from pyesef.utils.decorators import get_retry_after, get_retry_stats, retry
+
+
+def _get_http_error(status_code: int, headers: dict[str, str]) -> requests.HTTPError:
+    """Return an HTTP error like the one raised by raise_for_status."""
+    return requests.HTTPError(
+        response=Mock(status_code=status_code, headers=headers),
+    )
+
+
+@patch("pyesef.utils.decorators.sleep")
+def test_retry__backoff(mock_sleep) -> None:
+    """Test that the sleep time grows exponentially up to a maximum."""
+    func = Mock(side_effect=[ValueError, ValueError, ValueError, "ok"])
+    decorated_func = retry(num_attempts=4, sleeptime=1, backoff=2, max_sleeptime=3)(
+        func
+    )
+
+    assert decorated_func() == "ok"
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [1, 2, 3]
+
+    retry_stats = get_retry_stats(decorated_func)
+    assert retry_stats.calls == 1
+    assert retry_stats.retries == 3
+    assert retry_stats.sleep_time == 6
+    assert retry_stats.failures == 0
+
+
+@patch("pyesef.utils.decorators.sleep")
+def test_retry__jitter(mock_sleep) -> None:
+    """Test that jitter never sleeps longer than the backoff."""
+    func = Mock(side_effect=[ValueError] * 5 + ["ok"])
+    decorated_func = retry(num_attempts=6, sleeptime=1, backoff=2, jitter=True)(func)
+
+    assert decorated_func() == "ok"
+    for idx, call in enumerate(mock_sleep.call_args_list):
+        assert 0 <= call.args[0] <= 2**idx
+
+
+@patch("pyesef.utils.decorators.sleep")
+def test_retry__status_code(mock_sleep) -> None:
+    """Test that only the chosen status codes are retried."""
+    func = Mock(
+        side_effect=[
+            _get_http_error(503, {"Retry-After": "7"}),
+            _get_http_error(404, {}),
+        ]
+    )
+    decorated_func = retry(
+        exc=requests.RequestException, retry_on_status={503}, sleeptime=1
+    )(func)
+
+    with pytest.raises(requests.HTTPError):
+        decorated_func()
+
+    # Retry-After is honoured and 404 is not retried
+    mock_sleep.assert_called_once_with(7.0)
+    assert func.call_count == 2
+    assert get_retry_stats(decorated_func).failures == 1
+
+
+def test_retry__max_total_time() -> None:
+    """Test that no retry is made beyond the time budget."""
+    clock = [0.0]
+
+    def _sleep(sleep_time: float) -> None:
+        clock[0] += sleep_time
+
+    func = Mock(side_effect=ValueError)
+    decorated_func = retry(num_attempts=10, sleeptime=5, max_total_time=12)(func)
+
+    with (
+        patch("pyesef.utils.decorators.sleep", side_effect=_sleep) as mock_sleep,
+        patch("pyesef.utils.decorators.monotonic", side_effect=lambda: clock[0]),
+        pytest.raises(ValueError),
+    ):
+        decorated_func()
+
+    assert mock_sleep.call_count == 2
+    assert func.call_count == 3
+
+
+def test_get_retry_after() -> None:
+    """Test function get_retry_after."""
+    assert get_retry_after(_get_http_error(429, {"Retry-After": "120"})) == 120
+    assert get_retry_after(_get_http_error(429, {"Retry-After": "soon"})) is None
+    assert (
+        get_retry_after(
+            _get_http_error(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        )
+        == 0
+    )
+    assert get_retry_after(ValueError()) is None
@@ -1,11 +1,40 @@
 """Tests for the download package."""
 
-from unittest.mock import patch
+from datetime import date
+import hashlib
+import io
+import json
+import os
+from typing import Any
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlparse
+import zipfile
 
-from pyesef.download.api_extractor import api_to_filing_record_list
+import requests
 
+from pyesef.download import download_packages
+from pyesef.download.api_extractor import (
+    API_URL,
+    PAGE_SIZE,
+    api_to_filing_record_list,
+    get_next_page_url,
+    get_page_url,
+)
+from pyesef.download.archive_store import ArchiveStore
+from pyesef.download.common import Filing
+from pyesef.download.http_cache import HttpCache
+from pyesef.download.telemetry import (
+    DownloadOutcome,
+    DownloadRecord,
+    DownloadTelemetry,
+    summarize_downloads,
+)
+from pyesef.utils.file_name import PackageFileName, read_package_file_name
+from pyesef.utils.filing_filter import FilingFilter
+from pyesef.utils.metrics import RunMetrics
 
-def test_api_to_filing_record_list() -> None:
+
+def test_api_to_filing_record_list(tmp_path) -> None:
     """Test function api_to_filing_record_list."""
     with patch("urllib.request.urlopen") as mock_url:
         with open("tests/fixtures/api_page.json", "rb") as _file:
@@ -14,5 +43,297 @@ def test_api_to_filing_record_list() -> None:
                 _file.read()
             )
 
-            x = api_to_filing_record_list()
+            x = api_to_filing_record_list(
+                http_cache=HttpCache(cache_folder=str(tmp_path))
+            )
             assert len(x) == 2
+
+
+def test_api_to_filing_record_list__filing_filter(tmp_path) -> None:
+    """Test that the filing filter is sent to the API and applied to the result."""
+    filing_filter = FilingFilter(
+        country_set=frozenset({"SE", "PL"}),
+        lei_set=frozenset({"549300CSLHPO6Y1AZN37"}),
+        period_end_from=date(2021, 1, 1),
+    )
+
+    with patch("urllib.request.urlopen") as mock_url:
+        with open("tests/fixtures/api_page.json", "rb") as _file:
+            mock_url.return_value.__enter__.return_value.read.return_value = (
+                _file.read()
+            )
+
+            x = api_to_filing_record_list(
+                http_cache=HttpCache(cache_folder=str(tmp_path)),
+                filing_filter=filing_filter,
+            )
+
+        request = mock_url.call_args_list[0].args[0]
+
+    assert [filing.lei for filing in x] == ["549300CSLHPO6Y1AZN37"]
+    assert json.loads(parse_qs(urlparse(request.full_url).query)["filter"][0]) == (
+        filing_filter.to_api_filter_list()
+    )
+
+
+def _api_page(lei_list: list[str], next_url: str | None = None) -> dict[str, Any]:
+    """Return a page of the API with a filing for each LEI."""
+    return {
+        "data": [
+            {
+                "attributes": {
+                    "country": "SE",
+                    "period_end": "2023-12-31",
+                    "package_url": f"/{lei}/{lei}-2023-12-31-sv.zip",
+                },
+                "relationships": {
+                    "entity": {"links": {"related": f"/api/entities/{lei}"}}
+                },
+            }
+            for lei in lei_list
+        ],
+        "links": {} if next_url is None else {"next": next_url},
+    }
+
+
+def test_api_to_filing_record_list__paging() -> None:
+    """Test that the next link is followed, whatever the count of the first page."""
+    filing_filter = FilingFilter(country_set=frozenset({"SE"}))
+    filter_list = filing_filter.to_api_filter_list()
+    page_map = {
+        get_page_url(filter_list, 0): _api_page(
+            ["lei0", "lei1"], next_url="/api/filings?page=2"
+        ),
+        f"{API_URL}?page=2": _api_page(["lei2"], next_url=f"{API_URL}?page=3"),
+        f"{API_URL}?page=3": _api_page(["lei3"]),
+    }
+    http_cache = MagicMock()
+    http_cache.get.side_effect = lambda url: json.dumps(page_map[url]).encode()
+
+    filing_list = api_to_filing_record_list(
+        http_cache=http_cache, filing_filter=filing_filter
+    )
+
+    assert [filing.lei for filing in filing_list] == ["lei0", "lei1", "lei2", "lei3"]
+
+
+def test_get_next_page_url() -> None:
+    """Test that pages without links are numbered until a page is short."""
+    full_page = _api_page([f"lei{idx}" for idx in range(PAGE_SIZE)])
+    del full_page["links"]
+
+    assert get_next_page_url(full_page, filter_list=[], page_no=1) == get_page_url(
+        [], 1
+    )
+    assert get_next_page_url(_api_page(["lei0"]), filter_list=[], page_no=1) is None
+    assert get_next_page_url({"data": [{}]}, filter_list=[], page_no=1) is None
+
+
+class _Response(requests.Response):
+    """A streamed response of requests."""
+
+    def __init__(self, content: bytes, status_code: int = 200) -> None:
+        super().__init__()
+        self.raw = io.BytesIO(content)
+        self.status_code = status_code
+
+
+class _BrokenStream(io.BytesIO):
+    """A stream that breaks after the first chunk."""
+
+    def read(self, size: int | None = -1) -> bytes:
+        """Return the first chunk, then raise a connection error."""
+        if self.tell():
+            raise requests.ConnectionError("Connection reset")
+        return super().read(size)
+
+
+def _zip_content() -> bytes:
+    """Return the bytes of a zip-file."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("report.xhtml", "x" * 5000)
+    return buffer.getvalue()
+
+
+def test_download_packages__telemetry(tmp_path) -> None:
+    """Test that each download is written to the download log."""
+    filing_list = [
+        Filing(
+            lei=f"lei{idx}",
+            period_end="2023-12-31",
+            country_iso_2="NO",
+            package_url=f"lei{idx}/report-{idx}.zip",
+        )
+        for idx in range(3)
+    ]
+    # The content and status code of each package
+    response_map = {
+        filing_list[0].file_url: (_zip_content(), 200),
+        filing_list[1].file_url: (b"not a zip", 200),
+        filing_list[2].file_url: (b"", 404),
+    }
+
+    path = str(tmp_path / "download_log.jsonl")
+    telemetry = DownloadTelemetry(path=path)
+    archive_store = ArchiveStore(
+        path=str(tmp_path / "archive_store.sqlite"),
+        content_folder=str(tmp_path / "content"),
+    )
+    with (
+        patch("pyesef.download.common.PATH_ARCHIVES", str(tmp_path)),
+        patch("pyesef.download.METRICS", RunMetrics()),
+        patch("pyesef.download.api_to_filing_record_list", return_value=filing_list),
+        patch(
+            "pyesef.download.requests.get",
+            side_effect=lambda url, **kwargs: _Response(*response_map[url]),
+        ),
+    ):
+        download_packages(telemetry=telemetry, archive_store=archive_store)
+        # The package is stored now, so it isn't downloaded again
+        download_packages(telemetry=telemetry, archive_store=archive_store)
+    telemetry.close()
+    archive_store.close()
+
+    with open(path, encoding="UTF-8") as log_file:
+        line_list = [json.loads(line) for line in log_file]
+
+    assert [line["outcome"] for line in line_list] == [
+        DownloadOutcome.DOWNLOADED,
+        DownloadOutcome.INVALID,
+        DownloadOutcome.FAILED,
+        DownloadOutcome.EXISTING,
+        DownloadOutcome.INVALID,
+        DownloadOutcome.FAILED,
+    ]
+    assert line_list[0]["byte_count"] == len(_zip_content())
+    assert line_list[0]["status_code"] == 200
+    assert line_list[0]["throughput"] > 0
+    assert line_list[2]["status_code"] == 404
+    assert line_list[2]["retry_count"] == 0
+
+    # The package isn't named by its LEI, so its identity is stored next to it
+    with patch("pyesef.download.common.PATH_ARCHIVES", str(tmp_path)):
+        write_location = filing_list[0].write_location
+    assert read_package_file_name(write_location) == PackageFileName(
+        lei="lei0", period_end="2023-12-31"
+    )
+
+
+@patch("pyesef.utils.decorators.sleep")
+def test_download_packages__broken_stream(_mock_sleep, tmp_path) -> None:
+    """Test that a download that breaks leaves no partial file or open response."""
+    filing = Filing(
+        lei="lei0",
+        period_end="2023-12-31",
+        country_iso_2="DK",
+        package_url="lei0/report.zip",
+    )
+    response_list: list[_Response] = []
+
+    def _get(_url, **_kwargs) -> _Response:
+        response = _Response(b"")
+        response.raw = _BrokenStream(_zip_content())
+        response_list.append(response)
+        return response
+
+    telemetry = DownloadTelemetry(path=str(tmp_path / "download_log.jsonl"))
+    archive_store = ArchiveStore(
+        path=str(tmp_path / "archive_store.sqlite"),
+        content_folder=str(tmp_path / "content"),
+    )
+    with (
+        patch("pyesef.download.common.PATH_ARCHIVES", str(tmp_path)),
+        patch("pyesef.download.METRICS", RunMetrics()),
+        patch("pyesef.download.api_to_filing_record_list", return_value=[filing]),
+        patch("pyesef.download.requests.get", side_effect=_get),
+    ):
+        download_packages(telemetry=telemetry, archive_store=archive_store)
+    telemetry.close()
+    archive_store.close()
+
+    assert len(response_list) > 1
+    assert all(response.raw.closed for response in response_list)
+    assert not os.listdir(tmp_path / "DK")
+
+
+def test_summarize_downloads() -> None:
+    """Test the summary of the downloads of a run."""
+    record_list = [
+        DownloadRecord(
+            file_url=f"{idx}.zip",
+            outcome=DownloadOutcome.DOWNLOADED,
+            byte_count=1000,
+            duration=float(idx),
+            transfer_duration=0.5,
+        )
+        for idx in range(1, 21)
+    ]
+    record_list.append(
+        DownloadRecord(file_url="a.zip", outcome=DownloadOutcome.EXISTING)
+    )
+    record_list.append(DownloadRecord(file_url="b.zip", outcome=DownloadOutcome.FAILED))
+
+    download_summary = summarize_downloads(record_list, slowest_count=2)
+
+    assert download_summary.download_count == 20
+    assert download_summary.existing_count == 1
+    assert download_summary.failed_count == 1
+    assert download_summary.byte_count == 20000
+    assert download_summary.throughput == 2000
+    assert download_summary.p50_duration == 10
+    assert download_summary.p95_duration == 19
+    assert [record.file_url for record in download_summary.slowest_list] == [
+        "20.zip",
+        "19.zip",
+    ]
+
+    assert summarize_downloads([]).p95_duration == 0
+
+
+def test_download_packages__archive_store(tmp_path) -> None:
+    """Test that a package listed under several paths is downloaded once."""
+    content = _zip_content()
+    content_hash = hashlib.sha256(content).hexdigest()
+    filing_list = [
+        Filing(
+            lei="lei",
+            period_end="2023-12-31",
+            country_iso_2=country_iso_2,
+            package_url=f"lei/{country_iso_2}/report.zip",
+            sha256=content_hash,
+        )
+        for country_iso_2 in ["SE", "FI"]
+    ]
+
+    telemetry = DownloadTelemetry(path=str(tmp_path / "download_log.jsonl"))
+    archive_store = ArchiveStore(
+        path=str(tmp_path / "archive_store.sqlite"),
+        content_folder=str(tmp_path / "content"),
+    )
+    with (
+        patch("pyesef.download.common.PATH_ARCHIVES", str(tmp_path / "archives")),
+        patch("pyesef.download.METRICS", RunMetrics()),
+        patch("pyesef.download.api_to_filing_record_list", return_value=filing_list),
+        patch(
+            "pyesef.download.requests.get", return_value=_Response(content)
+        ) as mock_get,
+    ):
+        download_packages(telemetry=telemetry, archive_store=archive_store)
+        write_location_list = [filing.write_location for filing in filing_list]
+
+    assert mock_get.call_count == 1
+
+    content_path = archive_store.get_content_path(content_hash)
+    assert archive_store.has_content(content_hash)
+    for write_location in write_location_list:
+        assert os.path.samefile(write_location, content_path)
+    for filing in filing_list:
+        assert (
+            archive_store.get_content_hash(filing.country_iso_2, filing.file_name)
+            == content_hash
+        )
+
+    assert archive_store.get_content_hash("NO", "report.zip") is None
+    telemetry.close()
+    archive_store.close()
@@ -0,0 +1,116 @@
+"""Tests for the entrypoint index."""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+import zipfile
+
+from pyesef.parse_xbrl_file.common import load_model_xbrl
+from pyesef.parse_xbrl_file.entrypoint_index import (
+    EntrypointIndex,
+    build_entrypoint_index,
+)
+from pyesef.parse_xbrl_file.ledger import get_content_hash
+from pyesef.utils.shard import Shard
+
+ENTRYPOINT = {
+    "file": (
+        "/archives/SE/filing.zip/filing/reports/_IXDS#?#"
+        "/archives/SE/filing.zip/filing/reports/filing.xhtml"
+    ),
+    "ixds": [{"file": "/archives/SE/filing.zip/filing/reports/filing.xhtml"}],
+}
+
+
+def test_entrypoint_index(tmp_path) -> None:
+    """Test that an entrypoint is found wherever the zip-file is."""
+    entrypoint_index = EntrypointIndex(path=str(tmp_path / "index.sqlite"))
+
+    assert entrypoint_index.get("abc", zip_file_path="/archives/SE/filing.zip") is None
+
+    entrypoint_index.put(
+        content_hash="abc",
+        zip_file_path="/archives/SE/filing.zip",
+        entrypoint=ENTRYPOINT,
+    )
+
+    assert entrypoint_index.get("abc", zip_file_path="/archives/SE/filing.zip") == (
+        ENTRYPOINT
+    )
+    assert entrypoint_index.get("abc", zip_file_path="/parsed/SE/filing.zip") == {
+        "file": (
+            "/parsed/SE/filing.zip/filing/reports/_IXDS#?#"
+            "/parsed/SE/filing.zip/filing/reports/filing.xhtml"
+        ),
+        "ixds": [{"file": "/parsed/SE/filing.zip/filing/reports/filing.xhtml"}],
+    }
+    assert entrypoint_index.get_content_hash_set() == {"abc"}
+
+    entrypoint_index.close()
+
+
+@patch("pyesef.parse_xbrl_file.common.FileSourceFile", MagicMock())
+def test_load_model_xbrl__entrypoint_index(tmp_path) -> None:
+    """Test that a package is only scanned for its entrypoint once."""
+    entrypoint_index = EntrypointIndex(path=str(tmp_path / "index.sqlite"))
+    cntlr = MagicMock()
+
+    with patch(
+        "pyesef.parse_xbrl_file.common.find_entrypoint", return_value=ENTRYPOINT
+    ) as mock_find_entrypoint:
+        for _ in range(2):
+            load_model_xbrl(
+                zip_file_path="/archives/SE/filing.zip",
+                cntlr=cntlr,
+                entrypoint_index=entrypoint_index,
+                content_hash="abc",
+            )
+
+    mock_find_entrypoint.assert_called_once()
+    assert cntlr.entrypointFile == ENTRYPOINT["file"]
+    cntlr.modelManager.load.assert_called_with(
+        cntlr.modelManager.load.call_args.args[0], "Loading", entrypoint=ENTRYPOINT
+    )
+
+    entrypoint_index.close()
+
+
+class _ThreadPoolExecutor(ThreadPoolExecutor):
+    """Run the workers in threads, so that the patches apply to them."""
+
+    def __init__(self, max_workers, mp_context, initializer) -> None:
+        """Init class."""
+        assert mp_context.get_start_method() == "spawn"
+        super().__init__(max_workers=max_workers, initializer=initializer)
+
+
+@patch(
+    "pyesef.parse_xbrl_file.entrypoint_index.ProcessPoolExecutor", _ThreadPoolExecutor
+)
+@patch("pyesef.parse_xbrl_file.entrypoint_index._init_worker", lambda: None)
+@patch(
+    "pyesef.parse_xbrl_file.entrypoint_index._find_entrypoint",
+    lambda zip_file_path: ENTRYPOINT,
+)
+def test_build_entrypoint_index__shard(tmp_path) -> None:
+    """Test that only the packages of the shard are indexed."""
+    shard = Shard(index=0, count=2)
+    filing_folder = tmp_path / "archives" / "SE"
+    filing_folder.mkdir(parents=True)
+
+    shard_hash_set = set()
+    for year in range(2020, 2024):
+        zip_file_path = str(filing_folder / f"549300XMDXXUY4X8VP21-{year}-12-31.zip")
+        with zipfile.ZipFile(zip_file_path, "w") as zip_file:
+            zip_file.writestr("report.xhtml", str(year))
+        if shard.includes(lei="549300XMDXXUY4X8VP21", period_end=f"{year}-12-31"):
+            shard_hash_set.add(get_content_hash(zip_file_path))
+
+    path = str(tmp_path / "index.sqlite")
+    build_entrypoint_index(
+        filing_folder=str(tmp_path / "archives"), path=path, shard=shard
+    )
+
+    entrypoint_index = EntrypointIndex(path=path)
+    assert 0 < len(shard_hash_set) < 4
+    assert entrypoint_index.get_content_hash_set() == shard_hash_set
+    entrypoint_index.close()
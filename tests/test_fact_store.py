@@ -0,0 +1,159 @@
+"""Tests for the fact store."""
+
+from datetime import date
+
+import pandas as pd
+
+from pyesef.parse_xbrl_file.common import EsefData
+from pyesef.parse_xbrl_file.fact_store import FactStore
+from pyesef.parse_xbrl_file.read_and_save_filings import data_list_to_clean_df
+
+
+def _get_df(value: int, membership: str | None = None) -> pd.DataFrame:
+    """Return a cleaned dataframe with one fact."""
+    return data_list_to_clean_df(
+        data_list=[
+            EsefData(
+                period_end=date(2023, 12, 31),
+                lei="lei123",
+                wider_anchor_or_xml_name="Revenue",
+                xml_name="Revenue",
+                value=value,
+                wider_anchor=None,
+                membership=membership,
+                label=None,
+                currency="SEK",
+                is_company_defined=False,
+                level_1="IncomeStatement",
+            ),
+        ]
+    )
+
+
+def test_fact_store_upsert__newest_filing_wins(tmp_path) -> None:
+    """Test that a newer filing replaces the value and keeps history."""
+    fact_store = FactStore(path=str(tmp_path / "output.sqlite"))
+
+    fact_store.upsert(_get_df(value=100), zip_file_path="original.zip", filed_at=1)
+    fact_store.upsert(_get_df(value=200), zip_file_path="restated.zip", filed_at=2)
+
+    df_current = fact_store.to_df()
+    assert len(df_current) == 1
+    assert df_current.loc[0, "value"] == 200
+    assert df_current.loc[0, "filing"] == "restated.zip"
+
+    df_history = fact_store.history_to_df()
+    assert len(df_history) == 1
+    assert df_history.loc[0, "value"] == 100
+    assert df_history.loc[0, "superseded_by_filing"] == "restated.zip"
+
+    fact_store.close()
+
+
+def test_fact_store_upsert__older_filing_goes_to_history(tmp_path) -> None:
+    """Test that an older filing loaded late does not replace the value."""
+    fact_store = FactStore(path=str(tmp_path / "output.sqlite"))
+
+    fact_store.upsert(_get_df(value=200), zip_file_path="restated.zip", filed_at=2)
+    fact_store.upsert(_get_df(value=100), zip_file_path="original.zip", filed_at=1)
+
+    df_current = fact_store.to_df()
+    assert len(df_current) == 1
+    assert df_current.loc[0, "value"] == 200
+
+    df_history = fact_store.history_to_df()
+    assert len(df_history) == 1
+    assert df_history.loc[0, "filing"] == "original.zip"
+
+    fact_store.close()
+
+
+def test_fact_store_upsert__period_end_before_filed_at(tmp_path) -> None:
+    """Test that an earlier report downloaded late does not replace a later one."""
+    fact_store = FactStore(path=str(tmp_path / "output.sqlite"))
+
+    fact_store.upsert(
+        _get_df(value=200),
+        zip_file_path="lei123-2024-12-31.zip",
+        period_end="2024-12-31",
+        filed_at=1,
+    )
+    fact_store.upsert(
+        _get_df(value=100),
+        zip_file_path="lei123-2023-12-31.zip",
+        period_end="2023-12-31",
+        filed_at=2,
+    )
+
+    df_current = fact_store.to_df()
+    assert df_current.loc[0, "value"] == 200
+    assert df_current.loc[0, "filing"] == "lei123-2024-12-31.zip"
+    assert fact_store.history_to_df().loc[0, "filing"] == "lei123-2023-12-31.zip"
+
+    fact_store.close()
+
+
+def test_fact_store_upsert__same_file_name_in_two_countries(tmp_path) -> None:
+    """Test that packages with the same name in two countries are two filings."""
+    fact_store = FactStore(path=str(tmp_path / "output.sqlite"))
+
+    for country in ("SE", "NO"):
+        fact_store.upsert(
+            _get_df(value=100),
+            zip_file_path=str(tmp_path / country / "report.zip"),
+            country=country,
+            filed_at=1,
+        )
+
+    filing_list = fact_store.connection.execute(
+        "SELECT country, zip_file_path FROM filing ORDER BY id"
+    ).fetchall()
+    assert filing_list == [
+        ("SE", str(tmp_path / "SE" / "report.zip")),
+        ("NO", str(tmp_path / "NO" / "report.zip")),
+    ]
+
+    fact_store.close()
+
+
+def test_fact_store_upsert__idempotent(tmp_path) -> None:
+    """Test that saving the same filing twice does not create history."""
+    fact_store = FactStore(path=str(tmp_path / "output.sqlite"))
+
+    for _ in range(2):
+        fact_store.upsert(_get_df(value=100), zip_file_path="original.zip", filed_at=1)
+        fact_store.upsert(
+            _get_df(value=5, membership="SegmentMember"),
+            zip_file_path="original.zip",
+            filed_at=1,
+        )
+
+    assert len(fact_store.to_df()) == 2
+    assert fact_store.history_to_df().empty
+
+    fact_store.close()
+
+
+def test_fact_store_upsert__filing_and_indexes(tmp_path) -> None:
+    """Test that facts link to their zip-file and point queries use an index."""
+    fact_store = FactStore(path=str(tmp_path / "output.sqlite"))
+
+    fact_store.upsert(
+        _get_df(value=100),
+        zip_file_path=str(tmp_path / "SE" / "original.zip"),
+        country="SE",
+        filed_at=1,
+    )
+
+    filing_list = fact_store.connection.execute(
+        "SELECT file_name, country FROM filing"
+    ).fetchall()
+    assert filing_list == [("original.zip", "SE")]
+
+    query_plan = fact_store.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM fact WHERE lei = ? AND level_1 = ?",
+        ("lei123", "CashFlow"),
+    ).fetchall()
+    assert "USING INDEX ix_fact_lei" in query_plan[0][-1]
+
+    fact_store.close()
@@ -0,0 +1,62 @@
+"""Tests for filing filters."""
+
+from datetime import date
+
+from pyesef.utils.filing_filter import MAX_API_LEI_COUNT, FilingFilter, read_lei_file
+
+
+def test_read_lei_file(tmp_path) -> None:
+    """Test function read_lei_file."""
+    lei_file_path = tmp_path / "lei.txt"
+    lei_file_path.write_text(
+        "# Portfolio\n549300xmdxxuy4x8vp21\n\n  5967007LIEEXZXHW3S18  \n",
+        encoding="UTF-8",
+    )
+
+    assert read_lei_file(str(lei_file_path)) == {
+        "549300XMDXXUY4X8VP21",
+        "5967007LIEEXZXHW3S18",
+    }
+
+
+def test_filing_filter_includes() -> None:
+    """Test selecting filings."""
+    filing_filter = FilingFilter(
+        country_set=frozenset({"SE"}),
+        lei_set=frozenset({"549300XMDXXUY4X8VP21"}),
+        period_end_from=date(2021, 1, 1),
+        period_end_to=date(2022, 12, 31),
+    )
+
+    assert filing_filter.includes("SE", "549300XMDXXUY4X8VP21", "2022-12-31")
+    # An unknown country is not filtered on
+    assert filing_filter.includes(None, "549300XMDXXUY4X8VP21", "2021-01-01")
+    assert not filing_filter.includes("NO", "549300XMDXXUY4X8VP21", "2022-12-31")
+    assert not filing_filter.includes("SE", "5967007LIEEXZXHW3S18", "2022-12-31")
+    assert not filing_filter.includes("SE", "549300XMDXXUY4X8VP21", "2020-12-31")
+    assert not filing_filter.includes("SE", "549300XMDXXUY4X8VP21", "2023-12-31")
+    assert filing_filter.includes("SE", "549300XMDXXUY4X8VP21", date(2022, 6, 30))
+    # A period end that isn't an ISO date can't be in the range
+    assert not filing_filter.includes("SE", "549300XMDXXUY4X8VP21", "2022-6-30")
+    assert FilingFilter().includes("NO", "5967007LIEEXZXHW3S18", "2020-12-31")
+
+
+def test_filing_filter_to_api_filter_list() -> None:
+    """Test the filters sent to the API."""
+    assert not FilingFilter().to_api_filter_list()
+
+    filter_list = FilingFilter(
+        country_set=frozenset({"SE", "NO"}),
+        lei_set=frozenset({"549300XMDXXUY4X8VP21"}),
+        period_end_to=date(2022, 12, 31),
+    ).to_api_filter_list()
+
+    assert len(filter_list) == 3
+    assert filter_list[0] == {"name": "country", "op": "in_", "val": ["NO", "SE"]}
+    assert filter_list[1]["name"] == "entity"
+    assert filter_list[1]["val"]["val"] == ["549300XMDXXUY4X8VP21"]
+    assert filter_list[2] == {"name": "period_end", "op": "le", "val": "2022-12-31"}
+
+    # Large LEI sets are only filtered locally
+    lei_set = frozenset(f"{idx:020d}" for idx in range(MAX_API_LEI_COUNT + 1))
+    assert not FilingFilter(lei_set=lei_set).to_api_filter_list()
@@ -0,0 +1,64 @@
+"""Tests for the HTTP cache."""
+
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+
+from pyesef.download.http_cache import HttpCache
+
+ETAG = '"page-v1"'
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """Stand-in for the API, answering conditional requests."""
+
+    request_list: list[str | None] = []
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Return a page, or 304 if the client has the current version."""
+        if_none_match = self.headers.get("If-None-Match")
+        self.request_list.append(if_none_match)
+
+        if if_none_match == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = b'{"data": []}'
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args, **kwargs) -> None:  # pylint: disable=arguments-differ
+        """Don't log requests."""
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url() -> Iterator[str]:
+    """Run the stand-in API on a local port."""
+    _PageHandler.request_list = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/api/filings?page=0"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_cache(tmp_path, server_url) -> None:
+    """Test that an unchanged page is served from the cache."""
+    http_cache = HttpCache(cache_folder=str(tmp_path))
+
+    assert http_cache.get(server_url) == b'{"data": []}'
+    assert http_cache.get(server_url) == b'{"data": []}'
+
+    # A new cache instance uses the stored response
+    assert HttpCache(cache_folder=str(tmp_path)).get(server_url) == b'{"data": []}'
+
+    assert _PageHandler.request_list == [None, ETAG, ETAG]
+    assert http_cache.stats.hits == 1
+    assert http_cache.stats.misses == 1
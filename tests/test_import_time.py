@@ -0,0 +1,44 @@
+"""Guard the import time of commands that don't parse filings."""
+
+import re
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULE_LIST = ("arelle", "colorlog", "openpyxl", "pandas")
+
+
+def _get_import_time_map(*args: str) -> dict[str, int]:
+    """Return the cumulative import time in microseconds per imported module."""
+    completed_process = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    import_time_map: dict[str, int] = {}
+    for line in completed_process.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s+(\S+)", line)
+        if match is not None:
+            import_time_map[match[2]] = int(match[1])
+    return import_time_map
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ("-m", "pyesef", "--version"),
+        ("-c", "import pyesef.download, pyesef.download.api_extractor"),
+        ("-c", "import pyesef.parse_xbrl_file"),
+    ],
+)
+def test_import_time(args: tuple[str, ...]) -> None:
+    """Test that heavy dependencies are not imported."""
+    import_time_map = _get_import_time_map(*args)
+
+    assert not [
+        module
+        for module in import_time_map
+        if module.split(".")[0] in HEAVY_MODULE_LIST
+    ]
@@ -0,0 +1,34 @@
+"""Tests for the job ledger."""
+
+from pyesef.parse_xbrl_file.ledger import JobLedger, JobStatus, get_content_hash
+
+
+def test_job_ledger(tmp_path) -> None:
+    """Test the life cycle of a job."""
+    zip_file_path = tmp_path / "filing.zip"
+    zip_file_path.write_bytes(b"zip")
+    content_hash = get_content_hash(str(zip_file_path))
+
+    ledger = JobLedger(path=str(tmp_path / "ledger.sqlite"))
+    assert ledger.get_status(content_hash) is None
+    assert ledger.should_parse(content_hash) is True
+
+    ledger.start(content_hash=content_hash, zip_file_path=str(zip_file_path))
+    assert ledger.get_status(content_hash) == JobStatus.RUNNING
+    # A job left running after a crash is resumed
+    assert ledger.should_parse(content_hash) is True
+
+    ledger.fail(content_hash=content_hash, error="Broken")
+    assert ledger.should_parse(content_hash) is False
+    assert ledger.should_parse(content_hash, retry_failed=True) is True
+
+    ledger.start(content_hash=content_hash, zip_file_path=str(zip_file_path))
+    ledger.finish(content_hash=content_hash, output_location="output.sqlite")
+    assert ledger.should_parse(content_hash, retry_failed=True) is False
+
+    row = ledger.connection.execute(
+        "SELECT attempt_count, error, output_location FROM job"
+    ).fetchone()
+    assert row == (2, None, "output.sqlite")
+
+    ledger.close()
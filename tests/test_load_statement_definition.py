@@ -0,0 +1,202 @@
+"""Tests for updating statement definitions."""
+
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+import json
+from unittest.mock import patch
+import zipfile
+
+import pytest
+import requests
+
+from pyesef.error import PyEsefError
+from pyesef.parse_xbrl_file.common import create_controller
+from pyesef.parse_xbrl_file.load_statement_definition import (
+    TaxonomyFileData,
+    UpdateStatementDefinitionJson,
+    read_statement_definition,
+)
+
+ZIP_URL_2019 = "https://example.com/esef_taxonomy_2019.zip"
+ZIP_URL_2020 = "https://example.com/esef_taxonomy_2020.zip"
+
+TAXONOMY_FOLDER = "esef_taxonomy_2019/www.esma.europa.eu/taxonomy/2019-03-27"
+
+ROLE_BALANCE_SHEET = "http://www.esma.europa.eu/xbrl/role/all/ias_1_role-210000"
+
+SCHEMA = f"""<?xml version="1.0" encoding="UTF-8"?>
+<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema"
+    xmlns:link="http://www.xbrl.org/2003/linkbase"
+    targetNamespace="http://example.com/tst">
+  <xsd:annotation><xsd:appinfo>
+    <link:roleType roleURI="{ROLE_BALANCE_SHEET}" id="role-210000">
+      <link:usedOn>link:presentationLink</link:usedOn>
+    </link:roleType>
+  </xsd:appinfo></xsd:annotation>
+  <xsd:element name="Assets" id="tst_Assets" type="xsd:decimal"/>
+  <xsd:element name="CurrentAssets" id="tst_CurrentAssets" type="xsd:decimal"/>
+</xsd:schema>
+"""
+
+LINKBASE = f"""<?xml version="1.0" encoding="UTF-8"?>
+<link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase"
+    xmlns:xlink="http://www.w3.org/1999/xlink">
+  <link:roleRef roleURI="{ROLE_BALANCE_SHEET}" xlink:type="simple"
+      xlink:href="tst.xsd#role-210000"/>
+  <link:presentationLink xlink:type="extended" xlink:role="{ROLE_BALANCE_SHEET}">
+    <link:loc xlink:type="locator" xlink:href="tst.xsd#tst_Assets"
+        xlink:label="Assets"/>
+    <link:loc xlink:type="locator" xlink:href="tst.xsd#tst_CurrentAssets"
+        xlink:label="CurrentAssets"/>
+    <link:presentationArc xlink:type="arc"
+        xlink:arcrole="http://www.xbrl.org/2003/arcrole/parent-child"
+        xlink:from="Assets" xlink:to="CurrentAssets" order="1"/>
+  </link:presentationLink>
+</link:linkbase>
+"""
+
+
+def test_taxonomy_file_data(tmp_path) -> None:
+    """Test that the calculation linkbase is found in a cached zip-file."""
+    taxonomy_file_data = TaxonomyFileData(
+        zip_url=ZIP_URL_2019, cache_folder=str(tmp_path)
+    )
+    assert taxonomy_file_data.version == "esef_taxonomy_2019"
+
+    with zipfile.ZipFile(taxonomy_file_data.local_file_name, "w") as zip_file:
+        zip_file.writestr(
+            "esef_taxonomy_2019/www.esma.europa.eu/taxonomy/2019-03-27/esef_all-cal.xml",
+            "<linkbase/>",
+        )
+
+    # The zip-file is in the cache, so nothing is downloaded
+    taxonomy_file_data.download()
+
+    assert taxonomy_file_data.calculation_path == (
+        f"{taxonomy_file_data.local_file_name}/esef_taxonomy_2019/www.esma.europa.eu/"
+        "taxonomy/2019-03-27/esef_all-cal.xml"
+    )
+    # Nothing is extracted
+    assert [item.name for item in tmp_path.iterdir()] == ["esef_taxonomy_2019.zip"]
+
+
+def _iter_broken_content() -> Iterator[bytes]:
+    """Yield a chunk, then raise a connection error."""
+    yield b"zip"
+    raise requests.ConnectionError("Connection reset")
+
+
+def test_taxonomy_file_data__broken_download(tmp_path) -> None:
+    """Test that a download that breaks is not cached and its response is closed."""
+    taxonomy_file_data = TaxonomyFileData(
+        zip_url=ZIP_URL_2019, cache_folder=str(tmp_path)
+    )
+
+    with patch(
+        "pyesef.parse_xbrl_file.load_statement_definition.requests.get"
+    ) as mock_get:
+        response = mock_get.return_value.__enter__.return_value
+        response.iter_content.return_value = _iter_broken_content()
+        with pytest.raises(requests.ConnectionError):
+            taxonomy_file_data.download()
+
+    mock_get.return_value.__exit__.assert_called_once()
+    assert not list(tmp_path.iterdir())
+
+
+def test_read_statement_definition(tmp_path) -> None:
+    """Test that the items of a statement are read straight from the zip-file."""
+    taxonomy_file_data = TaxonomyFileData(
+        zip_url=ZIP_URL_2019, cache_folder=str(tmp_path)
+    )
+    with zipfile.ZipFile(taxonomy_file_data.local_file_name, "w") as zip_file:
+        zip_file.writestr(f"{TAXONOMY_FOLDER}/tst.xsd", SCHEMA)
+        zip_file.writestr(f"{TAXONOMY_FOLDER}/esef_all-cal.xml", LINKBASE)
+
+    cntlr = create_controller()
+    try:
+        statement_definition = read_statement_definition(
+            taxonomy_file_data=taxonomy_file_data, cntlr=cntlr
+        )
+    finally:
+        cntlr.close()
+
+    assert statement_definition["BalanceSheet"] == [
+        "{http://example.com/tst}Assets",
+        "{http://example.com/tst}CurrentAssets",
+    ]
+    assert statement_definition["CashFlow"] == []
+    assert [item.name for item in tmp_path.iterdir()] == ["esef_taxonomy_2019.zip"]
+
+
+def test_taxonomy_file_data__no_calculation_linkbase(tmp_path) -> None:
+    """Test that a zip-file without a calculation linkbase is rejected."""
+    taxonomy_file_data = TaxonomyFileData(
+        zip_url=ZIP_URL_2019, cache_folder=str(tmp_path)
+    )
+    with zipfile.ZipFile(taxonomy_file_data.local_file_name, "w") as zip_file:
+        zip_file.writestr("esef_taxonomy_2019/readme.txt", "")
+
+    with pytest.raises(PyEsefError):
+        assert taxonomy_file_data.calculation_path
+
+
+def _read_statement_definition(taxonomy_file_data, cntlr) -> dict[str, list[str]]:
+    """Return statement definitions without loading a taxonomy."""
+    assert cntlr is None
+    assert taxonomy_file_data.version == "esef_taxonomy_2020"
+    return {"CashFlow": ["{2020}ProfitLoss"], "BalanceSheet": ["{2020}Assets"]}
+
+
+class _ThreadPoolExecutor(ThreadPoolExecutor):
+    """Run the workers in threads, so that the patches apply to them."""
+
+    def __init__(self, max_workers, mp_context, initializer) -> None:
+        """Init class."""
+        # Worker processes are spawned, as the parent may run threads
+        assert mp_context.get_start_method() == "spawn"
+        super().__init__(max_workers=max_workers, initializer=initializer)
+
+
+@patch(
+    "pyesef.parse_xbrl_file.load_statement_definition.ProcessPoolExecutor",
+    _ThreadPoolExecutor,
+)
+@patch(
+    "pyesef.parse_xbrl_file.load_statement_definition.read_statement_definition",
+    _read_statement_definition,
+)
+@patch("pyesef.parse_xbrl_file.load_statement_definition._init_worker", lambda: None)
+@patch.dict(
+    "pyesef.parse_xbrl_file.load_statement_definition._WORKER_STATE", {"cntlr": None}
+)
+@patch(
+    "pyesef.parse_xbrl_file.load_statement_definition.TaxonomyFileData.download",
+    lambda self: None,
+)
+def test_update_statement_definition_json(tmp_path) -> None:
+    """Test that only new versions of the taxonomy are read."""
+    path = str(tmp_path / "statement_definition.json")
+    with open(path, "w", encoding="UTF-8") as json_file:
+        json.dump(
+            {
+                "CashFlow": ["{2019}ProfitLoss"],
+                "TaxonomyVersions": ["esef_taxonomy_2019"],
+            },
+            json_file,
+        )
+
+    UpdateStatementDefinitionJson(
+        taxonomy_list=(
+            TaxonomyFileData(zip_url=ZIP_URL_2019),
+            TaxonomyFileData(zip_url=ZIP_URL_2020),
+        ),
+        path=path,
+    )
+
+    with open(path, encoding="UTF-8") as json_file:
+        assert json.load(json_file) == {
+            "CashFlow": ["{2019}ProfitLoss", "{2020}ProfitLoss"],
+            "BalanceSheet": ["{2020}Assets"],
+            "TaxonomyVersions": ["esef_taxonomy_2019", "esef_taxonomy_2020"],
+        }
@@ -0,0 +1,28 @@
+"""Tests for the command line."""
+
+from datetime import date
+
+import pytest
+
+from pyesef.__main__ import _get_filing_filter, _get_parser
+
+
+def test_period_range() -> None:
+    """Test that the period range is read as dates."""
+    org_args = _get_parser().parse_args(
+        ["--period-from", "2022-01-01", "--period-to", "2023-12-31"]
+    )
+    filing_filter = _get_filing_filter(org_args)
+
+    assert filing_filter is not None
+    assert filing_filter.period_end_from == date(2022, 1, 1)
+    assert filing_filter.period_end_to == date(2023, 12, 31)
+
+
+@pytest.mark.parametrize("value", ["2023-1-5", "2023", "20230105", "2023-02-30"])
+def test_period_range__rejected(value, capsys) -> None:
+    """Test that a period that isn't a date like YYYY-MM-DD is rejected."""
+    with pytest.raises(SystemExit):
+        _get_parser().parse_args(["--period-from", value])
+
+    assert "is not a date like YYYY-MM-DD" in capsys.readouterr().err
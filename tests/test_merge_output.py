@@ -0,0 +1,87 @@
+"""Tests for merging output files."""
+
+import csv
+from datetime import date
+
+import pandas as pd
+
+from pyesef.parse_xbrl_file.common import EsefData
+from pyesef.parse_xbrl_file.fact_store import FactStore
+from pyesef.parse_xbrl_file.merge_output import merge_output_files
+from pyesef.parse_xbrl_file.read_and_save_filings import data_list_to_clean_df
+from pyesef.parse_xbrl_file.save_excel import DataSheetName
+
+
+def _get_df(lei: str, value_list: list[int]) -> pd.DataFrame:
+    """Return a cleaned dataframe with one fact per value."""
+    return data_list_to_clean_df(
+        data_list=[
+            EsefData(
+                period_end=date(2022, 12, 31),
+                lei=lei,
+                xml_name="Revenue",
+                wider_anchor_or_xml_name="Revenue",
+                wider_anchor=None,
+                value=value,
+                currency="SEK",
+                level_1="IncomeStatement",
+                membership=f"Segment{value}Member",
+                label=None,
+                is_company_defined=False,
+            )
+            for value in value_list
+        ]
+    )
+
+
+def test_merge_output_files(tmp_path) -> None:
+    """Test that Excel files and fact stores are merged without duplicates."""
+    input_path_list = []
+    for idx, (lei, value_list) in enumerate(
+        (("lei-b", [3, 1]), ("lei-a", [2]), ("lei-b", [1, 4]))
+    ):
+        input_path = str(tmp_path / f"output.{idx}.xlsx")
+        _get_df(lei=lei, value_list=value_list).to_excel(
+            input_path, index=False, sheet_name=DataSheetName.DATA.value
+        )
+        input_path_list.append(input_path)
+
+    fact_store_path = str(tmp_path / "output.sqlite")
+    fact_store = FactStore(path=fact_store_path)
+    fact_store.upsert(_get_df(lei="lei-a", value_list=[2, 5]), zip_file_path="a.zip")
+    fact_store.close()
+    input_path_list.append(fact_store_path)
+
+    output_path = str(tmp_path / "merged.csv")
+    merge_output_files(input_path_list=input_path_list, output_path=output_path)
+
+    with open(output_path, encoding="UTF-8") as csv_file:
+        row_list = list(csv.DictReader(csv_file))
+
+    assert [(row["lei"], row["value"]) for row in row_list] == [
+        ("lei-a", "2"),
+        ("lei-a", "5"),
+        ("lei-b", "1"),
+        ("lei-b", "3"),
+        ("lei-b", "4"),
+    ]
+    assert row_list[0]["period_end"] == "2022-12-31"
+    assert row_list[0]["is_income_statement"] == "True"
+
+    xlsx_output_path = str(tmp_path / "merged.xlsx")
+    merge_output_files(input_path_list=input_path_list, output_path=xlsx_output_path)
+    assert len(pd.read_excel(xlsx_output_path)) == 5
+
+
+def test_merge_output_files__path_with_uri_characters(tmp_path) -> None:
+    """Test that a fact store with characters that have a meaning in an URI is read."""
+    fact_store_path = str(tmp_path / "output #1?%.sqlite")
+    fact_store = FactStore(path=fact_store_path)
+    fact_store.upsert(_get_df(lei="lei-a", value_list=[2]), zip_file_path="a.zip")
+    fact_store.close()
+
+    output_path = str(tmp_path / "merged.csv")
+    merge_output_files(input_path_list=[fact_store_path], output_path=output_path)
+
+    with open(output_path, encoding="UTF-8") as csv_file:
+        assert [row["value"] for row in csv.DictReader(csv_file)] == ["2"]
@@ -0,0 +1,115 @@
+"""Tests for live progress metrics."""
+
+import re
+from urllib.request import urlopen
+
+from pyesef.utils.metrics import (
+    METRICS,
+    RunMetrics,
+    StageMetrics,
+    get_rss_bytes,
+    start_metrics_server,
+    write_metrics_textfile,
+)
+
+
+def test_stage_metrics() -> None:
+    """Test counters, ETA and the latency histogram of a stage."""
+    stage_metrics = StageMetrics(name="export")
+    stage_metrics.add_total(5)
+    assert stage_metrics.eta is None
+
+    stage_metrics.record(duration=0.2, item_count=100)
+    stage_metrics.record(duration=3.8, item_count=50)
+    stage_metrics.record(duration=700.0, failed=True)
+    stage_metrics.record_skipped()
+
+    assert stage_metrics.remaining == 1
+    assert stage_metrics.eta == 704 / 3
+
+    line_list = [
+        line
+        for sample_list in stage_metrics.to_prometheus_sample_map().values()
+        for line in sample_list
+    ]
+    assert 'pyesef_filings_total{stage="export",status="done"} 2' in line_list
+    assert 'pyesef_filings_total{stage="export",status="failed"} 1' in line_list
+    assert 'pyesef_filings_total{stage="export",status="skipped"} 1' in line_list
+    assert 'pyesef_filings_remaining{stage="export"} 1' in line_list
+    assert 'pyesef_items_total{stage="export"} 150' in line_list
+    assert (
+        'pyesef_filing_latency_seconds_bucket{stage="export",le="0.5"} 1' in line_list
+    )
+    assert (
+        'pyesef_filing_latency_seconds_bucket{stage="export",le="5.0"} 2' in line_list
+    )
+    assert (
+        'pyesef_filing_latency_seconds_bucket{stage="export",le="+Inf"} 3' in line_list
+    )
+    assert 'pyesef_filing_latency_seconds_count{stage="export"} 3' in line_list
+
+
+def test_run_metrics__families_are_grouped() -> None:
+    """Test that each family is one block of HELP, TYPE and all its samples."""
+    run_metrics = RunMetrics()
+    run_metrics.download.record(duration=1.0, item_count=1)
+    run_metrics.export.record(duration=2.0, item_count=100)
+
+    family_type_map: dict[str, str] = {}
+    family_name = ""
+    sample_count = 0
+    for line in run_metrics.to_prometheus_text().splitlines():
+        if line.startswith("# HELP "):
+            family_name = line.split()[2]
+            # The samples of a family must not be split over several blocks
+            assert family_name not in family_type_map
+        elif line.startswith("# TYPE "):
+            assert line.split()[2] == family_name
+            family_type_map[family_name] = line.split()[3]
+        else:
+            match = re.fullmatch(r"([a-z_]+)(\{[^}]*\})? -?[0-9.e+]+", line)
+            assert match is not None, line
+            sample_name = match[1]
+            if family_type_map[family_name] == "histogram":
+                sample_name = re.sub(r"_(bucket|sum|count)$", "", sample_name)
+            assert sample_name == family_name, line
+            sample_count += 1
+
+    assert family_type_map["pyesef_filing_latency_seconds"] == "histogram"
+    assert family_type_map["pyesef_resident_memory_bytes"] == "gauge"
+    assert sample_count > 0
+
+
+def test_get_rss_bytes() -> None:
+    """Test that the memory use of the process is read."""
+    assert get_rss_bytes() > 0
+
+
+def test_start_metrics_server() -> None:
+    """Test that the metrics are served over HTTP."""
+    server = start_metrics_server(port=0)
+    try:
+        with urlopen(
+            f"http://127.0.0.1:{server.server_port}/metrics", timeout=5
+        ) as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "# TYPE pyesef_filing_latency_seconds histogram" in body
+    assert 'pyesef_filings_remaining{stage="download"}' in body
+    assert "pyesef_resident_memory_bytes " in body
+
+
+def test_write_metrics_textfile(tmp_path) -> None:
+    """Test that the metrics are written to a file."""
+    path = str(tmp_path / "pyesef.prom")
+    write_metrics_textfile(path=path)
+
+    with open(path, encoding="UTF-8") as _file:
+        line_list = _file.read().splitlines()
+
+    # The memory use changes between calls
+    assert line_list[:-1] == METRICS.to_prometheus_text().splitlines()[:-1]
+    assert [item.name for item in tmp_path.iterdir()] == ["pyesef.prom"]
@@ -0,0 +1,84 @@
+"""Tests for the download-to-parse pipeline."""
+
+from unittest.mock import patch
+
+import pytest
+
+from pyesef.const import ExtractionEngine
+from pyesef.download.common import Filing
+from pyesef.pipeline import download_and_export
+
+
+def test_download_and_export() -> None:
+    """Test that each downloaded package is handed to the parser."""
+    filing_list = [
+        Filing(
+            country_iso_2="SE",
+            package_url=f"lei{idx}/2022-12-31/ESEF/SE/0/lei{idx}-2022-12-31-en.zip",
+            period_end="2022-12-31",
+            lei=f"lei{idx}",
+        )
+        for idx in range(5)
+    ]
+    parsed_list: list[str] = []
+
+    def _download_packages(on_package_ready, shard, filing_filter) -> None:
+        assert shard is None
+        assert filing_filter is None
+        for filing in filing_list:
+            on_package_ready(filing)
+
+    def _read_filing(
+        should_move_parsed_file,
+        *,
+        filing_queue,
+        retry_failed,
+        shard,
+        engine,
+        budget,
+    ) -> None:
+        assert should_move_parsed_file is False
+        assert retry_failed is False
+        assert shard is None
+        assert engine == ExtractionEngine.ARELLE
+        assert budget is None
+        while (parse_list_data := filing_queue.get()) is not None:
+            assert parse_list_data.language_code == "SE"
+            parsed_list.append(parse_list_data.zip_file_path)
+
+    with (
+        patch("pyesef.pipeline.download_packages", _download_packages),
+        patch("pyesef.pipeline.ReadFiling", _read_filing),
+    ):
+        download_and_export(queue_size=1)
+
+    assert parsed_list == [filing.write_location for filing in filing_list]
+
+
+def test_download_and_export__download_error() -> None:
+    """Test that an error of the downloads is raised once the parser is done."""
+    parsed_list: list[str] = []
+
+    def _download_packages(on_package_ready, **_kwargs) -> None:
+        on_package_ready(
+            Filing(
+                country_iso_2="SE",
+                package_url="lei0/2022-12-31/ESEF/SE/0/lei0-2022-12-31-en.zip",
+                period_end="2022-12-31",
+                lei="lei0",
+            )
+        )
+        raise ConnectionError("The API is down")
+
+    def _read_filing(*_args, filing_queue, **_kwargs) -> None:
+        while (parse_list_data := filing_queue.get()) is not None:
+            parsed_list.append(parse_list_data.zip_file_path)
+
+    with (
+        patch("pyesef.pipeline.download_packages", _download_packages),
+        patch("pyesef.pipeline.ReadFiling", _read_filing),
+        pytest.raises(ConnectionError, match="The API is down"),
+    ):
+        download_and_export()
+
+    assert len(parsed_list) == 1
@@ -0,0 +1,95 @@
+"""Tests for the query API."""
+
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from pyesef.parse_xbrl_file.common import EsefData
+from pyesef.parse_xbrl_file.fact_store import FactStore
+from pyesef.parse_xbrl_file.read_and_save_filings import data_list_to_clean_df
+from pyesef.query import query_facts
+
+
+@pytest.fixture(name="fact_store_path")
+def fixture_fact_store_path(tmp_path) -> str:
+    """Return the path to a fact store with facts from two companies."""
+    path = str(tmp_path / "output.sqlite")
+    fact_store = FactStore(path=path)
+
+    for lei, country in (("lei-se", "SE"), ("lei-no", "NO")):
+        df_filing = data_list_to_clean_df(
+            data_list=[
+                EsefData(
+                    lei=lei,
+                    period_end=date(year, 12, 31),
+                    xml_name=xml_name,
+                    wider_anchor_or_xml_name=xml_name,
+                    wider_anchor=None,
+                    level_1=level_1,
+                    membership=None,
+                    value=value,
+                    currency="SEK",
+                    label=None,
+                    is_company_defined=False,
+                )
+                for year in (2021, 2022)
+                for xml_name, level_1, value in (
+                    ("Revenue", "IncomeStatement", 100),
+                    ("CashFlowsFromUsedInOperatingActivities", "CashFlow", 50),
+                )
+            ]
+        )
+        fact_store.upsert(
+            df_filing, zip_file_path=f"{country}/{lei}.zip", country=country
+        )
+
+    fact_store.close()
+    return path
+
+
+def test_query_facts__no_filter(fact_store_path) -> None:
+    """Test that all facts are returned without filters."""
+    assert len(query_facts(path=fact_store_path)) == 8
+
+
+def test_query_facts__filters(fact_store_path) -> None:
+    """Test that the filters are combined."""
+    df_result = query_facts(
+        lei="lei-se",
+        level_1="CashFlow",
+        period_start=date(2022, 1, 1),
+        path=fact_store_path,
+    )
+    assert len(df_result) == 1
+    assert df_result["period_end"].dt.year.tolist() == [2022]
+    assert df_result.loc[0, "xml_name"] == "CashFlowsFromUsedInOperatingActivities"
+
+    df_result = query_facts(
+        country=["NO"],
+        item_list=["Revenue"],
+        period_end="2021-12-31",
+        path=fact_store_path,
+    )
+    assert len(df_result) == 1
+    assert df_result.loc[0, "lei"] == "lei-no"
+
+
+def test_query_facts__period_datetime(fact_store_path) -> None:
+    """Test that the period range is inclusive for datetimes and timestamps."""
+    df_result = query_facts(
+        lei="lei-se",
+        item_list=["Revenue"],
+        period_start=pd.Timestamp("2021-12-31"),
+        period_end=datetime(2021, 12, 31),
+        path=fact_store_path,
+    )
+    assert df_result["period_end"].dt.year.tolist() == [2021]
+
+
+def test_query_facts__path_with_uri_characters(tmp_path) -> None:
+    """Test that a path with characters that have a meaning in an URI is read."""
+    path = str(tmp_path / "facts #1?%.sqlite")
+    FactStore(path=path).close()
+
+    assert query_facts(path=path).empty
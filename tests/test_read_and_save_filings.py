@@ -1,15 +1,26 @@
 """Tests for read and save filings."""
 
 from datetime import date
+from decimal import Decimal
+import logging
 import os
-from unittest.mock import patch
+import threading
+from unittest.mock import MagicMock, patch
+import zipfile
 
+from pyesef.const import ExtractionEngine
 from pyesef.parse_xbrl_file.common import EsefData
+from pyesef.parse_xbrl_file.ledger import JobLedger, JobStatus, get_content_hash
 from pyesef.parse_xbrl_file.read_and_save_filings import (
+    VALUE_SCALE,
+    ParseListData,
     ReadFiling,
     data_list_to_clean_df,
 )
-from pyesef.parse_xbrl_file.save_excel import SaveToExcel
+from pyesef.utils.budget import FilingBudget
+from pyesef.utils.file_name import PackageFileName, write_package_identity
+from pyesef.utils.filing_filter import FilingFilter
+from pyesef.utils.shard import Shard
 
 
 def test_data_list_to_clean_df__drop_duplicates() -> None:
@@ -47,11 +58,282 @@ def test_data_list_to_clean_df__drop_duplicates() -> None:
     assert len(function_result) == 1
 
 
-def test_read_and_save_filings() -> None:
+def test_data_list_to_clean_df__compact() -> None:
+    """Test that the compact schema keeps decimals and uses less memory."""
+    data_list = [
+        EsefData(
+            period_end=date(2023, 12, 31),
+            lei=f"lei{idx % 10}",
+            wider_anchor_or_xml_name=f"Item{idx % 50}",
+            xml_name=f"Item{idx % 50}",
+            value=Decimal("1.2345") + idx,
+            wider_anchor=None,
+            membership=None,
+            label="Basic earnings per share",
+            currency="SEK",
+            is_company_defined=False,
+            level_1="IncomeStatement",
+        )
+        for idx in range(500)
+    ]
+
+    df_default = data_list_to_clean_df(data_list=data_list)
+    df_compact = data_list_to_clean_df(data_list=data_list, compact=True)
+
+    assert df_default["value"].iloc[0] == 1
+    assert df_compact["value"].dtype == "int64"
+    assert df_compact["value"].iloc[0] == 12345
+    assert df_compact.attrs["value_scale"] == VALUE_SCALE
+    assert df_compact["lei"].dtype == "category"
+    assert df_compact["membership"].dtype == "category"
+    assert df_compact["lei"].cat.categories.tolist() == [
+        f"lei{idx}" for idx in range(10)
+    ]
+    assert (
+        df_compact.memory_usage(deep=True).sum()
+        < df_default.memory_usage(deep=True).sum() / 3
+    )
+
+
+def test_data_list_to_clean_df__compact_int64_boundary() -> None:
+    """Test that scaled values beyond an int64 are kept exact as Python ints."""
+
+    def _to_data_list(value_list: list[Decimal]) -> list[EsefData]:
+        """Return a fact per value, and a duplicate of the first one."""
+        return [
+            EsefData(
+                period_end=date(2023, 12, 31),
+                lei="lei123",
+                wider_anchor_or_xml_name=f"Item{idx}",
+                xml_name=f"Item{idx}",
+                value=value,
+                wider_anchor=None,
+                membership=None,
+                label=None,
+                currency="SEK",
+                is_company_defined=False,
+                level_1="BalanceSheet",
+            )
+            for idx, value in [*enumerate(value_list), (0, value_list[0])]
+        ]
+
+    # The largest and smallest values that fit in an int64 once scaled
+    df_compact = data_list_to_clean_df(
+        data_list=_to_data_list(
+            [Decimal("922337203685477.5807"), Decimal("-922337203685477.5808")]
+        ),
+        compact=True,
+    )
+    assert df_compact["value"].dtype == "int64"
+    assert df_compact["value"].tolist() == [2**63 - 1, -(2**63)]
+
+    df_compact = data_list_to_clean_df(
+        data_list=_to_data_list(
+            [Decimal("922337203685477.5808"), Decimal("-922337203685477.5809")]
+        ),
+        compact=True,
+    )
+    assert df_compact["value"].dtype == object
+    assert df_compact["value"].tolist() == [2**63, -(2**63) - 1]
+    assert df_compact.attrs["value_scale"] == VALUE_SCALE
+
+
+def test_read_and_save_filings(offline_cntlr, tmp_path) -> None:
     """Test read_and_save_filings."""
+    read_filing = ReadFiling(
+        filing_folder=os.path.abspath(os.path.join("tests", "fixtures")),
+        should_move_parsed_file=False,
+        cntlr=offline_cntlr,
+        fact_store_path=str(tmp_path / "output.sqlite"),
+        ledger_path=str(tmp_path / "ledger.sqlite"),
+        entrypoint_index_path=str(tmp_path / "entrypoint_index.sqlite"),
+        output_path_excel=str(tmp_path / "output.xlsx"),
+    )
+    assert os.path.exists(tmp_path / "output.xlsx")
+
+    ledger = JobLedger(path=read_filing.ledger.path)
+    for parse_list_data in read_filing.file_to_parse_list:
+        content_hash = get_content_hash(parse_list_data.zip_file_path)
+        assert ledger.get_status(content_hash) == JobStatus.DONE
+    ledger.close()
+
+
+@patch("pyesef.parse_xbrl_file.read_and_save_filings.EntrypointIndex", MagicMock())
+@patch("pyesef.parse_xbrl_file.read_and_save_filings.JobLedger", MagicMock())
+@patch("pyesef.parse_xbrl_file.read_and_save_filings.FactStore", MagicMock())
+@patch("pyesef.parse_xbrl_file.read_and_save_filings.ReadFiling.parse_file_list")
+def test_find_files(_mock_parse_file_list, tmp_path) -> None:
+    """Test that files are filtered before they are loaded."""
+    (tmp_path / "SE").mkdir()
+    (tmp_path / "NO").mkdir()
+    for zip_file_path in [
+        tmp_path / "SE" / "549300XMDXXUY4X8VP21-2022-12-31-sv.zip",
+        tmp_path / "NO" / "5967007LIEEXZXHW3S18-2022-12-31-no.zip",
+        tmp_path / "549300XMDXXUY4X8VP21-2023-12-31-sv.zip",
+    ]:
+        zip_file_path.write_bytes(b"zip")
+    (tmp_path / "SE" / "notes.txt").write_bytes(b"txt")
+    # A hard link to a package that is found already
+    os.link(
+        tmp_path / "SE" / "549300XMDXXUY4X8VP21-2022-12-31-sv.zip",
+        tmp_path / "SE" / "copy.zip",
+    )
+
+    # The identity of this package is only found in the zip directory
+    with zipfile.ZipFile(tmp_path / "SE" / "annual-report.zip", "w") as zip_file:
+        zip_file.writestr(
+            "549300CSLHPO6Y1AZN37-2021-12-31-sv/reports/report.xhtml", "<html/>"
+        )
+
+    read_filing = ReadFiling(
+        filing_folder=str(tmp_path),
+        should_move_parsed_file=False,
+        filing_filter=FilingFilter(
+            country_set=frozenset({"SE"}), period_end_from=date(2022, 1, 1)
+        ),
+        cntlr=MagicMock(),
+    )
+
+    assert read_filing.file_to_parse_list == [
+        ParseListData(
+            zip_file_path=str(tmp_path / "549300XMDXXUY4X8VP21-2023-12-31-sv.zip"),
+            language_code=tmp_path.name,
+        ),
+        ParseListData(
+            zip_file_path=str(
+                tmp_path / "SE" / "549300XMDXXUY4X8VP21-2022-12-31-sv.zip"
+            ),
+            language_code="SE",
+        ),
+    ]
+
+
+@patch("pyesef.parse_xbrl_file.read_and_save_filings.EntrypointIndex", MagicMock())
+@patch("pyesef.parse_xbrl_file.read_and_save_filings.JobLedger", MagicMock())
+@patch("pyesef.parse_xbrl_file.read_and_save_filings.FactStore", MagicMock())
+@patch("pyesef.parse_xbrl_file.read_and_save_filings.ReadFiling.parse_file_list")
+def test_find_files__shard(_mock_parse_file_list, tmp_path) -> None:
+    """Test that a package is exported by the shard that downloaded it."""
+    (tmp_path / "SE").mkdir()
+    # Neither the package nor its zip directory is named by the LEI
+    zip_file_path = tmp_path / "SE" / "annual-report.zip"
+    with zipfile.ZipFile(zip_file_path, "w") as zip_file:
+        zip_file.writestr("annual-report/reports/report.xhtml", "<html/>")
+    write_package_identity(
+        str(zip_file_path),
+        PackageFileName(lei="549300XMDXXUY4X8VP21", period_end="2022-12-31"),
+    )
+
+    shard_list = [Shard(index=index, count=4) for index in range(4)]
+    found_list = [
+        ReadFiling(
+            filing_folder=str(tmp_path),
+            should_move_parsed_file=False,
+            shard=shard,
+            cntlr=MagicMock(),
+        ).file_to_parse_list
+        for shard in shard_list
+    ]
+
+    assert [bool(file_list) for file_list in found_list] == [
+        shard.includes(lei="549300XMDXXUY4X8VP21", period_end="2022-12-31")
+        for shard in shard_list
+    ]
+
+
+def test_parse_file__failure(tmp_path) -> None:
+    """Test that a file that can't be read is logged and the next file is parsed."""
+    zip_file_path = tmp_path / "549300XMDXXUY4X8VP21-2022-12-31-sv.zip"
+    zip_file_path.write_bytes(b"zip")
+    cntlr = MagicMock()
+
     with patch(
-        "pyesef.parse_xbrl_file.read_and_save_filings.PATH_ARCHIVES",
-        os.path.abspath(os.path.join("tests", "fixtures")),
+        "pyesef.parse_xbrl_file.read_and_save_filings.ReadFiling.read_fact_list",
+        side_effect=ValueError("Unable to read"),
     ):
-        ReadFiling(should_move_parsed_file=False)
-        assert os.path.exists(SaveToExcel.TEMPLATE_OUTPUT_PATH_EXCEL)
+        read_filing = ReadFiling(
+            should_move_parsed_file=False,
+            file_to_parse_list=[
+                ParseListData(
+                    zip_file_path=str(tmp_path / "missing.zip"), language_code="SE"
+                ),
+                ParseListData(zip_file_path=str(zip_file_path), language_code="SE"),
+            ],
+            cntlr=cntlr,
+            fact_store_path=str(tmp_path / "output.sqlite"),
+            ledger_path=str(tmp_path / "ledger.sqlite"),
+            entrypoint_index_path=str(tmp_path / "entrypoint_index.sqlite"),
+        )
+
+    warning_list = [
+        call.args[0]
+        for call in cntlr.addToLog.call_args_list
+        if call.kwargs.get("level") == logging.WARNING
+    ]
+    assert len(warning_list) == 2
+    assert "missing.zip" in warning_list[0]
+    assert "Unable to read" in warning_list[1]
+
+    ledger = JobLedger(path=read_filing.ledger.path)
+    job = ledger.get_job(get_content_hash(str(zip_file_path)))
+    ledger.close()
+    assert job is not None
+    assert job["status"] == JobStatus.FAILED
+
+
+def test_read_filing__shard_paths(tmp_path) -> None:
+    """Test that a shard writes to output files of its own."""
+    read_filing = ReadFiling(
+        should_move_parsed_file=False,
+        file_to_parse_list=[],
+        shard=Shard(index=1, count=4),
+        cntlr=MagicMock(),
+        fact_store_path=str(tmp_path / "output.sqlite"),
+        ledger_path=str(tmp_path / "ledger.sqlite"),
+        output_path_excel=str(tmp_path / "output.xlsx"),
+        entrypoint_index_path=str(tmp_path / "entrypoint_index.sqlite"),
+    )
+
+    assert [
+        read_filing.fact_store.path,
+        read_filing.ledger.path,
+        read_filing.output_path_excel,
+        read_filing.entrypoint_index.path,
+    ] == [
+        str(tmp_path / "output.shard-1-of-4.sqlite"),
+        str(tmp_path / "ledger.shard-1-of-4.sqlite"),
+        str(tmp_path / "output.shard-1-of-4.xlsx"),
+        str(tmp_path / "entrypoint_index.shard-1-of-4.sqlite"),
+    ]
+
+
+def test_read_and_save_filings__budget(offline_cntlr, tmp_path) -> None:
+    """Test that filings are read in the budget worker while a thread runs."""
+    stop_event = threading.Event()
+    thread = threading.Thread(target=stop_event.wait)
+    thread.start()
+
+    try:
+        read_filing = ReadFiling(
+            filing_folder=os.path.abspath(os.path.join("tests", "fixtures")),
+            should_move_parsed_file=False,
+            cntlr=offline_cntlr,
+            engine=ExtractionEngine.INLINE,
+            budget=FilingBudget(time_limit=60),
+            fact_store_path=str(tmp_path / "output.sqlite"),
+            ledger_path=str(tmp_path / "ledger.sqlite"),
+            output_path_excel=str(tmp_path / "output.xlsx"),
+            entrypoint_index_path=str(tmp_path / "entrypoint_index.sqlite"),
+        )
+    finally:
+        stop_event.set()
+        thread.join()
+
+    assert read_filing.budget_worker is not None
+    assert read_filing.budget_worker.pid is None
+
+    ledger = JobLedger(path=read_filing.ledger.path)
+    for parse_list_data in read_filing.file_to_parse_list:
+        content_hash = get_content_hash(parse_list_data.zip_file_path)
+        assert ledger.get_status(content_hash) == JobStatus.DONE
+    ledger.close()
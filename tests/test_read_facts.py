@@ -1,14 +1,20 @@
 """Placeholder test."""
 
 from datetime import datetime
+from decimal import InvalidOperation
+import itertools
 from unittest.mock import Mock, patch
 
+import pytest
+
 from pyesef.parse_xbrl_file.read_facts import (
     _get_is_extension,
     _get_label,
     _get_legal_name,
     _get_membership,
     _get_period_end,
+    round_numeric_value,
+    round_numeric_value_list,
 )
 
 
@@ -110,3 +116,84 @@ def test_get_legal_name__none(_mock_data):
     facts = []
     result = _get_legal_name(facts)
     assert result is None
+
+
+def test_round_numeric_value_list():
+    """Test that values are rounded as by round_numeric_value."""
+    value_list = [
+        "0",
+        "-0",
+        "5",
+        "15",
+        "25",
+        "-25",
+        "149",
+        "150",
+        "250",
+        "-250",
+        "251",
+        "1234567",
+        "999999999999999999",
+        "-999999999999999999",
+        "1000000000000000000",
+        "12345678901234567890",
+        "0012",
+        "1.5",
+        "2.5",
+        "-1234.5678",
+        "1e3",
+        "+5",
+        "--5",
+        "5-",
+        "1\u06632",
+        "",
+        "abc",
+    ]
+    decimals_list = [
+        None,
+        "INF",
+        "0",
+        "2",
+        "-1",
+        "-2",
+        "-3",
+        "-18",
+        "-19",
+        "-30",
+        "40",
+        " -1",
+    ]
+    precision_list = [None, "2", "INF"]
+
+    case_list = []
+    expected_list = []
+    for value, decimals, precision in itertools.product(
+        value_list, decimals_list, precision_list
+    ):
+        try:
+            expected_list.append(round_numeric_value(value, decimals, precision))
+        except InvalidOperation:
+            # Too many digits to round to, which raises an error either way
+            with pytest.raises(InvalidOperation):
+                round_numeric_value_list(
+                    [value], decimals_list=[decimals], precision_list=[precision]
+                )
+        else:
+            case_list.append((value, decimals, precision))
+
+    result_list = round_numeric_value_list(
+        [value for value, _, _ in case_list],
+        decimals_list=[decimals for _, decimals, _ in case_list],
+        precision_list=[precision for _, _, precision in case_list],
+    )
+
+    for case, result, expected in zip(case_list, result_list, expected_list):
+        if expected.is_nan():
+            assert result.is_nan()
+        else:
+            assert result == expected, case
+
+    assert not round_numeric_value_list([], decimals_list=[], precision_list=[])
+
+    with pytest.raises(ValueError):
+        round_numeric_value_list(["1"], decimals_list=["1.5"], precision_list=[None])
@@ -0,0 +1,405 @@
+"""Tests for reading facts from inline XBRL reports."""
+
+from datetime import date
+from decimal import Decimal, InvalidOperation
+import glob
+import os
+from unittest.mock import MagicMock, patch
+import zipfile
+
+import pytest
+
+from pyesef.const import ExtractionEngine
+from pyesef.parse_xbrl_file.common import EsefData
+from pyesef.parse_xbrl_file.read_and_save_filings import (
+    DUPLICATE_COLUMN_LIST,
+    ParseListData,
+    ReadFiling,
+    data_list_to_clean_df,
+)
+from pyesef.parse_xbrl_file.read_inline_facts import (
+    ConceptResolver,
+    InlineXbrlError,
+    read_concept_name_map,
+    read_inline_facts,
+    read_package_linkbases,
+)
+
+LEI = "549300XMDXXUY4X8VP21"
+
+REPORT = f"""<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml"
+    xmlns:ix="http://www.xbrl.org/2013/inlineXBRL"
+    xmlns:ixt="http://www.xbrl.org/inlineXBRL/transformation/2020-02-12"
+    xmlns:xbrli="http://www.xbrl.org/2003/instance"
+    xmlns:xbrldi="http://xbrl.org/2006/xbrldi"
+    xmlns:iso4217="http://www.xbrl.org/2003/iso4217"
+    xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+    xmlns:ifrs-full="http://xbrl.ifrs.org/taxonomy/2022-03-24/ifrs-full"
+    xmlns:abc="http://www.abc.se/2022-12-31">
+<head><title>Annual report</title></head>
+<body>
+<div style="display:none"><ix:header><ix:resources>
+<xbrli:context id="c-1">
+  <xbrli:entity>
+    <xbrli:identifier scheme="http://standards.iso.org/iso/17442">{LEI}</xbrli:identifier>
+  </xbrli:entity>
+  <xbrli:period>
+    <xbrli:startDate>2022-01-01</xbrli:startDate>
+    <xbrli:endDate>2022-12-31</xbrli:endDate>
+  </xbrli:period>
+</xbrli:context>
+<xbrli:context id="c-2">
+  <xbrli:entity>
+    <xbrli:identifier scheme="http://standards.iso.org/iso/17442">{LEI}</xbrli:identifier>
+  </xbrli:entity>
+  <xbrli:period><xbrli:instant>2022-12-31</xbrli:instant></xbrli:period>
+  <xbrli:scenario><xbrldi:explicitMember dimension="ifrs-full:ComponentsOfEquityAxis"
+    >ifrs-full:RetainedEarningsMember</xbrldi:explicitMember></xbrli:scenario>
+</xbrli:context>
+<xbrli:unit id="SEK"><xbrli:measure>iso4217:SEK</xbrli:measure></xbrli:unit>
+<xbrli:unit id="shares"><xbrli:measure>xbrli:shares</xbrli:measure></xbrli:unit>
+<xbrli:unit id="SEK-per-share"><xbrli:divide>
+  <xbrli:unitNumerator><xbrli:measure>iso4217:SEK</xbrli:measure></xbrli:unitNumerator>
+  <xbrli:unitDenominator><xbrli:measure>xbrli:shares</xbrli:measure></xbrli:unitDenominator>
+</xbrli:divide></xbrli:unit>
+</ix:resources></ix:header></div>
+<table>
+<tr><td>Revenue</td><td><ix:nonFraction name="ifrs-full:Revenue" contextRef="c-1"
+  unitRef="SEK" decimals="-3" scale="3" format="ixt:num-dot-decimal"
+  >1,234<ix:exclude> (note 3)</ix:exclude></ix:nonFraction></td></tr>
+<tr><td>Other costs</td><td>(<ix:nonFraction name="abc:OtherCosts" contextRef="c-1"
+  unitRef="SEK" decimals="0" sign="-" format="ixt:num-comma-decimal"
+  >56 789,0</ix:nonFraction>)</td></tr>
+<tr><td>Retained earnings</td><td><ix:nonFraction name="ifrs-full:Equity"
+  contextRef="c-2" unitRef="SEK" decimals="-5" scale="6">12.3</ix:nonFraction></td></tr>
+<tr><td>Nil</td><td><ix:nonFraction name="ifrs-full:Assets" contextRef="c-1"
+  unitRef="SEK" xsi:nil="true"/></td></tr>
+<tr><td>Shares</td><td><ix:nonFraction name="ifrs-full:NumberOfSharesIssued"
+  contextRef="c-2" unitRef="shares" decimals="0">1000</ix:nonFraction></td></tr>
+<tr><td>EPS</td><td><ix:nonFraction name="ifrs-full:BasicEarningsLossPerShare"
+  contextRef="c-1" unitRef="SEK-per-share" decimals="2">1.23</ix:nonFraction></td></tr>
+</table>
+</body>
+</html>
+"""
+
+LINKBASE_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase"
+    xmlns:xlink="http://www.w3.org/1999/xlink">
+"""
+
+CALCULATION_LINKBASE = f"""{LINKBASE_HEADER}
+<link:calculationLink xlink:type="extended"
+    xlink:role="http://www.abc.se/role/IncomeStatement">
+  <link:loc xlink:type="locator" xlink:label="ProfitLoss"
+    xlink:href="https://xbrl.ifrs.org/full_ifrs-cor.xsd#ifrs-full_ProfitLoss"/>
+  <link:loc xlink:type="locator" xlink:label="Revenue"
+    xlink:href="https://xbrl.ifrs.org/full_ifrs-cor.xsd#ifrs-full_Revenue"/>
+  <link:calculationArc xlink:type="arc"
+    xlink:arcrole="http://www.xbrl.org/2003/arcrole/summation-item"
+    xlink:from="ProfitLoss" xlink:to="Revenue" weight="1"/>
+</link:calculationLink>
+</link:linkbase>
+"""
+
+PRESENTATION_LINKBASE = f"""{LINKBASE_HEADER}
+<link:presentationLink xlink:type="extended"
+    xlink:role="http://www.abc.se/role/IncomeStatement">
+  <link:loc xlink:type="locator" xlink:label="ProfitLoss"
+    xlink:href="https://xbrl.ifrs.org/full_ifrs-cor.xsd#ifrs-full_ProfitLoss"/>
+  <link:loc xlink:type="locator" xlink:label="Revenue"
+    xlink:href="https://xbrl.ifrs.org/full_ifrs-cor.xsd#ifrs-full_Revenue"/>
+  <link:presentationArc xlink:type="arc"
+    xlink:arcrole="http://www.xbrl.org/2003/arcrole/parent-child"
+    xlink:from="ProfitLoss" xlink:to="Revenue"/>
+</link:presentationLink>
+</link:linkbase>
+"""
+
+DEFINITION_LINKBASE = f"""{LINKBASE_HEADER}
+<link:definitionLink xlink:type="extended"
+    xlink:role="http://www.esma.europa.eu/xbrl/esef/role/esef_role-999999">
+  <link:loc xlink:type="locator" xlink:label="OtherExpense"
+    xlink:href="https://xbrl.ifrs.org/full_ifrs-cor.xsd#ifrs-full_OtherExpense"/>
+  <link:loc xlink:type="locator" xlink:label="OtherCosts"
+    xlink:href="abc-2022-12-31.xsd#abc_OtherCosts"/>
+  <link:definitionArc xlink:type="arc"
+    xlink:arcrole="http://www.esma.europa.eu/xbrl/esef/arcrole/wider-narrower"
+    xlink:from="OtherExpense" xlink:to="OtherCosts"/>
+</link:definitionLink>
+</link:linkbase>
+"""
+
+LABEL_LINKBASE = f"""{LINKBASE_HEADER}
+<link:labelLink xlink:type="extended"
+    xlink:role="http://www.xbrl.org/2003/role/link">
+  <link:loc xlink:type="locator" xlink:label="OtherCosts"
+    xlink:href="abc-2022-12-31.xsd#abc_OtherCosts"/>
+  <link:label xlink:type="resource" xlink:label="label_OtherCosts"
+    xlink:role="http://www.xbrl.org/2003/role/label"
+    xml:lang="sv">Övriga kostnader</link:label>
+  <link:label xlink:type="resource" xlink:label="label_OtherCosts"
+    xlink:role="http://www.xbrl.org/2003/role/label"
+    xml:lang="en">Other costs</link:label>
+  <link:labelArc xlink:type="arc"
+    xlink:arcrole="http://www.xbrl.org/2003/arcrole/concept-label"
+    xlink:from="OtherCosts" xlink:to="label_OtherCosts"/>
+</link:labelLink>
+</link:linkbase>
+"""
+
+MODEL_ROLE_MAP = {
+    "BalanceSheet": [],
+    "CashFlow": [],
+    "ChangesEquity": [],
+    "IncomeStatement": [
+        "{http://xbrl.ifrs.org/taxonomy/2022-03-24/ifrs-full}Revenue",
+    ],
+}
+
+# The columns that both engines read in the same way
+PARITY_COLUMN_LIST = [
+    *DUPLICATE_COLUMN_LIST,
+    "wider_anchor",
+    "currency",
+    "is_company_defined",
+    "membership",
+    "label",
+]
+
+
+def _write_package(path: str, report: str = REPORT) -> None:
+    """Write a report package with a report and its linkbases."""
+    folder = f"{LEI}-2022-12-31-sv"
+    with zipfile.ZipFile(path, "w") as zip_file:
+        zip_file.writestr(f"{folder}/META-INF/reportPackage.json", "{}")
+        zip_file.writestr(f"{folder}/reports/{folder}.xhtml", report)
+        zip_file.writestr(
+            f"{folder}/www.abc.se/abc-2022-12-31_cal.xml", CALCULATION_LINKBASE
+        )
+        zip_file.writestr(
+            f"{folder}/www.abc.se/abc-2022-12-31_pre.xml", PRESENTATION_LINKBASE
+        )
+        zip_file.writestr(
+            f"{folder}/www.abc.se/abc-2022-12-31_def.xml", DEFINITION_LINKBASE
+        )
+        zip_file.writestr(
+            f"{folder}/www.abc.se/abc-2022-12-31_lab-sv.xml", LABEL_LINKBASE
+        )
+
+
+def test_read_inline_facts(tmp_path) -> None:
+    """Test reading numeric facts without loading the taxonomy."""
+    zip_file_path = str(tmp_path / "package.zip")
+    _write_package(zip_file_path)
+
+    assert read_inline_facts(zip_file_path, model_role_map=MODEL_ROLE_MAP) == [
+        EsefData(
+            period_end=date(2022, 12, 31),
+            lei=LEI,
+            wider_anchor_or_xml_name="Revenue",
+            wider_anchor=None,
+            xml_name="Revenue",
+            currency="SEK",
+            value=Decimal("1234000"),
+            is_company_defined=False,
+            membership=None,
+            label="ifrs-full:Revenue",
+            level_1="IncomeStatement",
+        ),
+        EsefData(
+            period_end=date(2022, 12, 31),
+            lei=LEI,
+            wider_anchor_or_xml_name="OtherExpense",
+            wider_anchor="OtherExpense",
+            xml_name="OtherCosts",
+            currency="SEK",
+            value=Decimal("-56789"),
+            is_company_defined=True,
+            membership=None,
+            label="Other costs",
+            level_1=None,
+        ),
+        EsefData(
+            period_end=date(2022, 12, 31),
+            lei=LEI,
+            wider_anchor_or_xml_name="Equity",
+            wider_anchor=None,
+            xml_name="Equity",
+            currency="SEK",
+            value=Decimal("12300000"),
+            is_company_defined=False,
+            membership="RetainedEarningsMember",
+            label="ifrs-full:Equity",
+            level_1=None,
+        ),
+    ]
+
+
+def test_read_inline_facts__unsupported(tmp_path) -> None:
+    """Test that filings the engine can't read are left to Arelle."""
+    zip_file_path = str(tmp_path / "package.zip")
+    _write_package(
+        zip_file_path,
+        report=REPORT.replace('format="ixt:num-dot-decimal"', 'format="ixt:unknown"'),
+    )
+
+    with pytest.raises(InlineXbrlError):
+        read_inline_facts(zip_file_path, model_role_map=MODEL_ROLE_MAP)
+
+    with zipfile.ZipFile(zip_file_path, "w") as zip_file:
+        zip_file.writestr("package/META-INF/reportPackage.json", "{}")
+
+    with pytest.raises(InlineXbrlError):
+        read_inline_facts(zip_file_path, model_role_map=MODEL_ROLE_MAP)
+
+
+SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    targetNamespace="http://www.abc.se/2022-12-31">
+  <xs:element id="abc_Costs_Of_Sales" name="Costs_Of_Sales"/>
+  <xs:element id="concept-42" name="Other_Costs"/>
+</xs:schema>
+"""
+
+UNDERSCORE_LABEL_LINKBASE = f"""{LINKBASE_HEADER}
+<link:labelLink xlink:type="extended"
+    xlink:role="http://www.xbrl.org/2003/role/link">
+  <link:loc xlink:type="locator" xlink:label="loc_1"
+    xlink:href="../abc-2022-12-31.xsd#abc_Costs_Of_Sales"/>
+  <link:loc xlink:type="locator" xlink:label="loc_2"
+    xlink:href="../abc-2022-12-31.xsd#concept-42"/>
+  <link:loc xlink:type="locator" xlink:label="loc_3"
+    xlink:href="https://xbrl.ifrs.org/full_ifrs-cor.xsd#ifrs-full_Other_Income"/>
+  <link:label xlink:type="resource" xlink:label="label_1"
+    xlink:role="http://www.xbrl.org/2003/role/label">Costs of sales</link:label>
+  <link:label xlink:type="resource" xlink:label="label_2"
+    xlink:role="http://www.xbrl.org/2003/role/label">Other costs</link:label>
+  <link:label xlink:type="resource" xlink:label="label_3"
+    xlink:role="http://www.xbrl.org/2003/role/label">Other income</link:label>
+  <link:labelArc xlink:type="arc"
+    xlink:arcrole="http://www.xbrl.org/2003/arcrole/concept-label"
+    xlink:from="loc_1" xlink:to="label_1"/>
+  <link:labelArc xlink:type="arc"
+    xlink:arcrole="http://www.xbrl.org/2003/arcrole/concept-label"
+    xlink:from="loc_2" xlink:to="label_2"/>
+  <link:labelArc xlink:type="arc"
+    xlink:arcrole="http://www.xbrl.org/2003/arcrole/concept-label"
+    xlink:from="loc_3" xlink:to="label_3"/>
+</link:labelLink>
+</link:linkbase>
+"""
+
+
+def test_read_package_linkbases__concept_id(tmp_path) -> None:
+    """Test that locators are resolved to concepts with underscores in the name."""
+    zip_file_path = str(tmp_path / "package.zip")
+    with zipfile.ZipFile(zip_file_path, "w") as zip_file:
+        zip_file.writestr("package/www.abc.se/abc-2022-12-31.xsd", SCHEMA)
+        zip_file.writestr(
+            "package/www.abc.se/lab/abc-2022-12-31_lab-en.xml",
+            UNDERSCORE_LABEL_LINKBASE,
+        )
+
+    with zipfile.ZipFile(zip_file_path) as zip_file:
+        name_list = zip_file.namelist()
+        concept_name_map = read_concept_name_map(zip_file, name_list)
+        package_linkbases = read_package_linkbases(
+            zip_file,
+            name_list,
+            concept_resolver=ConceptResolver(
+                concept_name_map=concept_name_map, prefix_list=["abc", "ifrs-full"]
+            ),
+        )
+
+    assert concept_name_map == {
+        "package/www.abc.se/abc-2022-12-31.xsd#abc_Costs_Of_Sales": "Costs_Of_Sales",
+        "package/www.abc.se/abc-2022-12-31.xsd#concept-42": "Other_Costs",
+    }
+    assert package_linkbases.label_map == {
+        "Costs_Of_Sales": "Costs of sales",
+        "Other_Costs": "Other costs",
+        # Not in a schema that was read, so the known prefix is split off
+        "Other_Income": "Other income",
+    }
+
+
+# Arelle resolves the files in a package against its absolute path
+FIXTURE_ZIP_FILE_PATH_LIST = sorted(
+    os.path.abspath(zip_file_path)
+    for zip_file_path in glob.glob(
+        os.path.join("tests", "fixtures", "**", "*.zip"), recursive=True
+    )
+)
+
+
+@pytest.mark.skipif(
+    not FIXTURE_ZIP_FILE_PATH_LIST, reason="No report packages in tests/fixtures"
+)
+@pytest.mark.parametrize("zip_file_path", FIXTURE_ZIP_FILE_PATH_LIST)
+def test_engine_parity(zip_file_path, offline_cntlr, tmp_path) -> None:
+    """Test that both engines read the same facts from a filing."""
+    read_filing = ReadFiling(
+        should_move_parsed_file=False,
+        file_to_parse_list=[],
+        cntlr=offline_cntlr,
+        fact_store_path=str(tmp_path / "output.sqlite"),
+        ledger_path=str(tmp_path / "ledger.sqlite"),
+        entrypoint_index_path=str(tmp_path / "entrypoint_index.sqlite"),
+    )
+    parse_list_data = ParseListData(
+        zip_file_path=zip_file_path,
+        language_code=os.path.basename(os.path.dirname(zip_file_path)),
+    )
+    df_arelle = data_list_to_clean_df(
+        read_filing.read_fact_list_arelle(parse_list_data=parse_list_data)
+    )
+    inline_fact_list = read_inline_facts(
+        zip_file_path,
+        model_role_map=read_filing.model_role_map,
+        taxonomy_labels=read_filing.taxonomy_labels,
+    )
+    df_inline = data_list_to_clean_df(inline_fact_list)
+
+    def _sorted(df_result):
+        return (
+            df_result[PARITY_COLUMN_LIST]
+            .sort_values(DUPLICATE_COLUMN_LIST, na_position="first")
+            .reset_index(drop=True)
+        )
+
+    assert _sorted(df_inline).equals(_sorted(df_arelle))
+    assert not read_filing.definitions.empty
+    assert read_filing.taxonomy_labels.get_definitions(
+        inline_fact_list[0].xml_name
+    ).equals(read_filing.definitions)
+
+
+@patch("pyesef.parse_xbrl_file.read_and_save_filings.read_inline_facts")
+@patch("pyesef.parse_xbrl_file.read_and_save_filings.ReadFiling.read_fact_list_arelle")
+def test_read_fact_list__fallback(
+    mock_read_fact_list_arelle, mock_read_inline_facts, tmp_path
+) -> None:
+    """Test that a filing the inline engine can't read is loaded with Arelle."""
+    read_filing = ReadFiling(
+        should_move_parsed_file=False,
+        file_to_parse_list=[],
+        cntlr=MagicMock(),
+        engine=ExtractionEngine.INLINE,
+        fact_store_path=str(tmp_path / "output.sqlite"),
+        ledger_path=str(tmp_path / "ledger.sqlite"),
+        entrypoint_index_path=str(tmp_path / "entrypoint_index.sqlite"),
+    )
+    parse_list_data = ParseListData(
+        zip_file_path=str(tmp_path / "report.zip"), language_code="SE"
+    )
+
+    for exc in (InlineXbrlError("Unsupported"), InvalidOperation(), ValueError()):
+        mock_read_inline_facts.side_effect = exc
+        assert (
+            read_filing.read_fact_list(parse_list_data=parse_list_data)
+            == mock_read_fact_list_arelle.return_value
+        )
+
+    assert mock_read_fact_list_arelle.call_count == 3
@@ -0,0 +1,46 @@
+"""Tests for the cost-model scheduler."""
+
+import zipfile
+
+from pyesef.parse_xbrl_file.scheduler import (
+    CostModel,
+    ZipStats,
+    read_zip_stats,
+    schedule_largest_first,
+)
+
+
+def _write_zip(path, member_count: int, member_size: int) -> str:
+    """Write a zip-file with stored members of a given size."""
+    with zipfile.ZipFile(path, "w") as zip_file:
+        for idx in range(member_count):
+            zip_file.writestr(f"member-{idx}.xhtml", b"x" * member_size)
+    return str(path)
+
+
+def test_read_zip_stats(tmp_path) -> None:
+    """Test that the size and member count of zip-files are read."""
+    zip_file_path = _write_zip(tmp_path / "filing.zip", member_count=3, member_size=10)
+    assert read_zip_stats(zip_file_path).member_count == 3
+
+    (tmp_path / "broken.zip").write_bytes(b"zip")
+    assert read_zip_stats(str(tmp_path / "broken.zip")) == ZipStats(
+        file_size=3, member_count=0
+    )
+
+
+def test_schedule_largest_first(tmp_path) -> None:
+    """Test that the most expensive filings are handed out first."""
+    small_path = _write_zip(tmp_path / "small.zip", member_count=1, member_size=10)
+    large_path = _write_zip(tmp_path / "large.zip", member_count=20, member_size=10)
+    other_small_path = _write_zip(
+        tmp_path / "other-small.zip", member_count=1, member_size=10
+    )
+
+    scheduled_filing_list = schedule_largest_first(
+        [small_path, large_path, other_small_path], cost_model=CostModel()
+    )
+
+    assert [
+        scheduled_filing.zip_file_path for scheduled_filing in scheduled_filing_list
+    ] == [large_path, small_path, other_small_path]
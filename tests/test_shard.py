@@ -0,0 +1,81 @@
+"""Tests for sharding."""
+
+import zipfile
+
+import pytest
+
+from pyesef.utils.file_name import (
+    PackageFileName,
+    parse_package_file_name,
+    read_package_file_name,
+    write_package_identity,
+)
+from pyesef.utils.shard import Shard
+
+
+def test_parse_package_file_name() -> None:
+    """Test function parse_package_file_name."""
+    assert parse_package_file_name(
+        "archives/SE/549300XMDXXUY4X8VP21-2022-12-31-sv.zip"
+    ) == PackageFileName(lei="549300XMDXXUY4X8VP21", period_end="2022-12-31")
+    assert parse_package_file_name("archives/SE/annual-report.zip") is None
+
+
+def test_read_package_file_name(tmp_path) -> None:
+    """Test reading the identity of a package from the zip directory."""
+    zip_file_path = str(tmp_path / "annual-report.zip")
+    with zipfile.ZipFile(zip_file_path, "w") as zip_file:
+        zip_file.writestr("549300XMDXXUY4X8VP21-2022-12-31-sv/META-INF/", "")
+
+    assert read_package_file_name(zip_file_path) == PackageFileName(
+        lei="549300XMDXXUY4X8VP21", period_end="2022-12-31"
+    )
+    assert read_package_file_name(str(tmp_path / "missing.zip")) is None
+
+
+def test_read_package_file_name__identity(tmp_path) -> None:
+    """Test that the identity stored by the downloader is read first."""
+    zip_file_path = str(tmp_path / "549300XMDXXUY4X8VP21-2022-12-31-sv.zip")
+    package_file_name = PackageFileName(
+        lei="5967007LIEEXZXHW3S18", period_end="2023-12-31"
+    )
+    write_package_identity(zip_file_path, package_file_name)
+
+    assert read_package_file_name(zip_file_path) == package_file_name
+
+
+def test_shard_from_string() -> None:
+    """Test creating a shard from the command line."""
+    assert Shard.from_string("1/4") == Shard(index=1, count=4)
+
+    with pytest.raises(ValueError):
+        Shard.from_string("4/4")
+
+    with pytest.raises(ValueError):
+        Shard.from_string("a/4")
+
+
+def test_shard_includes() -> None:
+    """Test that every filing belongs to exactly one shard."""
+    shard_list = [Shard(index=index, count=3) for index in range(3)]
+    lei_list = [f"549300XMDXXUY4X8VP{idx:02d}" for idx in range(30)]
+
+    for lei in lei_list:
+        assert (
+            sum(
+                shard.includes(lei=lei, period_end="2022-12-31") for shard in shard_list
+            )
+            == 1
+        )
+
+    assert all(
+        any(shard.includes(lei=lei, period_end="2022-12-31") for lei in lei_list)
+        for shard in shard_list
+    )
+
+
+def test_shard_apply_to_path() -> None:
+    """Test that each shard writes its own output."""
+    assert Shard(index=0, count=2).apply_to_path("/tmp/output.xlsx") == (
+        "/tmp/output.shard-0-of-2.xlsx"
+    )
@@ -0,0 +1,138 @@
+"""Tests for the wide matrix export."""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyesef.parse_xbrl_file.common import EsefData
+from pyesef.parse_xbrl_file.fact_store import FactStore
+from pyesef.parse_xbrl_file.read_and_save_filings import data_list_to_clean_df
+from pyesef.wide_matrix import WideMatrix, build_wide_matrix, export_wide_matrix
+
+
+def _esef_data(
+    lei: str,
+    year: int,
+    xml_name: str,
+    value: float,
+    *,
+    membership: str | None = None,
+    wider_anchor: str | None = None,
+) -> EsefData:
+    """Return a fact."""
+    return EsefData(
+        period_end=date(year, 12, 31),
+        lei=lei,
+        wider_anchor_or_xml_name=wider_anchor or xml_name,
+        wider_anchor=wider_anchor,
+        xml_name=xml_name,
+        currency="SEK",
+        value=value,
+        is_company_defined=False,
+        membership=membership,
+        label=None,
+        level_1="IncomeStatement",
+    )
+
+
+@pytest.fixture(name="df_facts")
+def fixture_df_facts() -> pd.DataFrame:
+    """Return cleaned facts of two companies."""
+    return data_list_to_clean_df(
+        data_list=[
+            _esef_data("lei-se", 2021, "Revenue", 100),
+            _esef_data("lei-se", 2021, "ProfitLoss", 10),
+            _esef_data("lei-se", 2022, "Revenue", 120),
+            _esef_data("lei-no", 2022, "ProfitLoss", 20),
+            # A breakdown of the item, left out of the matrix
+            _esef_data("lei-no", 2022, "ProfitLoss", 5, membership="Segment"),
+        ]
+    )
+
+
+def test_build_wide_matrix(df_facts, tmp_path) -> None:
+    """Test that facts are coded and saved with their code dictionaries."""
+    wide_matrix = build_wide_matrix(df_facts)
+
+    assert wide_matrix.shape == (2, 2, 2)
+    assert wide_matrix.lei_list.tolist() == ["lei-no", "lei-se"]
+    assert wide_matrix.period_end_list.tolist() == ["2021-12-31", "2022-12-31"]
+    assert wide_matrix.item_list.tolist() == ["ProfitLoss", "Revenue"]
+    assert wide_matrix.currency_list.tolist() == ["SEK"]
+    assert len(wide_matrix.value) == 4
+
+    path = str(tmp_path / "wide.npz")
+    wide_matrix.save(path)
+    loaded_wide_matrix = WideMatrix.load(path)
+
+    assert loaded_wide_matrix.item_list.tolist() == ["ProfitLoss", "Revenue"]
+    assert np.array_equal(loaded_wide_matrix.value, wide_matrix.value)
+    assert np.array_equal(loaded_wide_matrix.item_code, wide_matrix.item_code)
+
+
+def test_cross_section(df_facts) -> None:
+    """Test that one period is returned as an entity by item dataframe."""
+    wide_matrix = build_wide_matrix(df_facts)
+
+    df_cross_section = wide_matrix.cross_section(date(2022, 12, 31))
+    assert df_cross_section.index.tolist() == ["lei-no", "lei-se"]
+    assert df_cross_section.columns.tolist() == ["ProfitLoss", "Revenue"]
+    assert df_cross_section.loc["lei-no", "ProfitLoss"] == 20
+    assert df_cross_section.loc["lei-se", "Revenue"] == 120
+    assert pd.isna(df_cross_section.at["lei-no", "Revenue"])
+
+    df_cross_section = wide_matrix.cross_section(
+        "2021-12-31", item_list=["Revenue", "Assets"]
+    )
+    assert df_cross_section.index.tolist() == ["lei-se"]
+    assert df_cross_section.columns.tolist() == ["Revenue", "Assets"]
+    assert df_cross_section.loc["lei-se", "Revenue"] == 100
+
+    with pytest.raises(KeyError):
+        wide_matrix.cross_section("2023-12-31")
+
+
+def test_build_wide_matrix__values() -> None:
+    """Test that items are concepts, values keep decimals and restatements agree."""
+    data_list = [
+        # Two concepts with the same wider anchor
+        _esef_data("lei-se", 2022, "Revenue", 100.25, wider_anchor="Revenue"),
+        _esef_data("lei-se", 2022, "OtherIncome", 7, wider_anchor="Revenue"),
+        # A concept stated with different values
+        _esef_data("lei-se", 2022, "ProfitLoss", 12),
+        _esef_data("lei-se", 2022, "ProfitLoss", 10),
+    ]
+
+    for df_facts in (
+        data_list_to_clean_df(data_list=data_list, compact=True),
+        data_list_to_clean_df(data_list=data_list).assign(
+            value=[100.25, 7.0, 12.0, 10.0]
+        ),
+    ):
+        wide_matrix = build_wide_matrix(df_facts)
+        assert wide_matrix.value.dtype == np.float64
+
+        df_cross_section = wide_matrix.cross_section("2022-12-31")
+        assert df_cross_section.columns.tolist() == [
+            "OtherIncome",
+            "ProfitLoss",
+            "Revenue",
+        ]
+        assert df_cross_section.at["lei-se", "Revenue"] == 100.25
+        assert df_cross_section.at["lei-se", "OtherIncome"] == 7
+        assert df_cross_section.at["lei-se", "ProfitLoss"] == 11
+
+
+def test_export_wide_matrix(df_facts, tmp_path) -> None:
+    """Test that the facts of the fact store are exported."""
+    path = str(tmp_path / "output.sqlite")
+    fact_store = FactStore(path=path)
+    fact_store.upsert(df_to_save=df_facts, zip_file_path="filing.zip", country="SE")
+    fact_store.close()
+
+    output_path = str(tmp_path / "wide.npz")
+    export_wide_matrix(output_path, path=path, lei="lei-se")
+
+    assert WideMatrix.load(output_path).lei_list.tolist() == ["lei-se"]